@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Aho-Corasick coin matcher against the per-coin regex loop
+
+Times CoinMatcher.match and the batch scan coin_matcher.match_articles, and
+checks the matched coins and relevance scores of match_articles against
+utils.match_coin_in_text and utils.calculate_relevance_score on a sample
+
+Usage:
+    python3 benchmarks/bench_coin_matcher.py --articles 10000 --coins 5000
+"""
+
+import sys
+import math
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from synthetic import make_coins, make_articles  # noqa: E402
+from utils import match_coin_in_text, calculate_relevance_score  # noqa: E402
+from coin_matcher import CoinMatcher, match_articles  # noqa: E402
+
+
+def article_text(article):
+    return f"{article.get('title', '')} {article.get('description', '')}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--articles', type=int, default=10000)
+    parser.add_argument('--coins', type=int, default=5000)
+    parser.add_argument('--baseline-sample', type=int, default=100,
+                        help="Articles to run through the slow per-coin loop (result is extrapolated)")
+    args = parser.parse_args()
+
+    coins = make_coins(args.coins)
+    articles = make_articles(args.articles, coins)
+
+    start = time.perf_counter()
+    matcher = CoinMatcher(coins)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = [list(matcher.match(article_text(a))) for a in articles]
+    match_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch_results = match_articles(articles, matcher)
+    batch_time = time.perf_counter() - start
+
+    # The pipeline's old per-coin loop: regex matching, then scoring each match
+    sample = articles[:args.baseline_sample]
+    start = time.perf_counter()
+    baseline = []
+    for a in sample:
+        matched = [idx for idx, coin in enumerate(coins) if match_coin_in_text(article_text(a), coin)]
+        baseline.append((matched, {idx: calculate_relevance_score(a, coins[idx]) for idx in matched}))
+    baseline_time = (time.perf_counter() - start) * len(articles) / max(1, len(sample))
+
+    mismatches = sum(1 for got, (want, _) in zip(results, baseline) if got != want)
+    batch_mismatches = sum(
+        1 for (got, got_scores), (want, want_scores) in zip(batch_results, baseline)
+        if got != want or any(not math.isclose(got_scores.get(idx, 0.0), score) for idx, score in want_scores.items())
+    )
+    hits = sum(len(r) for r in results)
+
+    print(f"{args.articles} articles x {args.coins} coins ({hits} coin hits)")
+    print(f"  automaton build:       {build_time:8.3f}s")
+    print(f"  single-pass matcher:   {match_time:8.3f}s")
+    print(f"  match_articles:        {batch_time:8.3f}s (matching and scoring)")
+    print(f"  per-coin regex loop:   {baseline_time:8.3f}s (extrapolated from {len(sample)} articles)")
+    print(f"  speedup:               {baseline_time / batch_time:8.1f}x (match_articles)")
+    print(f"  mismatches in sample:  {mismatches} (match), {batch_mismatches} (match_articles)")
+
+    return 1 if mismatches or batch_mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark front matter rendering: libyaml fast path vs pure-Python yaml.dump
+
+Also checks that the fast path reproduces the front matter of every file in
+site/content/news byte for byte.
+
+Usage:
+    python3 benchmarks/bench_front_matter.py --articles 5000
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import yaml  # noqa: E402
+from synthetic import make_coins, make_articles  # noqa: E402
+from config import CONTENT_DIR  # noqa: E402
+from article_index import read_front_matter  # noqa: E402
+from generate_content import generate_front_matter, dump_front_matter, FastDumper  # noqa: E402
+
+
+def slow_dump(front_matter):
+    return yaml.dump(front_matter, default_flow_style=False, allow_unicode=True)
+
+
+def check_corpus():
+    checked = mismatches = 0
+
+    for filepath in sorted(CONTENT_DIR.glob('*.md')):
+        front_matter, raw = read_front_matter(filepath)
+        if front_matter is None:
+            continue
+
+        on_disk = raw.decode('utf-8').split('---', 2)[1].strip()
+        checked += 1
+        if dump_front_matter(front_matter).strip() != on_disk:
+            mismatches += 1
+            print(f"  mismatch: {filepath.name}")
+
+    return checked, mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--articles', type=int, default=5000)
+    args = parser.parse_args()
+
+    if FastDumper is None:
+        print("libyaml is not available; the fast path falls back to yaml.dump")
+
+    checked, mismatches = check_corpus()
+    print(f"Corpus check: {checked} files, {mismatches} mismatches")
+
+    articles = make_articles(args.articles, make_coins(100))
+    front_matters = [generate_front_matter(a) for a in articles]
+
+    start = time.perf_counter()
+    slow = [slow_dump(fm) for fm in front_matters]
+    slow_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fast = [dump_front_matter(fm) for fm in front_matters]
+    fast_time = time.perf_counter() - start
+
+    different = sum(1 for a, b in zip(slow, fast) if a != b)
+
+    print(f"{args.articles} front matters")
+    print(f"  yaml.dump (pure Python): {slow_time:8.3f}s")
+    print(f"  dump_front_matter:       {fast_time:8.3f}s")
+    print(f"  speedup:                 {slow_time / fast_time:8.1f}x")
+    print(f"  differing outputs:       {different}")
+
+    return 1 if mismatches or different else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
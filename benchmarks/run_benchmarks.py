@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite for the pipeline hot paths
+
+Generates synthetic coins, articles and a content directory per scale,
+times the pipeline functions and writes the results as JSON. No network
+access is needed; data and content live in a temporary directory.
+
+Usage:
+    python3 benchmarks/run_benchmarks.py --scales small,medium
+    python3 benchmarks/run_benchmarks.py --compare benchmarks/results/old.json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import subprocess
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+ROOT_DIR = BENCH_DIR.parent
+WORK_DIR = Path(tempfile.mkdtemp(prefix="ai-crypto-news-bench-"))
+
+# Point config at the scratch directory before any pipeline module is imported
+os.environ["DATA_DIR"] = str(WORK_DIR / "data")
+os.environ["CONTENT_DIR"] = str(WORK_DIR / "content")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+(WORK_DIR / "data").mkdir(parents=True)
+
+sys.path.insert(0, str(ROOT_DIR / "scripts"))
+
+from synthetic import make_coins, make_articles  # noqa: E402
+from config import CONTENT_DIR, ARTICLE_INDEX_PATH  # noqa: E402
+from coin_registry import CoinRegistry  # noqa: E402
+from fetch_news import match_articles_to_coins, deduplicate_articles  # noqa: E402
+from gnews_planner import plan_queries  # noqa: E402
+from generate_content import (  # noqa: E402
+    generate_article_content,
+    generate_article_filename,
+    generate_content_from_articles,
+    get_existing_source_urls,
+    cleanup_old_articles
+)
+
+# articles (N), coins (M), existing markdown files (K)
+SCALES = {
+    "small": {"articles": 100, "coins": 100, "files": 200},
+    "medium": {"articles": 1000, "coins": 1000, "files": 2000},
+    "large": {"articles": 10000, "coins": 5000, "files": 20000},
+}
+
+
+def reset_workspace():
+    """
+    Empty the scratch content directory and article index
+    """
+    shutil.rmtree(CONTENT_DIR, ignore_errors=True)
+    CONTENT_DIR.mkdir(parents=True)
+    if ARTICLE_INDEX_PATH.exists():
+        ARTICLE_INDEX_PATH.unlink()
+
+
+def populate_content_dir(count, coins):
+    """
+    Write `count` existing articles spread over the last 60 days
+
+    Args:
+        count: Number of markdown files
+        coins: Coin dicts to mention
+    """
+    now = datetime.utcnow()
+
+    for i, article in enumerate(make_articles(count, coins, seed=99)):
+        published = now - timedelta(days=i % 60, hours=i % 24)
+        article['publishedAt'] = published.strftime('%Y-%m-%dT%H:%M:%SZ')
+        article['url'] = f"https://existing.example.com/{i}"
+        article['coins'] = coins[:2]
+        filename = f"{generate_article_filename(article)[:-3]}-{i}.md"
+        (CONTENT_DIR / filename).write_text(generate_article_content(article), encoding='utf-8')
+
+
+def timed(func, *args, repeat=1, setup=None):
+    """
+    Time a call, keeping the best of `repeat` runs
+
+    Args:
+        func: Function to call
+        *args: Arguments for func
+        repeat: Number of runs
+        setup: Optional callable run (untimed) before each run
+
+    Returns:
+        Tuple of (best seconds, result of the last run)
+    """
+    best = None
+    result = None
+
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best, result
+
+
+def run_scale(name, scale, repeat):
+    """
+    Run every benchmark at one scale
+
+    Args:
+        name: Scale name
+        scale: Dict with 'articles', 'coins' and 'files'
+        repeat: Repeats for benchmarks without side effects
+
+    Returns:
+        List of result dicts
+    """
+    coins = make_coins(scale["coins"])
+    raw_articles = make_articles(scale["articles"], coins)
+    # Every tenth article is a repeat, like overlapping search results
+    raw_articles += raw_articles[::10]
+
+    results = []
+
+    def record(benchmark, seconds, items):
+        results.append({
+            "scale": name,
+            "benchmark": benchmark,
+            "seconds": round(seconds, 6),
+            "items": items,
+            "items_per_sec": round(items / seconds, 1) if seconds > 0 else None,
+            **scale,
+        })
+        print(f"  {benchmark:<32} {seconds:10.4f}s  ({items} items)")
+
+    seconds, registry = timed(CoinRegistry, coins, repeat=repeat)
+    record("CoinRegistry", seconds, len(coins))
+
+    seconds, _ = timed(plan_queries, registry, repeat=repeat)
+    record("plan_queries", seconds, len(coins))
+
+    seconds, matched = timed(match_articles_to_coins, raw_articles, registry, repeat=repeat)
+    record("match_articles_to_coins", seconds, len(raw_articles))
+
+    seconds, unique = timed(deduplicate_articles, matched, repeat=repeat)
+    record("deduplicate_articles", seconds, len(matched))
+
+    reset_workspace()
+    populate_content_dir(scale["files"], coins)
+
+    seconds, _ = timed(get_existing_source_urls)
+    record("get_existing_source_urls (cold)", seconds, scale["files"])
+
+    seconds, _ = timed(get_existing_source_urls, repeat=repeat)
+    record("get_existing_source_urls (warm)", seconds, scale["files"])
+
+    seconds, _ = timed(generate_content_from_articles, unique)
+    record("generate_content_from_articles", seconds, len(unique))
+
+    seconds, _ = timed(cleanup_old_articles)
+    record("cleanup_old_articles", seconds, scale["files"] + len(unique))
+
+    return results
+
+
+def git_revision():
+    """
+    Return the current git commit, or None outside a checkout
+    """
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def compare(results, baseline_path):
+    """
+    Print the change against a previous results file
+
+    Args:
+        results: Current result dicts
+        baseline_path: Path to an earlier JSON results file
+    """
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    previous = {(r["scale"], r["benchmark"]): r["seconds"] for r in baseline["results"]}
+
+    print(f"\nCompared with {baseline_path} ({baseline['meta'].get('revision')}):")
+    for r in results:
+        old = previous.get((r["scale"], r["benchmark"]))
+        if old:
+            change = (r["seconds"] - old) / old * 100
+            print(f"  {r['scale']:<7} {r['benchmark']:<32} {old:10.4f}s -> {r['seconds']:10.4f}s ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the pipeline hot paths")
+    parser.add_argument('--scales', default="small,medium",
+                        help=f"Comma-separated scales ({', '.join(SCALES)})")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per side-effect-free benchmark")
+    parser.add_argument('--output', type=Path, help="Results file (default: benchmarks/results/<revision>.json)")
+    parser.add_argument('--compare', type=Path, help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    scale_names = [s.strip() for s in args.scales.split(',') if s.strip()]
+    unknown = [s for s in scale_names if s not in SCALES]
+    if unknown:
+        parser.error(f"Unknown scales: {', '.join(unknown)}")
+
+    revision = git_revision()
+    results = []
+
+    try:
+        for name in scale_names:
+            print(f"Scale '{name}': {SCALES[name]}")
+            results.extend(run_scale(name, SCALES[name], args.repeat))
+    finally:
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "revision": revision,
+            "created_at": datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+    output = args.output or BENCH_DIR / "results" / f"{revision or 'unversioned'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Synthetic corpora for offline benchmarks
+Generates coins shaped like data/coins.json and GNews-style articles
+"""
+
+import random
+import string
+
+SYLLABLES = [
+    "bit", "coin", "eth", "sol", "ana", "card", "ano", "dot", "link", "chain",
+    "ava", "lan", "che", "poly", "gon", "ton", "near", "apt", "os", "sui",
+    "pepe", "doge", "shib", "arb", "op", "ti", "mism", "uni", "swap", "aave",
+    "maker", "curve", "lido", "rocket", "pool", "stel", "lar", "her", "hed",
+    "ra", "cos", "mos", "al", "go", "rand", "tez", "os", "fil", "ecoin", "ripple",
+]
+
+FILLER_WORDS = [
+    "market", "price", "investors", "analysts", "rally", "drops", "surges", "week",
+    "trading", "volume", "exchange", "regulators", "approval", "etf", "inflows",
+    "outflows", "whale", "wallet", "token", "network", "upgrade", "launch", "report",
+    "billion", "million", "record", "high", "low", "support", "resistance", "bullish",
+    "bearish", "momentum", "institutional", "demand", "supply", "holders", "sell-off",
+]
+
+TEMPLATES = [
+    "{coin} price {verb} as {noun} {verb2} amid {noun2}",
+    "{sym} {verb} {pct}% after {noun} {noun2} news",
+    "Why {coin} and {coin2} {verb} this week, according to {noun}",
+    "{coin} ({sym}) {noun} hits ${num} million in {noun2}",
+    "Spot {coin} ETFs see ${num}M in {noun} as {sym} {verb}",
+]
+
+
+def make_coins(count, seed=42):
+    """
+    Generate coin dicts shaped like data/coins.json
+
+    Args:
+        count: Number of coins
+        seed: Random seed
+
+    Returns:
+        List of coin dicts with id, symbol, name, market_cap_rank
+    """
+    rng = random.Random(seed)
+    coins = []
+    seen_ids = set()
+
+    while len(coins) < count:
+        parts = [rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))]
+        name = ''.join(parts).capitalize()
+        if rng.random() < 0.15:
+            name += " " + rng.choice(["Network", "Protocol", "Token", "Cash", "Classic"])
+        coin_id = name.lower().replace(' ', '-')
+        if coin_id in seen_ids:
+            coin_id = f"{coin_id}-{len(coins)}"
+        seen_ids.add(coin_id)
+
+        symbol = ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 5)))
+
+        coins.append({
+            "id": coin_id,
+            "symbol": symbol,
+            "name": name,
+            "market_cap_rank": len(coins) + 1
+        })
+
+    return coins
+
+
+def make_articles(count, coins, seed=7):
+    """
+    Generate GNews-style article dicts mentioning the given coins
+
+    Args:
+        count: Number of articles
+        coins: Coin dicts to mention (top ranks are mentioned more often)
+        seed: Random seed
+
+    Returns:
+        List of article dicts
+    """
+    rng = random.Random(seed)
+    articles = []
+
+    def pick_coin():
+        # Skew mentions towards the top of the ranking, like real news
+        idx = min(int(rng.expovariate(1 / 25)), len(coins) - 1)
+        return coins[idx]
+
+    for i in range(count):
+        coin, coin2 = pick_coin(), pick_coin()
+        title = rng.choice(TEMPLATES).format(
+            coin=coin['name'], coin2=coin2['name'], sym=coin['symbol'].upper(),
+            verb=rng.choice(["rises", "falls", "jumps", "slides", "stalls"]),
+            verb2=rng.choice(["buy", "sell", "wait", "hedge"]),
+            noun=rng.choice(FILLER_WORDS), noun2=rng.choice(FILLER_WORDS),
+            pct=rng.randint(1, 30), num=rng.randint(10, 900),
+        )
+        description = ' '.join(
+            rng.choice(FILLER_WORDS) if rng.random() > 0.1 else pick_coin()['name']
+            for _ in range(rng.randint(25, 45))
+        ).capitalize() + '.'
+        publisher = rng.choice(["coindesk", "cointelegraph", "decrypt", "theblock", "bitcoinist"])
+
+        articles.append({
+            "title": title,
+            "description": description,
+            "content": description * 3,
+            "url": f"https://www.{publisher}.com/news/{i}-{coin['id']}",
+            "image": f"https://images.{publisher}.com/{i}.jpg",
+            "publishedAt": f"2025-12-{(i % 28) + 1:02d}T{i % 24:02d}:00:00Z",
+            "source": {"name": publisher.capitalize(), "url": f"https://www.{publisher}.com"},
+        })
+
+    return articles
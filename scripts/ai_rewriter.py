@@ -3,15 +3,307 @@ AI-powered article rewriting and translation using OpenAI
 """
 
 from openai import OpenAI
+import json
 import time
-
-from config import OPENAI_API_KEY, OPENAI_MODEL, OPENAI_MAX_TOKENS
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config import (
+    OPENAI_API_KEY,
+    OPENAI_BASE_URL,
+    OPENAI_MODEL,
+    OPENAI_MAX_TOKENS,
+    OPENAI_MAX_CONCURRENCY,
+    OPENAI_RPM_LIMIT,
+    OPENAI_TPM_LIMIT,
+    OPENAI_STREAM,
+    STREAM_INVALID_RETRIES
+)
 from utils import setup_logger
+from resilience import call, limiter
+from prompt_prep import truncate_to_tokens, content_token_budget
+from json_stream import StreamingJSONValidator, InvalidStreamError
+import metrics
 
 logger = setup_logger(__name__)
 
-# Initialize OpenAI client
-client = OpenAI(api_key=OPENAI_API_KEY)
+# Initialize OpenAI client; retries are handled by resilience.call, not the client
+client = OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL, max_retries=0)
+
+# Rough average for English/German prose with OpenAI tokenizers
+CHARS_PER_TOKEN = 4
+
+
+class TokenBucket:
+    """
+    Token bucket limiting both requests per minute and tokens per minute
+
+    Both budgets refill continuously. Callers reserve an estimated token
+    count up front and correct the bucket with the real usage afterwards.
+    """
+
+    def __init__(self, requests_per_minute=OPENAI_RPM_LIMIT, tokens_per_minute=OPENAI_TPM_LIMIT):
+        self.request_capacity = float(requests_per_minute)
+        self.token_capacity = float(tokens_per_minute)
+        self.requests = self.request_capacity
+        self.tokens = self.token_capacity
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.acquired = 0
+        self._lock = threading.Lock()
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self.requests = min(self.request_capacity, self.requests + elapsed * self.request_capacity / 60.0)
+        self.tokens = min(self.token_capacity, self.tokens + elapsed * self.token_capacity / 60.0)
+
+    def acquire(self, tokens):
+        """
+        Block until one request and `tokens` tokens are available
+
+        Args:
+            tokens: Estimated tokens the request will consume
+
+        Returns:
+            Seconds spent waiting
+        """
+        # A single request larger than the whole budget can never fit otherwise
+        tokens = min(float(tokens), self.token_capacity)
+        start = time.monotonic()
+
+        while True:
+            with self._lock:
+                self._refill()
+                if self.requests >= 1 and self.tokens >= tokens:
+                    self.requests -= 1
+                    self.tokens -= tokens
+                    waited = time.monotonic() - start
+                    self.total_wait += waited
+                    self.max_wait = max(self.max_wait, waited)
+                    self.acquired += 1
+                    return waited
+
+                request_wait = (1 - self.requests) * 60.0 / self.request_capacity
+                token_wait = (tokens - self.tokens) * 60.0 / self.token_capacity
+                delay = max(request_wait, token_wait, 0.01)
+
+            time.sleep(delay)
+
+    def reconcile(self, estimated_tokens, actual_tokens):
+        """
+        Correct the bucket once the real token usage is known
+
+        Args:
+            estimated_tokens: Tokens reserved in acquire()
+            actual_tokens: Tokens reported by response.usage
+        """
+        with self._lock:
+            self.tokens = min(self.token_capacity, self.tokens + estimated_tokens - actual_tokens)
+
+
+# Shared by every rewrite in this process
+rate_limiter = TokenBucket()
+openai_limiter = limiter('openai', OPENAI_MAX_CONCURRENCY)
+
+
+def estimate_tokens(*texts):
+    """
+    Estimate the token count of prompt texts
+
+    Args:
+        *texts: Prompt strings
+
+    Returns:
+        Estimated number of tokens
+    """
+    return sum(len(text) for text in texts if text) // CHARS_PER_TOKEN + 1
+
+
+def completion_params(system_prompt, user_prompt):
+    """
+    Build the chat completion parameters for a rewrite request
+
+    Shared by synchronous calls and Batch API request lines.
+
+    Args:
+        system_prompt: System prompt
+        user_prompt: User prompt
+
+    Returns:
+        Dict of chat completion parameters
+    """
+    return {
+        'model': OPENAI_MODEL,
+        'messages': [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ],
+        'max_tokens': OPENAI_MAX_TOKENS,
+        'temperature': 0.7,
+        'response_format': {"type": "json_object"}
+    }
+
+
+def parse_rewrite_result(result_text):
+    """
+    Parse and validate the JSON returned for a rewrite
+
+    Args:
+        result_text: Message content of the completion
+
+    Returns:
+        Dict with 'title', 'summary', 'content' or None if the format is invalid
+
+    Raises:
+        json.JSONDecodeError: The content is not valid JSON
+    """
+    result = json.loads(result_text)
+
+    if not isinstance(result, dict) or 'title' not in result or 'content' not in result:
+        return None
+
+    # Ensure we have a summary
+    if 'summary' not in result or not result['summary']:
+        # Create summary from first 2 sentences
+        sentences = result['content'].split('.')[:2]
+        result['summary'] = '.'.join(sentences) + '.'
+
+    return result
+
+
+def create_rewrite_completion(system_prompt, user_prompt, bucket=None):
+    """
+    Send one rewrite request to OpenAI through the token bucket
+
+    Args:
+        system_prompt: System prompt
+        user_prompt: User prompt
+        bucket: TokenBucket to draw from (defaults to the shared one)
+
+    Returns:
+        OpenAI chat completion response
+    """
+    bucket = bucket or rate_limiter
+
+    # Completion tokens count against the limit too, so reserve max_tokens
+    estimated = estimate_tokens(system_prompt, user_prompt) + OPENAI_MAX_TOKENS
+    bucket.acquire(estimated)
+
+    try:
+        with openai_limiter.slot(), metrics.external_call('openai'):
+            response = client.chat.completions.create(**completion_params(system_prompt, user_prompt))
+    except Exception:
+        # Failed requests still count against RPM but not against TPM
+        bucket.reconcile(estimated, 0)
+        raise
+
+    usage = getattr(response, 'usage', None)
+    bucket.reconcile(estimated, usage.total_tokens if usage else estimated)
+    metrics.record_token_usage(usage)
+
+    return response
+
+
+def stream_rewrite_completion(system_prompt, user_prompt, bucket=None):
+    """
+    Stream one rewrite from OpenAI, validating the JSON as it arrives
+
+    Records time to first token and generation speed (tokens/sec) per
+    model, and on the current span. A response that cannot become a valid
+    rewrite is aborted as soon as that is clear.
+
+    Args:
+        system_prompt: System prompt
+        user_prompt: User prompt
+        bucket: TokenBucket to draw from (defaults to the shared one)
+
+    Returns:
+        Tuple of (response text, usage object or None)
+
+    Raises:
+        InvalidStreamError: The response was aborted
+    """
+    bucket = bucket or rate_limiter
+    labels = {'model': OPENAI_MODEL}
+
+    estimated = estimate_tokens(system_prompt, user_prompt) + OPENAI_MAX_TOKENS
+    bucket.acquire(estimated)
+
+    validator = StreamingJSONValidator()
+    usage = None
+    first_token_at = None
+    start = time.monotonic()
+
+    try:
+        with openai_limiter.slot(), metrics.external_call('openai'):
+            stream = client.chat.completions.create(
+                **completion_params(system_prompt, user_prompt),
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            try:
+                for chunk in stream:
+                    if chunk.usage:
+                        usage = chunk.usage
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if not delta:
+                        continue
+                    if first_token_at is None:
+                        first_token_at = time.monotonic()
+                    validator.feed(delta)
+                validator.finish()
+            finally:
+                # Closing mid-stream drops the connection, which stops the generation
+                stream.close()
+    except InvalidStreamError as e:
+        # Only the prompt and the tokens generated before the abort are billed
+        bucket.reconcile(estimated, estimate_tokens(system_prompt, user_prompt, validator.text))
+        metrics.incr('openai_stream_aborts_total', {'reason': e.reason, **labels})
+        raise
+    except Exception:
+        bucket.reconcile(estimated, 0)
+        raise
+
+    end = time.monotonic()
+    completion_tokens = usage.completion_tokens if usage else estimate_tokens(validator.text)
+
+    if first_token_at is not None:
+        ttft = first_token_at - start
+        metrics.observe('openai_ttft_seconds', ttft, labels)
+        timing = {'ttft': round(ttft, 3)}
+        if end > first_token_at:
+            tokens_per_second = completion_tokens / (end - first_token_at)
+            metrics.observe('openai_tokens_per_second', tokens_per_second, labels)
+            timing['tokens_per_second'] = round(tokens_per_second, 1)
+        metrics.annotate(**timing)
+
+    bucket.reconcile(estimated, usage.total_tokens if usage else estimated)
+    metrics.record_token_usage(usage)
+
+    return validator.text, usage
+
+
+def request_rewrite(system_prompt, user_prompt, bucket=None, stream=OPENAI_STREAM):
+    """
+    Send one rewrite request, streamed or not
+
+    Args:
+        system_prompt: System prompt
+        user_prompt: User prompt
+        bucket: TokenBucket to draw from (defaults to the shared one)
+        stream: Stream the response (see stream_rewrite_completion)
+
+    Returns:
+        Tuple of (response text, usage object or None)
+    """
+    if stream:
+        return stream_rewrite_completion(system_prompt, user_prompt, bucket)
+
+    response = create_rewrite_completion(system_prompt, user_prompt, bucket)
+    return response.choices[0].message.content, response.usage
 
 
 def build_rewrite_prompt(title, content, coins):
@@ -49,7 +341,7 @@ Relevante Kryptowährungen: {coins_str}
 Original-Titel: {title}
 
 Original-Inhalt:
-{content[:4000]}
+{truncate_to_tokens(content, content_token_budget())}
 
 Bitte erstelle:
 1. Einen ansprechenden deutschen Titel
@@ -66,14 +358,20 @@ Format deine Antwort als JSON:
     return system_prompt, user_prompt
 
 
-def rewrite_article_german(title, content, coins):
+def rewrite_article_german(title, content, coins, bucket=None):
     """
     Rewrite article in German using OpenAI
 
+    API errors are retried through resilience.call (Retry-After, backoff,
+    circuit breaker). Invalid output (an aborted stream or JSON without
+    title and content) is a bad generation, not an overloaded API, so it
+    is retried straight away up to STREAM_INVALID_RETRIES times.
+
     Args:
         title: Original title
         content: Original content
         coins: List of relevant coin dicts
+        bucket: TokenBucket to draw from (defaults to the shared one)
 
     Returns:
         Dict with 'title', 'summary', 'content' in German or None if failed
@@ -84,95 +382,98 @@ def rewrite_article_german(title, content, coins):
         # Build prompts
         system_prompt, user_prompt = build_rewrite_prompt(title, content, coins)
 
-        # Call OpenAI API
-        response = client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            max_tokens=OPENAI_MAX_TOKENS,
-            temperature=0.7,
-            response_format={"type": "json_object"}
-        )
-
-        # Extract response
-        result_text = response.choices[0].message.content
-
-        # Parse JSON response
-        import json
-        result = json.loads(result_text)
-
-        # Log token usage for cost tracking
-        tokens_used = response.usage.total_tokens
-        logger.info(f"Article rewritten. Tokens used: {tokens_used}")
-
-        # Validate result
-        if 'title' in result and 'content' in result:
-            # Ensure we have a summary
-            if 'summary' not in result or not result['summary']:
-                # Create summary from first 2 sentences
-                sentences = result['content'].split('.')[:2]
-                result['summary'] = '.'.join(sentences) + '.'
-
-            return result
-        else:
-            logger.error(f"Invalid response format from OpenAI: {result_text[:200]}")
-            return None
+        for attempt in range(STREAM_INVALID_RETRIES + 1):
+            try:
+                result_text, usage = call('openai', request_rewrite, system_prompt, user_prompt, bucket)
+            except InvalidStreamError as e:
+                logger.warning(f"Aborted streamed rewrite (attempt {attempt + 1}): {e}")
+                continue
+
+            # Log token usage for cost tracking
+            tokens_used = usage.total_tokens if usage else 'unknown'
+            logger.info(f"Article rewritten. Tokens used: {tokens_used}")
+
+            # Extract and validate the JSON response
+            try:
+                result = parse_rewrite_result(result_text)
+            except json.JSONDecodeError:
+                result = None
+            if result is not None:
+                return result
+
+            logger.warning(f"Invalid response format from OpenAI (attempt {attempt + 1}): {result_text[:200]}")
+
+        logger.error(f"Giving up on rewrite after {STREAM_INVALID_RETRIES + 1} invalid generations")
+        return None
 
     except Exception as e:
         logger.error(f"OpenAI rewriting failed: {e}")
-        return retry_with_backoff(title, content, coins)
+        return None
 
 
-def retry_with_backoff(title, content, coins, max_retries=3):
+def rewrite_articles_concurrently(jobs, max_in_flight=OPENAI_MAX_CONCURRENCY, bucket=None):
     """
-    Retry OpenAI request with exponential backoff
+    Rewrite many articles in parallel, governed by the token bucket
 
     Args:
-        title: Article title
-        content: Article content
-        coins: Relevant coins
-        max_retries: Maximum number of retries
+        jobs: List of dicts with 'title', 'content' and 'coins' keys
+        max_in_flight: Maximum number of concurrent OpenAI requests
+        bucket: TokenBucket to draw from (defaults to the shared one)
 
     Returns:
-        Rewritten article or None
+        Tuple of (results in input order, stats dict). Failed rewrites are None.
     """
-    for attempt in range(max_retries):
+    bucket = bucket or rate_limiter
+    results = [None] * len(jobs)
+    lock = threading.Lock()
+    in_flight = [0]
+    max_parallel = [0]
+
+    wait_before = bucket.total_wait
+    acquired_before = bucket.acquired
+
+    def rewrite(idx, job):
+        with lock:
+            in_flight[0] += 1
+            max_parallel[0] = max(max_parallel[0], in_flight[0])
+            metrics.observe('openai_rewrites_in_flight', in_flight[0])
         try:
-            delay = 2 ** attempt  # Exponential backoff: 1s, 2s, 4s
-            logger.info(f"Retry attempt {attempt + 1}/{max_retries} after {delay}s delay")
-            time.sleep(delay)
-
-            system_prompt, user_prompt = build_rewrite_prompt(title, content, coins)
-
-            response = client.chat.completions.create(
-                model=OPENAI_MODEL,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                max_tokens=OPENAI_MAX_TOKENS,
-                temperature=0.7,
-                response_format={"type": "json_object"}
-            )
-
-            import json
-            result = json.loads(response.choices[0].message.content)
-
-            if 'title' in result and 'content' in result:
-                if 'summary' not in result:
-                    sentences = result['content'].split('.')[:2]
-                    result['summary'] = '.'.join(sentences) + '.'
-                return result
-
+            with metrics.span('rewrite_article', title=job['title'][:80]):
+                results[idx] = rewrite_article_german(job['title'], job['content'], job['coins'], bucket=bucket)
         except Exception as e:
-            logger.warning(f"Retry {attempt + 1} failed: {e}")
-            if attempt == max_retries - 1:
-                logger.error("All retries exhausted")
-                return None
-
-    return None
+            logger.error(f"Rewrite failed for {job['title'][:50]}: {e}")
+        finally:
+            with lock:
+                in_flight[0] -= 1
+
+    start = time.monotonic()
+
+    if jobs:
+        with ThreadPoolExecutor(max_workers=max(1, max_in_flight)) as executor:
+            for idx, job in enumerate(jobs):
+                executor.submit(rewrite, idx, job)
+
+    elapsed = time.monotonic() - start
+    requests_made = bucket.acquired - acquired_before
+    bucket_wait = bucket.total_wait - wait_before
+
+    stats = {
+        'total': len(jobs),
+        'succeeded': sum(1 for r in results if r),
+        'elapsed': elapsed,
+        'max_parallel': max_parallel[0],
+        'requests': requests_made,
+        'bucket_wait': bucket_wait,
+        'avg_bucket_wait': bucket_wait / requests_made if requests_made else 0.0,
+    }
+
+    logger.info(
+        f"Rewrote {stats['succeeded']}/{stats['total']} articles in {elapsed:.2f}s "
+        f"(max {stats['max_parallel']} in parallel, {bucket_wait:.2f}s total / "
+        f"{stats['avg_bucket_wait']:.2f}s avg waiting for rate limits)"
+    )
+
+    return results, stats
 
 
 def main():
@@ -0,0 +1,394 @@
+"""
+Persistent SQLite index of published articles, keyed by source URL
+Avoids rescanning every markdown file's front matter on each run
+"""
+
+import sys
+import sqlite3
+import hashlib
+import argparse
+import yaml
+
+from config import ARTICLE_INDEX_PATH, CONTENT_DIR
+from utils import setup_logger, get_current_time_utc
+
+logger = setup_logger(__name__)
+
+STATUS_PUBLISHED = "published"
+STATUS_REMOVED = "removed"
+
+# Stay well below SQLite's limit on bound parameters per statement
+QUERY_CHUNK_SIZE = 500
+
+BUSY_TIMEOUT = 30  # seconds to wait for another process's write lock
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    source_url TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    publish_date TEXT,
+    coins TEXT,
+    content_hash TEXT,
+    status TEXT NOT NULL DEFAULT 'published',
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_articles_filename ON articles(filename);
+CREATE INDEX IF NOT EXISTS idx_articles_publish_date ON articles(publish_date);
+"""
+
+# One published article per content file; workers reserve filenames against it
+UNIQUE_FILENAME_INDEX = """
+CREATE UNIQUE INDEX IF NOT EXISTS idx_articles_published_filename
+ON articles(filename) WHERE status = 'published'
+"""
+
+# Rows reserved by reserve_filename but not written yet have no content hash
+WRITTEN = "content_hash IS NOT NULL"
+
+
+def hash_content(content):
+    """
+    Hash rendered article content
+
+    Args:
+        content: Markdown string or bytes
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+
+def read_front_matter(filepath):
+    """
+    Read the YAML front matter of a markdown file
+
+    Args:
+        filepath: Path to the markdown file
+
+    Returns:
+        Tuple of (front matter dict or None, raw file bytes)
+    """
+    raw = filepath.read_bytes()
+    content = raw.decode('utf-8')
+
+    if content.startswith('---'):
+        parts = content.split('---', 2)
+        if len(parts) >= 2:
+            return yaml.safe_load(parts[1]) or {}, raw
+
+    return None, raw
+
+
+class ArticleIndex:
+    """
+    SQLite-backed index of published articles
+
+    Use as a context manager; changes are committed on exit. The database
+    runs in WAL mode, so several worker processes can keep it open at once.
+    """
+
+    def __init__(self, path=ARTICLE_INDEX_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(str(path), timeout=BUSY_TIMEOUT)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self._ensure_unique_filenames()
+
+    def _ensure_unique_filenames(self):
+        try:
+            self.conn.execute(UNIQUE_FILENAME_INDEX)
+        except sqlite3.IntegrityError:
+            # Indexes written before filenames were reserved may list a file
+            # twice; the most recently written row owns it
+            dropped = self.conn.execute(
+                "UPDATE articles SET status = ? WHERE status = ? AND rowid NOT IN "
+                "(SELECT MAX(rowid) FROM articles WHERE status = ? GROUP BY filename)",
+                (STATUS_REMOVED, STATUS_PUBLISHED, STATUS_PUBLISHED)
+            ).rowcount
+            logger.warning(f"Marked {dropped} index rows sharing a content file as removed")
+            self.conn.execute(UNIQUE_FILENAME_INDEX)
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.conn.commit()
+        self.conn.close()
+
+    def commit(self):
+        """
+        Commit pending changes (used to persist progress mid-run)
+        """
+        self.conn.commit()
+
+    def count(self, status=None):
+        """
+        Count indexed articles
+
+        Args:
+            status: Only count rows with this status (all rows if None)
+
+        Returns:
+            Number of rows
+        """
+        if status:
+            row = self.conn.execute("SELECT COUNT(*) FROM articles WHERE status = ?", (status,)).fetchone()
+        else:
+            row = self.conn.execute("SELECT COUNT(*) FROM articles").fetchone()
+        return row[0]
+
+    def contains(self, source_url):
+        """
+        Check whether a source URL was ever published
+
+        Args:
+            source_url: Original article URL
+
+        Returns:
+            True if the URL is indexed (published or since removed)
+        """
+        row = self.conn.execute(
+            f"SELECT 1 FROM articles WHERE source_url = ? AND {WRITTEN}", (source_url,)
+        ).fetchone()
+        return row is not None
+
+    def find_known_urls(self, source_urls):
+        """
+        Return the subset of URLs that are already indexed
+
+        Args:
+            source_urls: Iterable of source URLs
+
+        Returns:
+            Set of known source URLs
+        """
+        urls = [u for u in set(source_urls) if u]
+        known = set()
+
+        for i in range(0, len(urls), QUERY_CHUNK_SIZE):
+            chunk = urls[i:i + QUERY_CHUNK_SIZE]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT source_url FROM articles WHERE {WRITTEN} AND source_url IN ({placeholders})", chunk
+            )
+            known.update(row[0] for row in rows)
+
+        return known
+
+    def source_urls(self):
+        """
+        Return every indexed source URL
+
+        Returns:
+            Set of source URLs
+        """
+        return {row[0] for row in self.conn.execute(f"SELECT source_url FROM articles WHERE {WRITTEN}")}
+
+    def _get_row(self, column, value):
+        row = self.conn.execute(
+            "SELECT source_url, filename, publish_date, coins, content_hash, status "
+            f"FROM articles WHERE {column} = ? AND status = ?",
+            (value, STATUS_PUBLISHED)
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        keys = ('source_url', 'filename', 'publish_date', 'coins', 'content_hash', 'status')
+        return dict(zip(keys, row))
+
+    def get_by_filename(self, filename):
+        """
+        Look up the published article stored in a content file
+
+        Args:
+            filename: Markdown filename (not a path)
+
+        Returns:
+            Dict with the row's columns or None
+        """
+        return self._get_row('filename', filename)
+
+    def get_by_source_url(self, source_url):
+        """
+        Look up a published article by its source URL
+
+        Args:
+            source_url: Original article URL
+
+        Returns:
+            Dict with the row's columns or None
+        """
+        return self._get_row('source_url', source_url)
+
+    def upsert(self, source_url, filename, publish_date, coins, content_hash, status=STATUS_PUBLISHED):
+        """
+        Insert or update an article row
+
+        Args:
+            source_url: Original article URL
+            filename: Markdown filename in CONTENT_DIR
+            publish_date: ISO publish date
+            coins: List of coin symbols
+            content_hash: Hash of the rendered markdown
+            status: Row status
+        """
+        self.conn.execute(
+            "INSERT INTO articles (source_url, filename, publish_date, coins, content_hash, status, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(source_url) DO UPDATE SET filename = excluded.filename, "
+            "publish_date = excluded.publish_date, coins = excluded.coins, "
+            "content_hash = excluded.content_hash, status = excluded.status, "
+            "updated_at = excluded.updated_at",
+            (source_url, filename, publish_date, ','.join(coins or []), content_hash,
+             status, get_current_time_utc())
+        )
+
+    def reserve_filename(self, source_url, filename, publish_date):
+        """
+        Atomically claim a content file for an article that is about to be written
+
+        The claim is committed right away, so a concurrent worker picking
+        the same filename gets False and tries the next one. The row has no
+        content hash until upsert records the written file.
+
+        Args:
+            source_url: Original article URL
+            filename: Markdown filename in CONTENT_DIR
+            publish_date: ISO publish date
+
+        Returns:
+            True if the filename is now this article's, False if another
+            article owns it (or the article got a file in the meantime)
+        """
+        self.conn.commit()
+        try:
+            cursor = self.conn.execute(
+                "INSERT INTO articles (source_url, filename, publish_date, coins, content_hash, status, updated_at) "
+                "VALUES (?, ?, ?, '', NULL, ?, ?) "
+                "ON CONFLICT(source_url) DO UPDATE SET filename = excluded.filename, "
+                "publish_date = excluded.publish_date, content_hash = NULL, status = excluded.status, "
+                "updated_at = excluded.updated_at WHERE articles.status != ?",
+                (source_url, filename, publish_date, STATUS_PUBLISHED, get_current_time_utc(), STATUS_PUBLISHED)
+            )
+            self.conn.commit()
+        except sqlite3.IntegrityError:
+            self.conn.rollback()
+            return False
+
+        return cursor.rowcount > 0
+
+    def release_filename(self, source_url):
+        """
+        Drop a reservation whose file could not be written
+
+        Args:
+            source_url: Original article URL
+        """
+        self.conn.execute(
+            "DELETE FROM articles WHERE source_url = ? AND content_hash IS NULL", (source_url,)
+        )
+        self.conn.commit()
+
+    def mark_removed(self, filename):
+        """
+        Mark the article stored in a content file as removed
+
+        Removed rows still count as seen, so expired articles are not republished.
+
+        Args:
+            filename: Markdown filename that was deleted
+        """
+        self.conn.execute(
+            "UPDATE articles SET status = ?, updated_at = ? WHERE filename = ? AND status = ?",
+            (STATUS_REMOVED, get_current_time_utc(), filename, STATUS_PUBLISHED)
+        )
+
+    def rebuild_from_disk(self, content_dir=CONTENT_DIR):
+        """
+        Re-index every markdown file in the content directory
+
+        Files that vanished from disk are marked as removed.
+
+        Args:
+            content_dir: Directory with Hugo markdown files
+
+        Returns:
+            Number of files indexed
+        """
+        logger.info(f"Rebuilding article index from {content_dir}...")
+
+        indexed = 0
+        on_disk = set()
+
+        for filepath in sorted(content_dir.glob('*.md')):
+            try:
+                front_matter, raw = read_front_matter(filepath)
+            except Exception as e:
+                logger.warning(f"Error reading {filepath.name}: {e}")
+                continue
+
+            source_url = (front_matter or {}).get('sourceUrl', '')
+            if not source_url:
+                continue
+
+            self.upsert(
+                source_url=source_url,
+                filename=filepath.name,
+                publish_date=str(front_matter.get('date', '')),
+                coins=front_matter.get('coins') or [],
+                content_hash=hash_content(raw)
+            )
+            on_disk.add(filepath.name)
+            indexed += 1
+
+        for (filename,) in self.conn.execute(
+            "SELECT filename FROM articles WHERE status = ?", (STATUS_PUBLISHED,)
+        ).fetchall():
+            if filename not in on_disk:
+                self.mark_removed(filename)
+
+        self.conn.commit()
+        logger.info(f"Indexed {indexed} articles")
+
+        return indexed
+
+    def ensure_populated(self, content_dir=CONTENT_DIR):
+        """
+        Build the index from disk on first use
+
+        Args:
+            content_dir: Directory with Hugo markdown files
+        """
+        if self.count() == 0 and content_dir.exists() and any(content_dir.glob('*.md')):
+            self.rebuild_from_disk(content_dir)
+
+
+def main():
+    """
+    Command line entry point for index maintenance
+    """
+    parser = argparse.ArgumentParser(description="Maintain the published article index")
+    parser.add_argument('--rebuild', action='store_true', help="Re-index all markdown files in the content directory")
+    args = parser.parse_args()
+
+    try:
+        with ArticleIndex() as index:
+            if args.rebuild:
+                index.rebuild_from_disk()
+
+            logger.info(f"Index: {ARTICLE_INDEX_PATH}")
+            logger.info(f"Published: {index.count(STATUS_PUBLISHED)}, removed: {index.count(STATUS_REMOVED)}")
+
+    except Exception as e:
+        logger.error(f"Error maintaining article index: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
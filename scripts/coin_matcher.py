@@ -0,0 +1,250 @@
+"""
+Single-pass multi-pattern coin matcher
+Finds every coin name, symbol and ID in a text with one Aho-Corasick scan
+"""
+
+from collections import deque
+
+from config import RELEVANCE_WEIGHTS
+from utils import setup_logger
+from coin_registry import as_registry
+
+logger = setup_logger(__name__)
+
+FIELD_NAME = "name"
+FIELD_SYMBOL = "symbol"
+FIELD_ID = "id"
+
+# Relevance score columns (see RELEVANCE_WEIGHTS)
+SCORE_COLUMNS = (
+    "title_name", "title_symbol", "title_id",
+    "description_name", "description_symbol", "description_id",
+)
+
+
+def is_word_char(char):
+    """
+    Check whether a character counts as a word character for regex \\b
+
+    Args:
+        char: Single character
+
+    Returns:
+        True for letters, digits and underscore
+    """
+    return char.isalnum() or char == '_'
+
+
+def is_whole_word(text, start, end, length):
+    """
+    Emulate regex \b on both sides of text[start:end]
+
+    Args:
+        text: Text the match was found in
+        start: Match start
+        end: Match end
+        length: len(text)
+
+    Returns:
+        True if the match is delimited by word boundaries
+    """
+    before = is_word_char(text[start - 1]) if start > 0 else False
+    after = is_word_char(text[end]) if end < length else False
+    return before != is_word_char(text[start]) and after != is_word_char(text[end - 1])
+
+
+class CoinMatcher:
+    """
+    Aho-Corasick automaton over the lowercased name, symbol and ID of each coin
+
+    Names and IDs match anywhere in the text, symbols only as whole words,
+    which gives the same results as utils.match_coin_in_text. Coin indices
+    are the registry's (market cap order).
+    """
+
+    def __init__(self, coins):
+        self.registry = as_registry(coins)
+        self.coins = self.registry.coins
+        self.patterns = []
+        # Pattern index -> list of (coin index, field) that share that string
+        self.owners = []
+
+        pattern_ids = {}
+        normalized = self.registry.normalized
+        for coin_idx in range(len(self.coins)):
+            for field in (FIELD_NAME, FIELD_SYMBOL, FIELD_ID):
+                pattern = normalized[field][coin_idx]
+                if not pattern:
+                    continue
+                if pattern not in pattern_ids:
+                    pattern_ids[pattern] = len(self.patterns)
+                    self.patterns.append(pattern)
+                    self.owners.append([])
+                self.owners[pattern_ids[pattern]].append((coin_idx, field))
+
+        self._build()
+
+    def _build(self):
+        goto = [{}]
+        outputs = [[]]
+
+        for pattern_idx, pattern in enumerate(self.patterns):
+            node = 0
+            for char in pattern:
+                next_node = goto[node].get(char)
+                if next_node is None:
+                    next_node = len(goto)
+                    goto[node][char] = next_node
+                    goto.append({})
+                    outputs.append([])
+                node = next_node
+            outputs[node].append(pattern_idx)
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+
+        while queue:
+            node = queue.popleft()
+            for char, child in goto[node].items():
+                queue.append(child)
+                state = fail[node]
+                while state and char not in goto[state]:
+                    state = fail[state]
+                fail[child] = goto[state].get(char, 0)
+                outputs[child] = outputs[child] + outputs[fail[child]]
+
+        self._goto = goto
+        self._fail = fail
+        self._outputs = outputs
+
+    def iter_occurrences(self, text_lower):
+        """
+        Yield every raw pattern occurrence in a lowercased text
+
+        Args:
+            text_lower: Lowercased text
+
+        Yields:
+            Tuples of (pattern index, start, end)
+        """
+        goto = self._goto
+        fail = self._fail
+        outputs = self._outputs
+        patterns = self.patterns
+        node = 0
+
+        for pos, char in enumerate(text_lower):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+
+            if outputs[node]:
+                end = pos + 1
+                for pattern_idx in outputs[node]:
+                    yield pattern_idx, end - len(patterns[pattern_idx]), end
+
+    def match(self, text):
+        """
+        Find every coin mentioned in a text
+
+        Args:
+            text: Text to search in
+
+        Returns:
+            Dict of coin index -> list of (start, end, field) hits, keyed in
+            coin order. Positions refer to the lowercased text.
+        """
+        if not text:
+            return {}
+
+        text_lower = text.lower()
+        length = len(text_lower)
+        hits = {}
+
+        for pattern_idx, start, end in self.iter_occurrences(text_lower):
+            for coin_idx, field in self.owners[pattern_idx]:
+                if field == FIELD_SYMBOL and not is_whole_word(text_lower, start, end, length):
+                    continue
+                hits.setdefault(coin_idx, []).append((start, end, field))
+
+        return {coin_idx: hits[coin_idx] for coin_idx in sorted(hits)}
+
+    def matched_coins(self, text):
+        """
+        List the coins mentioned in a text
+
+        Args:
+            text: Text to search in
+
+        Returns:
+            List of coin dicts in coin order
+        """
+        return [self.coins[coin_idx] for coin_idx in self.match(text)]
+
+
+def match_articles(articles, matcher, weights=None):
+    """
+    Find and score the coins of a whole article batch with one scan per article
+
+    Title and description are scanned together, as "title description".
+    Hits (symbols only as whole words) decide which coins an article
+    mentions, like CoinMatcher.match on that text. Raw hits inside the
+    title or the description add the weight of their column once per
+    coin, like utils.calculate_relevance_score, where symbols count as
+    plain substrings. benchmarks/bench_coin_matcher.py checks both against
+    the utils functions.
+
+    Args:
+        articles: List of article dicts with 'title' and 'description'
+        matcher: CoinMatcher over the candidate coins
+        weights: Dict of SCORE_COLUMNS name -> weight (defaults to RELEVANCE_WEIGHTS)
+
+    Returns:
+        List (one entry per article) of (matched coin indices in coin
+        order, dict of coin index -> score) tuples
+    """
+    weights = weights or RELEVANCE_WEIGHTS
+    column_weights = {column: float(weights.get(column, 0.0)) for column in SCORE_COLUMNS}
+    owners = matcher.owners
+    results = []
+
+    for article in articles:
+        title = (article.get('title') or '').lower()
+        text = f"{title} {(article.get('description') or '').lower()}"
+        split = len(title)
+        length = len(text)
+        matched = set()
+        columns = {}  # coin index -> columns with at least one hit
+
+        for pattern_idx, start, end in matcher.iter_occurrences(text):
+            # Hits across the title/description seam count for matching only
+            section = "title" if end <= split else "description" if start > split else None
+            for coin_idx, field in owners[pattern_idx]:
+                if section:
+                    columns.setdefault(coin_idx, set()).add(f"{section}_{field}")
+                if coin_idx not in matched and (field != FIELD_SYMBOL or is_whole_word(text, start, end, length)):
+                    matched.add(coin_idx)
+
+        scores = {
+            coin_idx: sum(column_weights[column] for column in SCORE_COLUMNS if column in hit_columns)
+            for coin_idx, hit_columns in columns.items()
+        }
+        results.append((sorted(matched), scores))
+
+    return results
+
+
+def rank_coins(coin_indices, article_scores):
+    """
+    Order coins by relevance score, highest first
+
+    Ties keep their original (market cap) order.
+
+    Args:
+        coin_indices: Coin indices to rank, in coin order
+        article_scores: Dict of coin index -> score for one article
+
+    Returns:
+        List of coin indices sorted by score
+    """
+    return sorted(coin_indices, key=lambda idx: article_scores.get(idx, 0.0), reverse=True)
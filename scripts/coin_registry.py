@@ -0,0 +1,307 @@
+"""
+Precompiled registry of the tracked coins
+Holds the coin list in market cap order together with normalized lookup
+tables, and caches a compact serialized form next to coins.json so each
+coin list version is only compiled once
+"""
+
+import os
+import json
+import hashlib
+
+from config import COINS_JSON_PATH, COIN_REGISTRY_PATH
+from utils import setup_logger
+
+logger = setup_logger(__name__)
+
+REGISTRY_FORMAT = 1
+UNRANKED = 999  # sort position of coins without a market cap rank
+
+NORMALIZED_FIELDS = ("name", "symbol", "id")
+
+# Coin lists already loaded in this process: path -> (source stamp, registry)
+_loaded = {}
+
+
+def normalize(term):
+    """
+    Normalize a coin name, symbol, ID or alias for matching
+
+    Args:
+        term: Raw string (or None)
+
+    Returns:
+        Lowercased string ('' for None)
+    """
+    return (term or '').lower()
+
+
+def rank_key(coin):
+    """
+    Sort key putting coins in market cap order
+
+    Args:
+        coin: Coin dict
+
+    Returns:
+        Market cap rank (UNRANKED if missing)
+    """
+    rank = coin.get('market_cap_rank')
+    return UNRANKED if rank is None else rank
+
+
+class CoinRegistry:
+    """
+    Rank-ordered coin list with precomputed lookup tables
+
+    Iterating yields the coin dicts in market cap order, and indices into the
+    registry are stable, so the normalized tables can be used by index.
+    Coin dicts may carry an optional 'aliases' list of extra search terms.
+    """
+
+    def __init__(self, coins, version=None, _sorted=False):
+        self.coins = tuple(coins) if _sorted else tuple(sorted(coins, key=rank_key))
+        self.ids = tuple(coin.get('id') for coin in self.coins)
+        self.symbols = tuple(coin.get('symbol') for coin in self.coins)
+        self.names = tuple(coin.get('name') for coin in self.coins)
+        self.ranks = tuple(coin.get('market_cap_rank') for coin in self.coins)
+
+        # Field -> tuple of normalized values, one per coin
+        self.normalized = {
+            field: tuple(normalize(coin.get(field)) for coin in self.coins)
+            for field in NORMALIZED_FIELDS
+        }
+        self.aliases = tuple(
+            tuple(normalize(alias) for alias in coin.get('aliases') or () if alias)
+            for coin in self.coins
+        )
+
+        self._by_id = {}
+        self._by_symbol = {}
+        self._by_term = {}
+        for idx in range(len(self.coins)):
+            self._by_id.setdefault(self.ids[idx], idx)
+            self._by_symbol.setdefault(self.normalized['symbol'][idx], []).append(idx)
+            terms = [self.normalized[field][idx] for field in NORMALIZED_FIELDS] + list(self.aliases[idx])
+            for term in dict.fromkeys(terms):
+                if term:
+                    self._by_term.setdefault(term, []).append(idx)
+
+        self.version = version or self._content_version()
+        self._top = {}
+
+    def _content_version(self):
+        rows = [[self.ids[i], self.symbols[i], self.names[i], self.ranks[i], list(self.aliases[i])]
+                for i in range(len(self.coins))]
+        payload = json.dumps(rows, separators=(',', ':'), ensure_ascii=False)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+    def __len__(self):
+        return len(self.coins)
+
+    def __iter__(self):
+        return iter(self.coins)
+
+    def __getitem__(self, idx):
+        return self.coins[idx]
+
+    def ref(self, idx):
+        """
+        Build the compact coin reference stored with articles
+
+        Args:
+            idx: Coin index
+
+        Returns:
+            New dict with 'id', 'symbol' and 'name'
+        """
+        return {'id': self.ids[idx], 'symbol': self.symbols[idx], 'name': self.names[idx]}
+
+    def by_id(self, coin_id):
+        """
+        Look up a coin by its CoinGecko ID
+
+        Args:
+            coin_id: Coin ID
+
+        Returns:
+            Coin dict or None
+        """
+        idx = self._by_id.get(coin_id)
+        return None if idx is None else self.coins[idx]
+
+    def by_symbol(self, symbol):
+        """
+        Look up coins by ticker symbol (case-insensitive)
+
+        Args:
+            symbol: Ticker symbol
+
+        Returns:
+            List of coin dicts in market cap order (symbols are not unique)
+        """
+        return [self.coins[idx] for idx in self._by_symbol.get(normalize(symbol), ())]
+
+    def find(self, term):
+        """
+        Look up coins whose name, symbol, ID or alias equals a term
+
+        Args:
+            term: Search term (case-insensitive)
+
+        Returns:
+            List of coin dicts in market cap order
+        """
+        return [self.coins[idx] for idx in self._by_term.get(normalize(term), ())]
+
+    def top(self, n):
+        """
+        Registry of the n highest ranked coins
+
+        Args:
+            n: Number of coins
+
+        Returns:
+            CoinRegistry (cached, so repeated calls are free)
+        """
+        if n >= len(self.coins):
+            return self
+        registry = self._top.get(n)
+        if registry is None:
+            registry = self._top[n] = CoinRegistry(self.coins[:n], version=f"{self.version}:{n}", _sorted=True)
+        return registry
+
+    def to_compact(self):
+        """
+        Serialize to the compact cache form
+
+        Returns:
+            JSON-serializable dict
+        """
+        return {
+            'format': REGISTRY_FORMAT,
+            'version': self.version,
+            'rows': [[self.ids[i], self.symbols[i], self.names[i], self.ranks[i]] for i in range(len(self.coins))],
+            'aliases': {str(i): list(coin['aliases']) for i, coin in enumerate(self.coins) if coin.get('aliases')}
+        }
+
+    @classmethod
+    def from_compact(cls, data):
+        """
+        Rebuild a registry from its compact cache form
+
+        Args:
+            data: Dict produced by to_compact
+
+        Returns:
+            CoinRegistry
+        """
+        aliases = data.get('aliases') or {}
+        coins = []
+        for i, (coin_id, symbol, name, rank) in enumerate(data['rows']):
+            coin = {'id': coin_id, 'symbol': symbol, 'name': name, 'market_cap_rank': rank}
+            if str(i) in aliases:
+                coin['aliases'] = aliases[str(i)]
+            coins.append(coin)
+        return cls(coins, version=data['version'], _sorted=True)
+
+
+def as_registry(coins):
+    """
+    Wrap a plain coin list in a registry (registries are returned as they are)
+
+    Args:
+        coins: CoinRegistry or iterable of coin dicts
+
+    Returns:
+        CoinRegistry
+    """
+    return coins if isinstance(coins, CoinRegistry) else CoinRegistry(coins)
+
+
+def _source_stamp(path):
+    stat = path.stat()
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def save_registry(registry, path=COINS_JSON_PATH, cache_path=COIN_REGISTRY_PATH):
+    """
+    Write the compact cache for the coin list currently in `path`
+
+    Args:
+        registry: CoinRegistry built from the contents of `path`
+        path: Path of coins.json
+        cache_path: Path of the compact cache
+
+    Returns:
+        The registry
+    """
+    stamp = _source_stamp(path)
+    data = registry.to_compact()
+    data['source'] = stamp
+
+    # Workers may rebuild the cache at the same time; each writes its own temp file
+    tmp_path = cache_path.with_name(f".{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'), ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.warning(f"Could not write coin registry cache {cache_path}: {e}")
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+    _loaded[str(path)] = (stamp, registry)
+    return registry
+
+
+def _read_cache(cache_path, stamp):
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if data.get('format') != REGISTRY_FORMAT or data.get('source') != stamp:
+        return None
+
+    try:
+        return CoinRegistry.from_compact(data)
+    except (KeyError, TypeError, ValueError) as e:
+        logger.warning(f"Ignoring broken coin registry cache {cache_path}: {e}")
+        return None
+
+
+def load_registry(path=COINS_JSON_PATH, cache_path=COIN_REGISTRY_PATH):
+    """
+    Load the coin registry for the current coins.json
+
+    Reuses the registry already loaded in this process, then the compact
+    cache, and only compiles coins.json (and rewrites the cache) when the
+    file changed since the cache was written.
+
+    Args:
+        path: Path of coins.json
+        cache_path: Path of the compact cache
+
+    Returns:
+        CoinRegistry, or None if coins.json doesn't exist
+    """
+    if not path.exists():
+        return None
+
+    stamp = _source_stamp(path)
+    loaded = _loaded.get(str(path))
+    if loaded and loaded[0] == stamp:
+        return loaded[1]
+
+    registry = _read_cache(cache_path, stamp)
+    if registry is not None:
+        _loaded[str(path)] = (stamp, registry)
+        return registry
+
+    with open(path, 'r', encoding='utf-8') as f:
+        registry = CoinRegistry(json.load(f))
+
+    logger.info(f"Compiled coin registry {registry.version} ({len(registry)} coins)")
+    return save_registry(registry, path, cache_path)
@@ -13,19 +13,19 @@ load_dotenv()
 # Base paths
 BASE_DIR = Path(__file__).resolve().parent.parent
 SCRIPTS_DIR = BASE_DIR / "scripts"
-DATA_DIR = BASE_DIR / "data"
+DATA_DIR = Path(os.getenv("DATA_DIR", BASE_DIR / "data"))
 SITE_DIR = BASE_DIR / "site"
-CONTENT_DIR = SITE_DIR / "content" / "news"
+CONTENT_DIR = Path(os.getenv("CONTENT_DIR", SITE_DIR / "content" / "news"))
 
 # Ensure directories exist
-DATA_DIR.mkdir(exist_ok=True)
+DATA_DIR.mkdir(parents=True, exist_ok=True)
 CONTENT_DIR.mkdir(parents=True, exist_ok=True)
 
 # API Configuration
-COINGECKO_API_BASE = "https://api.coingecko.com/api/v3"
+COINGECKO_API_BASE = os.getenv("COINGECKO_API_BASE", "https://api.coingecko.com/api/v3")
 COINGECKO_API_KEY = os.getenv("COINGECKO_API_KEY", "")  # Optional
 
-GNEWS_API_BASE = "https://gnews.io/api/v4"
+GNEWS_API_BASE = os.getenv("GNEWS_API_BASE", "https://gnews.io/api/v4")
 GNEWS_API_KEY = os.getenv("GNEWS_API_KEY", "")
 
 # Cryptocurrency settings
@@ -41,7 +41,18 @@ HUGO_ENV = os.getenv("HUGO_ENV", "production")
 
 # File paths
 COINS_JSON_PATH = DATA_DIR / "coins.json"
+COIN_REGISTRY_PATH = DATA_DIR / "coins.registry.json"  # compiled form of coins.json
 NEWS_CACHE_PATH = DATA_DIR / "news_cache.json"
+ARTICLE_INDEX_PATH = DATA_DIR / "article_index.sqlite"
+CONTENT_MANIFEST_PATH = DATA_DIR / "content_manifest.json"
+METRICS_PATH = DATA_DIR / "metrics.json"
+NEAR_DUPLICATES_PATH = DATA_DIR / "near_duplicates.sqlite"  # MinHash signatures of recent stories
+GNEWS_USAGE_PATH = DATA_DIR / "gnews_usage.json"  # requests spent today, for the daily quota
+JOURNAL_DIR = DATA_DIR / "runs"  # per-run checkpoint journals
+OPENAI_BATCH_DIR = DATA_DIR / "batches"  # Batch API input files
+# Shared API rate limit buckets; point every worker on a host at the same file
+RATE_LIMIT_DB_PATH = Path(os.getenv("RATE_LIMIT_DB_PATH") or DATA_DIR / "rate_limits.sqlite")
+PROMETHEUS_METRICS_PATH = os.getenv("PROMETHEUS_METRICS_PATH", "")  # optional Prometheus text export
 
 # Logging configuration
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
@@ -49,22 +60,136 @@ LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 
 # API rate limiting
 COINGECKO_RATE_LIMIT = 10  # calls per minute (free tier: 10-30)
-GNEWS_DAILY_LIMIT = 100  # requests per day
+GNEWS_RATE_LIMIT = int(os.getenv("GNEWS_RATE_LIMIT", "60"))  # calls per minute
+GNEWS_DAILY_LIMIT = int(os.getenv("GNEWS_DAILY_LIMIT", "100"))  # requests per day (free plan)
 
 # News fetching settings
 NEWS_LANGUAGE = "en"
 NEWS_COUNTRY = "us"
 NEWS_MAX_PER_QUERY = 100  # Max articles per GNews request
 
-# Top coins to prioritize in search query (use top 20 for aggregated search)
-TOP_PRIORITY_COINS = 20
+# Articles are only kept if they mention one of the top N coins
+RELEVANT_COINS = 50
+
+# GNews query planner: coins are sharded across OR queries of at most
+# GNEWS_MAX_QUERY_LENGTH characters; each run spends at most
+# GNEWS_MAX_REQUESTS_PER_RUN requests (and never more than today's quota left)
+GNEWS_GENERIC_TERMS = ["cryptocurrency", "crypto", "bitcoin"]
+GNEWS_MAX_QUERY_LENGTH = int(os.getenv("GNEWS_MAX_QUERY_LENGTH", "200"))
+GNEWS_MAX_REQUESTS_PER_RUN = int(os.getenv("GNEWS_MAX_REQUESTS_PER_RUN", "12"))
+GNEWS_MAX_PAGES = int(os.getenv("GNEWS_MAX_PAGES", "3"))  # pagination needs a paid GNews plan
+GNEWS_MAX_CONCURRENCY = int(os.getenv("GNEWS_MAX_CONCURRENCY", "4"))
+# Stop paginating once this many distinct candidates are found (many are
+# dropped later as irrelevant, duplicate or already published)
+GNEWS_TARGET_ARTICLES = int(os.getenv("GNEWS_TARGET_ARTICLES", str(3 * MAX_ARTICLES_PER_RUN)))
+
+# Relevance score added when a coin's name/symbol/id appears in the title or description
+RELEVANCE_WEIGHTS = {
+    "title_name": 10.0,
+    "title_symbol": 8.0,
+    "title_id": 6.0,
+    "description_name": 5.0,
+    "description_symbol": 4.0,
+    "description_id": 3.0,
+}
 
 # OpenAI Configuration
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "") or None  # None uses the official endpoint
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
 OPENAI_MAX_TOKENS = int(os.getenv("OPENAI_MAX_TOKENS", "2000"))
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "4"))  # rewrites in flight
+OPENAI_RPM_LIMIT = int(os.getenv("OPENAI_RPM_LIMIT", "500"))  # requests per minute
+OPENAI_TPM_LIMIT = int(os.getenv("OPENAI_TPM_LIMIT", "200000"))  # tokens per minute
+
+# Streaming rewrites: parse the JSON as it arrives and abort clearly broken
+# generations early (a generation of 500-800 German words is ~6000 characters)
+OPENAI_STREAM = os.getenv("OPENAI_STREAM", "").lower() in ("1", "true", "yes")
+STREAM_MAX_CHARS = int(os.getenv("STREAM_MAX_CHARS", "12000"))
+STREAM_MAX_TITLE_CHARS = 300
+STREAM_TITLE_DEADLINE_CHARS = 200  # "title" must be among the first keys
+STREAM_INVALID_RETRIES = int(os.getenv("STREAM_INVALID_RETRIES", "1"))  # immediate retries after an abort
+
+# Rewrite prompt content budget in tokens, per model (PROMPT_CONTENT_TOKENS overrides)
+PROMPT_CONTENT_TOKENS = int(os.getenv("PROMPT_CONTENT_TOKENS", "0"))
+MODEL_CONTENT_TOKEN_BUDGETS = {
+    "gpt-3.5-turbo": 1000,
+    "gpt-4o-mini": 1500,
+    "gpt-4o": 1500,
+}
+
+# OpenAI Batch API: rewrites go out as one batch job (half price, results
+# within the completion window); small runs and stragglers use direct calls
+OPENAI_BATCH_MODE = os.getenv("OPENAI_BATCH_MODE", "").lower() in ("1", "true", "yes")
+OPENAI_BATCH_MIN_ARTICLES = int(os.getenv("OPENAI_BATCH_MIN_ARTICLES", "10"))
+OPENAI_BATCH_POLL_INTERVAL = float(os.getenv("OPENAI_BATCH_POLL_INTERVAL", "30"))  # seconds
+OPENAI_BATCH_TIMEOUT = float(os.getenv("OPENAI_BATCH_TIMEOUT", "3600"))  # seconds before giving up on a batch
+OPENAI_BATCH_COMPLETION_WINDOW = "24h"
 
 # Scraping Configuration
 SCRAPE_TIMEOUT = 15  # seconds
-SCRAPE_DELAY = 2  # seconds between requests
+SCRAPE_DELAY = 2  # seconds between requests to the same host
+SCRAPE_MAX_WORKERS = int(os.getenv("SCRAPE_MAX_WORKERS", "8"))  # global concurrency cap
+SCRAPE_PER_HOST_CONCURRENCY = int(os.getenv("SCRAPE_PER_HOST_CONCURRENCY", "2"))  # parallel requests per host
 USER_AGENT = "Mozilla/5.0 (compatible; CryptoNewsBot/1.0)"
+
+# HTML extraction process pool (0 workers parses in the scraping threads instead)
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", str(os.cpu_count() or 1)))
+EXTRACT_CPU_LIMIT = int(os.getenv("EXTRACT_CPU_LIMIT", "10"))  # CPU seconds per page
+EXTRACT_TIMEOUT = float(os.getenv("EXTRACT_TIMEOUT", "30"))  # wall-clock seconds before a worker is killed
+
+# Streaming pipeline: articles between fetch and write at any time (bounds memory)
+PIPELINE_MAX_IN_FLIGHT = int(os.getenv("PIPELINE_MAX_IN_FLIGHT", "16"))
+
+# Near-duplicate detection: MinHash signatures split into LSH bands; a story
+# is skipped when its headline or body similarity to a story rewritten in the
+# last NEAR_DUP_WINDOW_DAYS days reaches the view's threshold. The headline
+# check runs before scraping, so it only skips near-identical headlines
+# (distinct stories about the same coin often share a third of their words);
+# retitled copies are left to the body check.
+NEAR_DUP_NUM_PERM = 128
+NEAR_DUP_BANDS = 64
+NEAR_DUP_THRESHOLDS = {
+    "headline": float(os.getenv("NEAR_DUP_HEADLINE_THRESHOLD", "0.7")),
+    "body": float(os.getenv("NEAR_DUP_BODY_THRESHOLD", "0.5")),
+}
+NEAR_DUP_WINDOW_DAYS = int(os.getenv("NEAR_DUP_WINDOW_DAYS", "3"))
+
+# Distributed worker mode: leased article queue shared by the coordinator and
+# workers (put it on a directory all workers can reach, with working file locks)
+WORK_QUEUE_PATH = Path(os.getenv("WORK_QUEUE_PATH") or DATA_DIR / "work_queue.sqlite")
+WORK_LEASE_SECONDS = float(os.getenv("WORK_LEASE_SECONDS", "600"))  # renewed while a worker is alive
+WORK_MAX_ATTEMPTS = int(os.getenv("WORK_MAX_ATTEMPTS", "3"))
+WORK_BATCH_SIZE = int(os.getenv("WORK_BATCH_SIZE", "8"))  # articles leased at a time per worker
+WORK_POLL_INTERVAL = float(os.getenv("WORK_POLL_INTERVAL", "5"))  # seconds between queue checks when idle
+
+# Run journal: fsync every N records or T seconds, keep the last K journals
+JOURNAL_FSYNC_BATCH = int(os.getenv("JOURNAL_FSYNC_BATCH", "20"))
+JOURNAL_FSYNC_INTERVAL = float(os.getenv("JOURNAL_FSYNC_INTERVAL", "2"))
+JOURNAL_KEEP_RUNS = int(os.getenv("JOURNAL_KEEP_RUNS", "7"))
+
+# Shared HTTP transport: (connect, read) timeouts per service, keep-alive pool sizes
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUTS = {
+    "coingecko": 30,
+    "gnews": 30,
+    "publisher": SCRAPE_TIMEOUT,
+    "publisher_probe": 5,
+}
+HTTP_POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "64"))  # hosts with a kept-alive pool
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "8"))  # idle connections kept per host
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "").lower() in ("1", "true", "yes")  # needs urllib3>=2.3 and h2
+
+# Resilience: retries honor Retry-After (capped), concurrency per upstream
+# adapts with AIMD (halved on 429/overload or slow calls, +1 after a window
+# of successes) and a circuit opens after N consecutive failures
+RETRY_AFTER_MAX = float(os.getenv("RETRY_AFTER_MAX", "120"))  # seconds
+AIMD_DECREASE_FACTOR = 0.5
+AIMD_LATENCY_TARGETS = {  # seconds; slower calls count as an overload signal
+    "coingecko": 10,
+    "gnews": 10,
+    "publisher": 8,
+    "openai": 60,
+}
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_COOLDOWN = float(os.getenv("CIRCUIT_COOLDOWN", "60"))  # seconds before a trial request
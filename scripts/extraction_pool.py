@@ -0,0 +1,192 @@
+"""
+Process pool for CPU-bound HTML extraction
+Runs parsers outside the I/O threads with a per-task CPU-time limit and a
+wall-clock watchdog that kills and replaces stuck workers
+"""
+
+import signal
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+from config import EXTRACT_WORKERS, EXTRACT_CPU_LIMIT, EXTRACT_TIMEOUT
+from utils import setup_logger
+import metrics
+
+logger = setup_logger(__name__)
+
+
+class ExtractionTimeout(Exception):
+    """
+    Raised in a worker when a task exceeds its CPU-time limit
+    """
+
+
+def _on_cpu_limit(signum, frame):
+    raise ExtractionTimeout("CPU time limit exceeded")
+
+
+def _init_worker():
+    if resource is not None:
+        signal.signal(signal.SIGXCPU, _on_cpu_limit)
+
+
+def _run_limited(cpu_limit, func, args):
+    """
+    Run func(*args) in a worker, raising ExtractionTimeout after `cpu_limit` CPU seconds
+
+    RLIMIT_CPU counts the whole process, so the soft limit is moved to
+    "CPU used so far + cpu_limit" for each task and restored afterwards.
+    """
+    if resource is None or not cpu_limit:
+        return func(*args)
+
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = int(usage.ru_utime + usage.ru_stime)
+    previous, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = used + max(1, int(cpu_limit))
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+    try:
+        return func(*args)
+    finally:
+        resource.setrlimit(resource.RLIMIT_CPU, (previous, hard))
+
+
+class ExtractionPool:
+    """
+    Process pool with per-task CPU limits and a wall-clock watchdog
+
+    At most `workers` tasks are submitted at once, so a task starts as soon
+    as it is submitted and the wall-clock timeout measures its run time, not
+    time spent queued. A task that overruns the timeout (e.g. stuck in C code
+    where SIGXCPU cannot interrupt it) gets its pool killed and replaced;
+    tasks that were running next to it are retried once on the new pool.
+    """
+
+    def __init__(self, workers=EXTRACT_WORKERS, cpu_limit=EXTRACT_CPU_LIMIT, timeout=EXTRACT_TIMEOUT):
+        self.workers = max(1, workers)
+        self.cpu_limit = cpu_limit
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.workers)
+        self._executor = None
+        self._generation = 0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # forkserver/spawn: forking a process that runs I/O threads can deadlock
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=context, initializer=_init_worker
+                )
+            return self._executor, self._generation
+
+    def _recycle(self, generation):
+        with self._lock:
+            # Another thread may already have replaced this pool
+            if generation != self._generation or self._executor is None:
+                return
+
+            executor = self._executor
+            self._executor = None
+            self._generation += 1
+
+        for process in list(getattr(executor, '_processes', {}).values()):
+            process.kill()
+        executor.shutdown(wait=False, cancel_futures=True)
+        metrics.incr('extraction_pool_recycles_total')
+        logger.warning("Killed and replaced the extraction pool after a stuck task")
+
+    def run(self, func, *args):
+        """
+        Run func(*args) in a worker process
+
+        Args:
+            func: Picklable top-level function
+            *args: Picklable arguments
+
+        Returns:
+            func's return value
+
+        Raises:
+            ExtractionTimeout: The task exceeded its CPU or wall-clock limit
+        """
+        for attempt in range(2):
+            with self._slots:
+                executor, generation = self._get_executor()
+                future = None
+                try:
+                    future = executor.submit(_run_limited, self.cpu_limit, func, args)
+                    return future.result(timeout=self.timeout)
+                except FutureTimeout:
+                    metrics.incr('extraction_timeouts_total', {'limit': 'wall'})
+                    self._recycle(generation)
+                    raise ExtractionTimeout(f"no result after {self.timeout}s")
+                except ExtractionTimeout:
+                    metrics.incr('extraction_timeouts_total', {'limit': 'cpu'})
+                    raise
+                except BrokenProcessPool:
+                    # Killed alongside a stuck task (or a worker crashed): retry once
+                    self._recycle(generation)
+                    if attempt:
+                        raise
+                except RuntimeError:
+                    # Another thread's _recycle shut this pool down before the
+                    # submit: retry once on the current pool (func's own errors re-raise)
+                    if future is not None or attempt:
+                        raise
+
+    def shutdown(self):
+        """
+        Stop the worker processes
+        """
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Return the process-wide extraction pool (created on first use)
+
+    Returns:
+        ExtractionPool instance
+    """
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = ExtractionPool()
+        return _pool
+
+
+def shutdown_pool():
+    """
+    Stop the process-wide pool's workers, if it was ever started
+
+    The pool starts new workers if it is used again afterwards.
+    """
+    with _pool_lock:
+        pool = _pool
+
+    if pool is not None:
+        pool.shutdown()
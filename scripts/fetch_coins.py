@@ -3,7 +3,6 @@ Fetch top 100 cryptocurrencies from CoinGecko API
 """
 
 import json
-import requests
 
 from config import (
     COINGECKO_API_BASE,
@@ -12,13 +11,18 @@ from config import (
     COINS_JSON_PATH,
     COINGECKO_RATE_LIMIT
 )
-from utils import setup_logger, retry_with_backoff, rate_limit
+from utils import setup_logger
+from coin_registry import CoinRegistry, load_registry, save_registry
+from resilience import retrying
+from shared_rate_limit import rate_limited
+import http_client
+import metrics
 
 logger = setup_logger(__name__)
 
 
-@retry_with_backoff(max_retries=3, base_delay=2)
-@rate_limit(calls_per_minute=COINGECKO_RATE_LIMIT)
+@retrying('coingecko', max_retries=3, base_delay=2)
+@rate_limited('coingecko', calls_per_minute=COINGECKO_RATE_LIMIT)
 def fetch_top_coins():
     """
     Fetch top N cryptocurrencies by market cap from CoinGecko
@@ -43,8 +47,9 @@ def fetch_top_coins():
     if COINGECKO_API_KEY:
         headers["x-cg-pro-api-key"] = COINGECKO_API_KEY
 
-    response = requests.get(url, params=params, headers=headers, timeout=30)
-    response.raise_for_status()
+    with metrics.external_call('coingecko'):
+        response = http_client.get(url, 'coingecko', params=params, headers=headers)
+        response.raise_for_status()
 
     coins_data = response.json()
 
@@ -65,10 +70,13 @@ def fetch_top_coins():
 
 def save_coins(coins):
     """
-    Save coins data to JSON file
+    Save coins data to JSON file and compile its registry
 
     Args:
         coins: List of coin dicts
+
+    Returns:
+        CoinRegistry for the saved coins
     """
     logger.info(f"Saving coins to {COINS_JSON_PATH}")
 
@@ -77,24 +85,22 @@ def save_coins(coins):
 
     logger.info("Coins saved successfully")
 
+    return save_registry(CoinRegistry(coins))
+
 
 def load_coins():
     """
-    Load coins data from JSON file
+    Load the coin registry for the saved coins
 
     Returns:
-        List of coin dicts, or None if file doesn't exist
+        CoinRegistry, or None if file doesn't exist
     """
-    if not COINS_JSON_PATH.exists():
+    coins = load_registry()
+    if coins is None:
         logger.warning(f"Coins file not found: {COINS_JSON_PATH}")
         return None
 
-    logger.info(f"Loading coins from {COINS_JSON_PATH}")
-
-    with open(COINS_JSON_PATH, 'r', encoding='utf-8') as f:
-        coins = json.load(f)
-
-    logger.info(f"Loaded {len(coins)} coins")
+    logger.info(f"Loaded {len(coins)} coins (registry {coins.version})")
 
     return coins
 
@@ -1,41 +1,71 @@
 """
 Fetch cryptocurrency news from GNews API
-Uses aggregated search strategy to stay within API limits
+Shards coin searches across OR queries within the daily GNews quota
 """
 
 import json
-import requests
+import contextlib
+import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import pytz
 
 from config import (
     GNEWS_API_BASE,
     GNEWS_API_KEY,
+    GNEWS_RATE_LIMIT,
     NEWS_LANGUAGE,
     NEWS_COUNTRY,
     NEWS_MAX_PER_QUERY,
-    TOP_PRIORITY_COINS,
-    MAX_ARTICLES_PER_RUN
+    MAX_ARTICLES_PER_RUN,
+    RELEVANT_COINS,
+    GNEWS_MAX_REQUESTS_PER_RUN,
+    GNEWS_MAX_PAGES,
+    GNEWS_MAX_CONCURRENCY,
+    GNEWS_TARGET_ARTICLES,
+    OPENAI_MAX_TOKENS,
+    OPENAI_MAX_CONCURRENCY,
+    OPENAI_BATCH_MODE,
+    SCRAPE_MAX_WORKERS,
+    PIPELINE_MAX_IN_FLIGHT
 )
-from utils import setup_logger, retry_with_backoff, match_coin_in_text, calculate_relevance_score
+from utils import setup_logger
+from resilience import retrying
+from shared_rate_limit import rate_limited
 from fetch_coins import load_coins
+from coin_registry import as_registry
+from coin_matcher import CoinMatcher, match_articles, rank_coins
+from gnews_planner import GNewsUsage, plan_queries
+from near_duplicates import NearDuplicateIndex, VIEW_HEADLINE
+from extraction_pool import shutdown_pool
+from prompt_prep import prepare_article_content
+import http_client
+import metrics
 
 logger = setup_logger(__name__)
 
 
-@retry_with_backoff(max_retries=3, base_delay=2)
-def fetch_news_from_gnews(query, max_articles=100):
+@retrying('gnews', max_retries=3, base_delay=2)
+@rate_limited('gnews', calls_per_minute=GNEWS_RATE_LIMIT)
+def fetch_news_from_gnews(query, max_articles=100, page=1, usage=None):
     """
     Fetch news from GNews API
 
     Args:
         query: Search query string
         max_articles: Maximum number of articles to fetch
+        page: Result page (pages after the first need a paid GNews plan)
+        usage: Optional GNewsUsage counter charged for every request sent
 
     Returns:
         List of article dicts
+
+    Raises:
+        GNewsQuotaExceeded: The shared daily quota is used up (nothing is sent)
     """
-    logger.info(f"Fetching news from GNews with query: {query[:100]}...")
+    logger.info(f"Fetching news from GNews (page {page}) with query: {query[:100]}...")
 
     if not GNEWS_API_KEY:
         raise ValueError("GNEWS_API_KEY is not set in environment variables")
@@ -50,9 +80,15 @@ def fetch_news_from_gnews(query, max_articles=100):
         "max": min(max_articles, NEWS_MAX_PER_QUERY),
         "apikey": GNEWS_API_KEY,
     }
+    if page > 1:
+        params["page"] = page
+
+    if usage is not None:
+        usage.record()
 
-    response = requests.get(url, params=params, timeout=30)
-    response.raise_for_status()
+    with metrics.external_call('gnews'):
+        response = http_client.get(url, 'gnews', params=params)
+        response.raise_for_status()
 
     # Debug: print the full URL
     logger.info(f"Full URL: {response.url}")
@@ -75,101 +111,124 @@ def fetch_news_from_gnews(query, max_articles=100):
     return articles
 
 
-def build_aggregated_query(coins, top_n=TOP_PRIORITY_COINS):
+def fetch_planned_news(coins, usage=None, max_requests=GNEWS_MAX_REQUESTS_PER_RUN,
+                       max_pages=GNEWS_MAX_PAGES, target_articles=GNEWS_TARGET_ARTICLES):
     """
-    Build an aggregated search query with OR logic for top coins
+    Fetch news for every tracked coin within the GNews request budget
+
+    The coins are sharded across OR queries (see plan_queries). The first
+    page of every query is fetched concurrently, so all coins get coverage
+    before any quota goes to pagination. Further pages are then requested
+    for the queries whose last page was full and still turned up new URLs,
+    best yield first, until the budget or `target_articles` is reached.
 
     Args:
         coins: List of coin dicts
-        top_n: Number of top coins to include in query
+        usage: GNewsUsage counter (loaded from disk if None)
+        max_requests: Most requests to spend in this run
+        max_pages: Most pages per query
+        target_articles: Stop paginating once this many distinct articles are found
 
     Returns:
-        Search query string
+        List of distinct article dicts, in query priority order
     """
-    # Get top N coins by market cap rank
-    top_coins = sorted(coins, key=lambda c: c.get('market_cap_rank', 999))[:top_n]
+    usage = usage or GNewsUsage()
+    budget = min(max_requests, usage.remaining())
+    queries = plan_queries(coins)
 
-    # Build OR query with coin names
-    terms = []
+    if budget <= 0:
+        logger.warning(f"GNews daily quota exhausted ({usage.requests}/{usage.daily_limit} requests used today)")
+        return []
 
-    # Add general crypto terms
-    terms.extend(["cryptocurrency", "crypto", "bitcoin"])
+    if budget < len(queries):
+        logger.warning(f"GNews budget of {budget} requests covers only {budget}/{len(queries)} queries")
+        queries = queries[:budget]
 
-    # Add top coin names (avoid duplicates and clean names)
-    # IMPORTANT: Only use single-word names or simple symbols to avoid breaking the OR query
-    seen = set(["bitcoin"])  # Bitcoin already added above
-    for coin in top_coins:
-        name = coin['name']
-        symbol = coin['symbol'].upper()
+    per_page = min(MAX_ARTICLES_PER_RUN, NEWS_MAX_PER_QUERY)
+    pages = {i: [] for i in range(len(queries))}
+    seen_urls = set()
+    yields = {}
+    spent = 0
 
-        # Skip names with parentheses, spaces, or special characters
-        if '(' in name or ')' in name or ' ' in name or not name.replace('-', '').isalnum():
-            # Try to use symbol instead if it's simple and short
-            if len(symbol) <= 5 and symbol.isalnum() and symbol.lower() not in seen:
-                terms.append(symbol)
-                seen.add(symbol.lower())
-        elif name.lower() not in seen and name.isalnum():
-            # Only use alphanumeric single-word names
-            terms.append(name)
-            seen.add(name.lower())
+    def fetch(query_idx, page):
+        try:
+            return fetch_news_from_gnews(queries[query_idx], max_articles=per_page, page=page, usage=usage)
+        except Exception as e:
+            logger.error(f"GNews query {query_idx + 1} page {page} failed: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, GNEWS_MAX_CONCURRENCY)) as pool:
+        # Round 1 covers every query; later rounds paginate the most productive ones
+        batch = [(i, 1) for i in range(len(queries))]
+
+        while batch:
+            spent += len(batch)
+            results = list(pool.map(lambda job: fetch(*job), batch))
 
-    # Limit to 12 terms to keep query manageable
-    terms = terms[:12]
+            for (query_idx, page), articles in zip(batch, results):
+                if articles is None:
+                    continue
 
-    # Join with OR (GNews supports OR operator)
-    query = " OR ".join(terms)
+                new = [a for a in articles if a.get('url') and a['url'] not in seen_urls]
+                seen_urls.update(a['url'] for a in new)
+                pages[query_idx].extend(new)
+
+                # Only worth another page if this one was full and not all repeats
+                if len(articles) >= per_page and new and page < max_pages:
+                    yields[query_idx] = (len(new), page + 1)
+                else:
+                    yields.pop(query_idx, None)
 
-    logger.info(f"Built query with {len(terms)} terms for top {top_n} coins")
+            remaining = min(budget - spent, usage.remaining())
+            if remaining <= 0 or len(seen_urls) >= target_articles:
+                break
 
-    return query
+            ranked = sorted(yields.items(), key=lambda item: item[1][0], reverse=True)
+            batch = [(query_idx, next_page) for query_idx, (_, next_page) in ranked[:remaining]]
+
+    articles = [a for i in range(len(queries)) for a in pages[i]]
+
+    logger.info(
+        f"Fetched {len(articles)} distinct articles with {spent} GNews requests "
+        f"({len(articles) / spent if spent else 0:.1f} per request, "
+        f"{usage.requests}/{usage.daily_limit} used today)"
+    )
+    metrics.incr('gnews_requests_total', value=spent)
+    metrics.incr('gnews_articles_total', value=len(articles))
+
+    return articles
 
 
 def match_articles_to_coins(articles, coins):
     """
     Match articles to specific coins based on content
-    Only accepts articles about top 50 cryptocurrencies
+    Only accepts articles about the top RELEVANT_COINS cryptocurrencies
 
     Args:
         articles: List of article dicts from GNews
-        coins: List of coin dicts
+        coins: CoinRegistry or list of coin dicts
 
     Returns:
         List of enriched article dicts with 'coins' field
     """
+    coins = as_registry(coins)
     logger.info(f"Matching {len(articles)} articles to {len(coins)} coins...")
 
     enriched_articles = []
 
-    # Only consider top 50 coins
-    top_50_coins = sorted(coins, key=lambda c: c.get('market_cap_rank', 999))[:50]
-    logger.info(f"Filtering for top 50 coins only")
+    # Only consider the top RELEVANT_COINS coins
+    relevant_coins = coins.top(RELEVANT_COINS)
+    logger.info(f"Filtering for top {len(relevant_coins)} coins only")
 
-    for article in articles:
-        # Combine title and description for matching
-        text = f"{article.get('title', '')} {article.get('description', '')}"
-
-        # Find matching coins (only from top 50)
-        matched_coins = []
-        coin_scores = []
-
-        for coin in top_50_coins:
-            if match_coin_in_text(text, coin):
-                score = calculate_relevance_score(article, coin)
-                matched_coins.append({
-                    'id': coin['id'],
-                    'symbol': coin['symbol'],
-                    'name': coin['name']
-                })
-                coin_scores.append(score)
-
-        # Only include articles that match at least one top 50 coin
-        if matched_coins:
+    # Build the multi-pattern automaton once for the whole batch
+    matcher = CoinMatcher(relevant_coins)
+
+    # Find and score the coins of every article in a single scan each
+    for article, (matched, article_scores) in zip(articles, match_articles(articles, matcher)):
+        # Only include articles that match at least one relevant coin
+        if matched:
             # Sort matched coins by relevance score
-            sorted_coins = [coin for _, coin in sorted(
-                zip(coin_scores, matched_coins),
-                key=lambda x: x[0],
-                reverse=True
-            )]
+            sorted_coins = [relevant_coins.ref(coin_idx) for coin_idx in rank_coins(matched, article_scores)]
 
             enriched_articles.append({
                 'title': article.get('title'),
@@ -185,7 +244,7 @@ def match_articles_to_coins(articles, coins):
                 'content': article.get('content', '')
             })
 
-    logger.info(f"Matched {len(enriched_articles)} articles to top 50 coins")
+    logger.info(f"Matched {len(enriched_articles)} articles to top {len(relevant_coins)} coins")
 
     return enriched_articles
 
@@ -215,100 +274,416 @@ def deduplicate_articles(articles):
     return unique_articles
 
 
-def enhance_articles_with_full_content(articles):
+def filter_published_articles(articles):
     """
-    Scrape full content and rewrite in German for each article
+    Drop articles whose source URL has already been published
+
+    Runs before scraping and rewriting so known articles cost nothing.
 
     Args:
-        articles: List of article dicts from GNews
+        articles: List of article dicts
 
     Returns:
-        List of enhanced articles with German content
+        List of articles not yet published
     """
-    from scrape_article import scrape_article_content, rate_limit_delay
-    from ai_rewriter import rewrite_article_german
+    from generate_content import find_published_urls
 
-    logger.info(f"Enhancing {len(articles)} articles with scraping and AI rewriting...")
+    existing_urls = find_published_urls(a.get('url') for a in articles)
+    new_articles = [a for a in articles if a.get('url') not in existing_urls]
 
-    enhanced = []
-    for idx, article in enumerate(articles, 1):
-        try:
-            logger.info(f"Processing article {idx}/{len(articles)}: {article['title'][:50]}...")
+    skipped = len(articles) - len(new_articles)
+    if skipped:
+        logger.info(
+            f"Skipped {skipped} already-published articles before enhancement "
+            f"(saved {skipped} scrapes and {skipped} OpenAI rewrites, "
+            f"up to ~{skipped * OPENAI_MAX_TOKENS} completion tokens)"
+        )
+
+    return new_articles
+
+
+def merge_coins(article, duplicate):
+    """
+    Add a duplicate's coins to the article that is kept
+
+    Args:
+        article: Article dict that is kept
+        duplicate: Near-duplicate article dict that is skipped
+    """
+    known = {coin['id'] for coin in article['coins']}
+    for coin in duplicate.get('coins', []):
+        if coin['id'] not in known:
+            article['coins'].append(coin)
+            known.add(coin['id'])
 
-            # 1. Scrape full article
-            full_content = scrape_article_content(article['url'])
 
-            if full_content and full_content['text']:
-                # 2. Rewrite in German with OpenAI
+def iter_enhanced_articles(articles, max_in_flight=PIPELINE_MAX_IN_FLIGHT, journal=None, near_duplicates=None,
+                           batch=OPENAI_BATCH_MODE, on_drop=None):
+    """
+    Scrape and rewrite articles as a streaming pipeline
+
+    Scrapes run on one thread pool (with per-host politeness limits) and
+    each successful scrape is handed straight to the rewrite pool. Articles
+    are yielded as soon as their rewrite finishes, in completion order, and
+    at most `max_in_flight` articles are between the two stages at once.
+
+    In batch mode the scraped articles are collected instead and rewritten
+    through the OpenAI Batch API once scraping is done.
+
+    Args:
+        articles: Iterable of matched article dicts
+        max_in_flight: Maximum number of articles being scraped or rewritten
+        journal: Optional RunJournal; journaled scrapes and rewrites are
+            reused and new results are recorded
+        near_duplicates: Optional NearDuplicateIndex; stories similar to one
+            already rewritten are skipped before scraping (by headline) or
+            before rewriting (by headline and body). Yielded stories are only
+            indexed for this run; the caller persists them once written
+        batch: Rewrite through the OpenAI Batch API (see openai_batch.py)
+        on_drop: Optional callback(article, reason) for articles that are not
+            yielded; reason is 'near_duplicate', 'scrape_failed' or 'rewrite_failed'
+
+    Yields:
+        Enhanced articles with German content
+    """
+    from scrape_article import HostThrottle, scrape_with_throttle, count_extractors
+    from ai_rewriter import rewrite_article_german, rate_limiter
+
+    throttle = HostThrottle()
+    done = queue.Queue()
+    pending = iter(articles)
+    in_flight = 0
+    stats = {'total': 0, 'scraped': 0, 'enhanced': 0, 'resumed': 0, 'near_duplicates': 0}
+    scrape_results = []
+    signatures = {}  # url -> near-duplicate signatures, computed in the scrape workers
+    pending_articles = {}  # url -> article not yet yielded, for merging duplicates into
+    batch_queue = []  # (article, prepared content) waiting for the batch rewrite
+    rewrite_lock = threading.Lock()
+    rewrites = {'in_flight': 0, 'max_parallel': 0, 'started': 0}
+
+    def find_duplicate(article, article_signatures):
+        match = near_duplicates.find_duplicate(article_signatures, exclude_url=article['url'])
+        if not match:
+            return False
+
+        url, view, similarity = match
+        stats['near_duplicates'] += 1
+        metrics.incr('near_duplicates_total', {'view': view})
+        logger.info(f"Skipping near-duplicate ({view} similarity {similarity:.2f} to {url}): {article['url']}")
+        if url in pending_articles:
+            merge_coins(pending_articles[url], article)
+        if on_drop:
+            on_drop(article, 'near_duplicate')
+        return True
+
+    def finish(article, result):
+        # Handle a finished rewrite; returns True if the article is ready to publish
+        pending_articles.pop(article['url'], None)
+        if not result:
+            logger.warning(f"AI rewriting failed for: {article['url']}")
+            if on_drop:
+                on_drop(article, 'rewrite_failed')
+            if near_duplicates is not None:
+                # Let a later copy of the story take its place
+                near_duplicates.remove(article['url'])
+            return False
+
+        if near_duplicates is not None:
+            if (article['url'], VIEW_HEADLINE) not in near_duplicates.signatures:
+                # Rewrite reused from the journal; index it before the title turns German
+                near_duplicates.add(article['url'], near_duplicates.signatures_for(article))
+
+        # Replace content with rewritten version
+        article['title'] = result['title']
+        article['content'] = result['content']
+        article['description'] = result['summary']
+
+        stats['enhanced'] += 1
+        logger.info(f"✓ Article enhanced ({stats['enhanced']}): {article['title'][:50]}...")
+        return True
+
+    bucket_wait_before = rate_limiter.total_wait
+    start = time.monotonic()
+
+    def rewrite(article, content):
+        # Always post a result: the main loop waits for one per article in flight
+        german_article = None
+        with rewrite_lock:
+            rewrites['in_flight'] += 1
+            rewrites['started'] += 1
+            rewrites['max_parallel'] = max(rewrites['max_parallel'], rewrites['in_flight'])
+            metrics.observe('openai_rewrites_in_flight', rewrites['in_flight'])
+        try:
+            with metrics.span('rewrite_article', title=article['title'][:80]):
                 german_article = rewrite_article_german(
                     title=article['title'],
-                    content=full_content['text'],
+                    content=content,
                     coins=article['coins']
                 )
 
-                if german_article:
-                    # 3. Replace content with rewritten version
-                    article['title'] = german_article['title']
-                    article['content'] = german_article['content']
-                    article['description'] = german_article['summary']
-
-                    enhanced.append(article)
-                    logger.info(f"✓ Article enhanced successfully ({idx}/{len(articles)})")
+            if german_article and journal:
+                try:
+                    journal.record_rewrite(article['url'], german_article)
+                except Exception as e:
+                    logger.warning(f"Could not journal the rewrite of {article['url']}: {e}")
+        except Exception as e:
+            logger.error(f"Rewrite failed for {article['url']}: {e}")
+        finally:
+            with rewrite_lock:
+                rewrites['in_flight'] -= 1
+            done.put((article, 'rewrite', german_article))
+
+    def scrape(article):
+        # Always post a result: the main loop waits for one per article in flight
+        full_content = None
+        try:
+            full_content = scrape_with_throttle(article['url'], throttle)
+            if not (full_content and full_content['text']):
+                full_content = None
+
+            if full_content and journal:
+                try:
+                    journal.record_scrape(article['url'], full_content)
+                except Exception as e:
+                    logger.warning(f"Could not journal the scrape of {article['url']}: {e}")
+
+            if full_content and near_duplicates is not None:
+                try:
+                    signatures[article['url']] = near_duplicates.signatures_for(article, full_content['text'])
+                except Exception as e:
+                    # The main loop computes them again
+                    logger.warning(f"Could not compute near-duplicate signatures for {article['url']}: {e}")
+        except Exception as e:
+            logger.error(f"Scraping failed for {article['url']}: {e}")
+            full_content = None
+        finally:
+            done.put((article, 'scrape', full_content))
+
+    with ThreadPoolExecutor(max_workers=max(1, SCRAPE_MAX_WORKERS)) as scrape_pool, \
+            ThreadPoolExecutor(max_workers=max(1, OPENAI_MAX_CONCURRENCY)) as rewrite_pool:
+        while True:
+            # Keep the pipeline full without reading ahead of the bound
+            while in_flight < max_in_flight:
+                article = next(pending, None)
+                if article is None:
+                    break
+                stats['total'] += 1
+
+                # The headline alone is enough to skip copies of stories already rewritten
+                if near_duplicates is not None and find_duplicate(article, near_duplicates.signatures_for(article)):
+                    continue
+
+                in_flight += 1
+                pending_articles[article['url']] = article
+
+                # Reuse work journaled by an interrupted run
+                if journal and article['url'] in journal.rewrites:
+                    stats['resumed'] += 1
+                    done.put((article, 'rewrite', journal.rewrites[article['url']]))
+                elif journal and article['url'] in journal.scrapes:
+                    stats['resumed'] += 1
+                    done.put((article, 'scrape', journal.scrapes[article['url']]))
+                else:
+                    scrape_pool.submit(scrape, article)
+
+            if in_flight == 0:
+                break
+
+            article, stage, result = done.get()
+
+            if stage == 'scrape':
+                scrape_results.append(result)
+                if result:
+                    stats['scraped'] += 1
+
+                    if near_duplicates is not None:
+                        article_signatures = signatures.pop(article['url'], None) or \
+                            near_duplicates.signatures_for(article, result['text'])
+                        if find_duplicate(article, article_signatures):
+                            in_flight -= 1
+                            pending_articles.pop(article['url'], None)
+                            continue
+                        near_duplicates.add(article['url'], article_signatures)
+
+                    # Strip boilerplate and fit the text into the prompt's token budget
+                    content = prepare_article_content(article, result)
+
+                    if batch:
+                        in_flight -= 1
+                        batch_queue.append((article, content))
+                    else:
+                        rewrite_pool.submit(rewrite, article, content)
                 else:
-                    logger.warning(f"AI rewriting failed for: {article['url']}")
-            else:
-                logger.warning(f"Scraping failed for: {article['url']}")
+                    in_flight -= 1
+                    pending_articles.pop(article['url'], None)
+                    logger.warning(f"Scraping failed for: {article['url']}")
+                    if on_drop:
+                        on_drop(article, 'scrape_failed')
+                continue
+
+            in_flight -= 1
+            if finish(article, result):
+                yield article
+
+    if batch_queue:
+        from openai_batch import rewrite_articles_in_batch
+
+        jobs = [
+            {'url': article['url'], 'title': article['title'], 'content': content, 'coins': article['coins']}
+            for article, content in batch_queue
+        ]
+        results, _ = rewrite_articles_in_batch(jobs, journal=journal)
+        for (article, _), result in zip(batch_queue, results):
+            if finish(article, result):
+                yield article
+
+    elapsed = time.monotonic() - start
+    logger.info(
+        f"Successfully enhanced {stats['enhanced']}/{stats['total']} articles in {elapsed:.2f}s "
+        f"({stats['scraped']} scraped, {stats['enhanced'] / elapsed if elapsed > 0 else 0:.2f} articles/sec, "
+        f"{rate_limiter.total_wait - bucket_wait_before:.2f}s waiting for OpenAI rate limits)"
+    )
+    if rewrites['started']:
+        logger.info(f"Ran {rewrites['started']} rewrites, at most {rewrites['max_parallel']} in parallel")
+    if stats['resumed']:
+        logger.info(f"Reused journaled work for {stats['resumed']} articles")
+    if stats['near_duplicates']:
+        logger.info(f"Skipped {stats['near_duplicates']} near-duplicate stories before rewriting")
+    if scrape_results:
+        extractors = count_extractors(scrape_results)
+        logger.info("Extractors used: " + ", ".join(f"{k}={v}" for k, v in sorted(extractors.items())))
+    for host, wait in sorted(throttle.wait_time.items(), key=lambda x: x[1], reverse=True):
+        logger.info(f"  {host}: waited {wait:.2f}s for politeness limits")
+    for host, skipped in sorted(throttle.skipped_hosts().items()):
+        logger.info(f"  {host}: skipped {skipped} articles while its circuit was open")
 
-            # Rate limiting between articles
-            if idx < len(articles):
-                rate_limit_delay()
 
-        except Exception as e:
-            logger.error(f"Enhancement failed for article {idx}: {e}")
-            continue
+def enhance_articles_with_full_content(articles):
+    """
+    Scrape full content and rewrite in German for each article
 
-    logger.info(f"Successfully enhanced {len(enhanced)}/{len(articles)} articles")
-    return enhanced
+    Args:
+        articles: List of article dicts from GNews
 
+    Returns:
+        List of enhanced articles with German content (in completion order)
+    """
+    logger.info(f"Enhancing {len(articles)} articles with scraping and AI rewriting...")
 
-def fetch_crypto_news(coins=None):
+    return list(iter_enhanced_articles(articles))
+
+
+def collect_articles_to_enhance(coins=None, journal=None):
     """
-    Main function to fetch cryptocurrency news
+    Fetch, match and deduplicate the articles a run should enhance
 
     Args:
-        coins: List of coin dicts (if None, will load from file)
+        coins: CoinRegistry or list of coin dicts (if None, will load from file)
+        journal: Optional RunJournal; a journaled GNews batch is reused
+            instead of spending another API request
 
     Returns:
-        List of enriched article dicts with coin matching
+        List of matched article dicts not published yet (at most MAX_ARTICLES_PER_RUN)
     """
     if coins is None:
         coins = load_coins()
         if not coins:
             raise ValueError("No coins data available. Run fetch_coins.py first.")
+    coins = as_registry(coins)
 
-    # Build aggregated search query
-    query = build_aggregated_query(coins)
+    if journal and journal.gnews_articles is not None:
+        articles = journal.gnews_articles
+        logger.info(f"Reusing {len(articles)} journaled GNews articles")
+    else:
+        # Fetch news for all tracked coins within the GNews quota
+        with metrics.span('gnews_fetch'):
+            articles = fetch_planned_news(coins)
 
-    # Fetch news from GNews (uses 1 API request)
-    articles = fetch_news_from_gnews(query, max_articles=MAX_ARTICLES_PER_RUN)
+        if journal:
+            journal.record_gnews_batch(articles)
 
     if not articles:
         logger.warning("No articles fetched from GNews")
         return []
 
     # Match articles to specific coins
-    enriched_articles = match_articles_to_coins(articles, coins)
+    with metrics.span('match'):
+        enriched_articles = match_articles_to_coins(articles, coins)
 
     # Remove duplicates
-    unique_articles = deduplicate_articles(enriched_articles)
+    with metrics.span('dedupe'):
+        unique_articles = deduplicate_articles(enriched_articles)
+
+        # Skip articles we already published on a previous run
+        unique_articles = filter_published_articles(unique_articles)
+
+    if not unique_articles:
+        logger.info("No new articles to enhance")
+        return []
 
     # Limit to max articles before enhancement (to save API costs)
     if len(unique_articles) > MAX_ARTICLES_PER_RUN:
         unique_articles = unique_articles[:MAX_ARTICLES_PER_RUN]
         logger.info(f"Limited articles to {MAX_ARTICLES_PER_RUN}")
 
-    # NEW: Enhance articles with full content and German rewriting
-    enhanced_articles = enhance_articles_with_full_content(unique_articles)
+    return unique_articles
+
+
+def stream_crypto_news(coins=None, journal=None, near_duplicates=None):
+    """
+    Fetch, match and enhance cryptocurrency news as a stream
+
+    Fetching, matching and deduplication work on the single GNews batch;
+    scraping and rewriting are streamed, so callers can write each article
+    as soon as it is ready.
+
+    Args:
+        coins: CoinRegistry or list of coin dicts (if None, will load from file)
+        journal: Optional RunJournal; a journaled GNews batch is reused
+            instead of spending another API request
+        near_duplicates: Optional open NearDuplicateIndex. The caller persists
+            each story once it is written; without one, a run-local index is
+            opened and nothing is saved for later runs
+
+    Yields:
+        Enriched article dicts with coin matching and German content
+    """
+    start = time.monotonic()
+
+    unique_articles = collect_articles_to_enhance(coins, journal)
+    if not unique_articles:
+        return
+
+    logger.info(f"Enhancing {len(unique_articles)} articles with scraping and AI rewriting...")
+
+    # Enhance articles with full content and German rewriting
+    try:
+        with contextlib.ExitStack() as stack:
+            if near_duplicates is None:
+                near_duplicates = stack.enter_context(NearDuplicateIndex())
+            enhanced = iter_enhanced_articles(unique_articles, journal=journal, near_duplicates=near_duplicates)
+            for count, article in enumerate(enhanced, 1):
+                if count == 1:
+                    first = time.monotonic() - start
+                    metrics.observe('time_to_first_article_seconds', first)
+                    logger.info(f"First article ready after {first:.2f}s")
+                yield article
+    finally:
+        # Don't leave forkserver extraction workers behind
+        shutdown_pool()
+
+
+def fetch_crypto_news(coins=None):
+    """
+    Main function to fetch cryptocurrency news
+
+    Args:
+        coins: CoinRegistry or list of coin dicts (if None, will load from file)
+
+    Returns:
+        List of enriched article dicts with coin matching
+    """
+    enhanced_articles = list(stream_crypto_news(coins))
 
     logger.info(f"Final article count: {len(enhanced_articles)}")
 
@@ -3,16 +3,31 @@ Generate Hugo markdown content from news articles
 """
 
 import os
+import re
+import json
+import tempfile
 import yaml
 from datetime import datetime, timedelta
 from pathlib import Path
 import pytz
 
-from config import CONTENT_DIR, DAYS_TO_KEEP
-from utils import setup_logger, sanitize_filename, format_datetime_iso
+from config import CONTENT_DIR, DAYS_TO_KEEP, CONTENT_MANIFEST_PATH
+from utils import setup_logger, sanitize_filename, format_datetime_iso, get_current_time_utc
+from article_index import ArticleIndex, hash_content
+import metrics
 
 logger = setup_logger(__name__)
 
+# libyaml's C emitter is much faster than the pure-Python one
+try:
+    from yaml import CDumper as FastDumper
+except ImportError:
+    FastDumper = None
+
+# Characters for which libyaml does not produce byte-identical output
+# (line breaks, tabs, control characters, line separators, BOM, astral plane)
+FAST_DUMPER_UNSAFE = re.compile('[^\x20-\x7e\xa0-\u2027\u202a-\ud7ff\ue000-\ufefe\uff00-\ufffd]')
+
 
 def generate_front_matter(article):
     """
@@ -76,6 +91,34 @@ def generate_article_filename(article):
     return filename
 
 
+def _fast_dump_safe(value):
+    if isinstance(value, str):
+        return not FAST_DUMPER_UNSAFE.search(value)
+    if isinstance(value, (list, tuple)):
+        return all(_fast_dump_safe(item) for item in value)
+    return value is None or isinstance(value, (bool, int, float))
+
+
+def dump_front_matter(front_matter):
+    """
+    Serialize front matter to YAML
+
+    Uses the libyaml emitter when it is installed and the values only
+    contain characters for which its output is byte-identical to PyYAML's
+    pure-Python emitter; falls back to the pure-Python emitter otherwise.
+
+    Args:
+        front_matter: Front matter dict
+
+    Returns:
+        YAML string
+    """
+    if FastDumper is not None and all(_fast_dump_safe(v) for v in front_matter.values()):
+        return yaml.dump(front_matter, Dumper=FastDumper, default_flow_style=False, allow_unicode=True)
+
+    return yaml.dump(front_matter, default_flow_style=False, allow_unicode=True)
+
+
 def generate_article_content(article):
     """
     Generate full markdown content for an article
@@ -90,7 +133,7 @@ def generate_article_content(article):
     front_matter = generate_front_matter(article)
 
     # Convert front matter to YAML
-    yaml_str = yaml.dump(front_matter, default_flow_style=False, allow_unicode=True)
+    yaml_str = dump_front_matter(front_matter)
 
     # Build markdown content
     content_parts = []
@@ -121,29 +164,107 @@ def generate_article_content(article):
     return '\n'.join(content_parts)
 
 
-def write_article_file(article, filename):
+def write_file_atomic(filepath, content):
+    """
+    Write a text file atomically (temp file in the same directory + rename)
+
+    Args:
+        filepath: Target path
+        content: Text content
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=filepath.parent, prefix=f".{filepath.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        # mkstemp creates owner-only files; match a normal write
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, filepath)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def resolve_article_filename(article, index):
+    """
+    Pick the content file for an article
+
+    Articles already in the index keep their file. New articles get the
+    date-slug filename, with a numeric suffix if that file belongs to a
+    different article. New filenames are reserved in the index before the
+    file is written, so concurrent workers never pick the same one.
+
+    Args:
+        article: Article dict
+        index: Open ArticleIndex
+
+    Returns:
+        Filename string
+    """
+    source_url = article.get('url', '')
+    filename = generate_article_filename(article)
+    stem = filename[:-len('.md')]
+    publish_date = format_datetime_iso(article.get('publishedAt', ''))
+    suffix = 1
+
+    while True:
+        row = index.get_by_source_url(source_url) if source_url else None
+        if row:
+            return row['filename']
+
+        if not (CONTENT_DIR / filename).exists() and index.reserve_filename(source_url, filename, publish_date):
+            return filename
+
+        suffix += 1
+        filename = f"{stem}-{suffix}.md"
+
+
+def write_article_incremental(article, index):
     """
-    Write article to markdown file
+    Render an article and write it only if the bytes changed
+
+    The content hash of the previous render is kept in the article index.
 
     Args:
         article: Article dict
-        filename: Filename to write to
+        index: Open ArticleIndex
 
     Returns:
-        Path to written file
+        Tuple of (file path, status) where status is 'added', 'changed' or 'unchanged'
     """
+    filename = resolve_article_filename(article, index)
     filepath = CONTENT_DIR / filename
 
-    # Generate content
     content = generate_article_content(article)
+    content_hash = hash_content(content)
 
-    # Write file
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(content)
+    row = index.get_by_filename(filename)
+    if row is None or row['content_hash'] is None:
+        status = 'added'
+    elif row['content_hash'] == content_hash and filepath.exists():
+        return filepath, 'unchanged'
+    else:
+        status = 'changed'
 
-    logger.debug(f"Wrote article: {filename}")
+    try:
+        with metrics.span('write_article', status=status):
+            write_file_atomic(filepath, content)
+    except Exception:
+        if status == 'added':
+            index.release_filename(article.get('url', ''))
+        raise
+    logger.debug(f"Wrote article ({status}): {filename}")
+
+    front_matter = generate_front_matter(article)
+    index.upsert(
+        source_url=article.get('url', ''),
+        filename=filename,
+        publish_date=front_matter['date'],
+        coins=front_matter['coins'],
+        content_hash=content_hash
+    )
 
-    return filepath
+    return filepath, status
 
 
 def cleanup_old_articles(days_to_keep=DAYS_TO_KEEP):
@@ -152,116 +273,164 @@ def cleanup_old_articles(days_to_keep=DAYS_TO_KEEP):
 
     Args:
         days_to_keep: Number of days of articles to keep
+
+    Returns:
+        List of removed filenames
     """
     logger.info(f"Cleaning up articles older than {days_to_keep} days...")
 
     if not CONTENT_DIR.exists():
         logger.warning(f"Content directory doesn't exist: {CONTENT_DIR}")
-        return
+        return []
 
     cutoff_date = datetime.now(pytz.UTC) - timedelta(days=days_to_keep)
-    removed_count = 0
-
-    for filepath in CONTENT_DIR.glob('*.md'):
-        # Extract date from filename (YYYY-MM-DD-slug.md)
-        try:
-            date_str = filepath.name[:10]  # First 10 characters
-            file_date = datetime.strptime(date_str, '%Y-%m-%d')
-            file_date = pytz.UTC.localize(file_date)
-
-            if file_date < cutoff_date:
-                filepath.unlink()
-                removed_count += 1
-                logger.debug(f"Removed old article: {filepath.name}")
-
-        except (ValueError, IndexError):
-            logger.warning(f"Skipping file with invalid date format: {filepath.name}")
-            continue
-
-    if removed_count > 0:
-        logger.info(f"Removed {removed_count} old articles")
+    removed = []
+
+    with ArticleIndex() as index:
+        for filepath in CONTENT_DIR.glob('*.md'):
+            # Extract date from filename (YYYY-MM-DD-slug.md)
+            try:
+                date_str = filepath.name[:10]  # First 10 characters
+                file_date = datetime.strptime(date_str, '%Y-%m-%d')
+                file_date = pytz.UTC.localize(file_date)
+
+                if file_date < cutoff_date:
+                    filepath.unlink()
+                    index.mark_removed(filepath.name)
+                    removed.append(filepath.name)
+                    logger.debug(f"Removed old article: {filepath.name}")
+
+            except (ValueError, IndexError):
+                logger.warning(f"Skipping file with invalid date format: {filepath.name}")
+                continue
+
+    if removed:
+        logger.info(f"Removed {len(removed)} old articles")
     else:
         logger.info("No old articles to remove")
 
+    return removed
+
 
 def get_existing_source_urls():
     """
     Get all source URLs from existing articles
 
+    Backed by the article index; the index is built from the markdown
+    files on first use.
+
     Returns:
         Set of source URLs
     """
-    existing_urls = set()
+    with ArticleIndex() as index:
+        index.ensure_populated()
+        return index.source_urls()
 
-    if not CONTENT_DIR.exists():
-        return existing_urls
-
-    for filepath in CONTENT_DIR.glob('*.md'):
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
-                # Extract front matter
-                if content.startswith('---'):
-                    parts = content.split('---', 2)
-                    if len(parts) >= 2:
-                        front_matter = yaml.safe_load(parts[1])
-                        source_url = front_matter.get('sourceUrl', '')
-                        if source_url:
-                            existing_urls.add(source_url)
-        except Exception as e:
-            logger.warning(f"Error reading {filepath.name}: {e}")
-            continue
-
-    return existing_urls
-
-
-def generate_content_from_articles(articles):
+
+def find_published_urls(urls):
     """
-    Generate Hugo content files from a list of articles
+    Return which of the given source URLs were already published
 
     Args:
-        articles: List of article dicts
+        urls: Iterable of source URLs
 
     Returns:
-        List of generated file paths
+        Set of already-published source URLs
+    """
+    with ArticleIndex() as index:
+        index.ensure_populated()
+        return index.find_known_urls(urls)
+
+
+def generate_content_from_articles(articles, update_existing=False, manifest=None, on_written=None):
     """
-    logger.info(f"Generating Hugo content for {len(articles)} articles...")
+    Generate Hugo content files from articles
+
+    Only new or changed files are written. Articles may come from a
+    generator; each one is written and indexed as soon as it arrives, so
+    an interrupted run keeps the files it already produced.
+
+    Args:
+        articles: Iterable of article dicts
+        update_existing: Re-render articles whose source URL is already
+            published instead of skipping them
+        manifest: Optional manifest dict to fill in place (lets callers
+            keep partial progress if the article source raises)
+        on_written: Optional callback(article) run after an article's file
+            is written (or found unchanged) and indexed
+
+    Returns:
+        Manifest dict with 'added', 'changed' and 'unchanged' file paths
+        and the number of 'skipped' duplicates
+    """
+    logger.info("Generating Hugo content from articles...")
 
     # Ensure content directory exists
     CONTENT_DIR.mkdir(parents=True, exist_ok=True)
 
-    # Get existing source URLs to avoid duplicates
-    existing_urls = get_existing_source_urls()
-    logger.debug(f"Found {len(existing_urls)} existing articles")
+    if manifest is None:
+        manifest = {'added': [], 'changed': [], 'unchanged': [], 'skipped': 0}
+    seen_urls = set()
+
+    with ArticleIndex() as index:
+        index.ensure_populated()
+
+        for article in articles:
+            source_url = article.get('url', '')
 
-    generated_files = []
-    skipped_count = 0
+            # Skip duplicates within this batch, and already published articles
+            # unless they should be re-rendered
+            if source_url in seen_urls or (not update_existing and index.contains(source_url)):
+                logger.debug(f"Skipping duplicate article from: {source_url}")
+                manifest['skipped'] += 1
+                continue
 
-    for article in articles:
-        source_url = article.get('url', '')
+            seen_urls.add(source_url)
 
-        # Skip if article with same source URL already exists
-        if source_url in existing_urls:
-            logger.debug(f"Skipping duplicate article from: {source_url}")
-            skipped_count += 1
-            continue
+            try:
+                filepath, status = write_article_incremental(article, index)
+                manifest[status].append(filepath)
+                index.commit()
+            except Exception as e:
+                logger.error(f"Error writing article from {source_url}: {e}")
+                continue
 
-        filename = generate_article_filename(article)
+            if on_written:
+                try:
+                    on_written(article)
+                except Exception as e:
+                    logger.warning(f"Post-write hook failed for {source_url}: {e}")
 
-        try:
-            filepath = write_article_file(article, filename)
-            generated_files.append(filepath)
-            # Add to existing URLs to avoid duplicates within this batch
-            existing_urls.add(source_url)
-        except Exception as e:
-            logger.error(f"Error writing article {filename}: {e}")
-            continue
+    logger.info(
+        f"Generated {len(manifest['added'])} new and {len(manifest['changed'])} changed articles "
+        f"({len(manifest['unchanged'])} unchanged)"
+    )
+    if manifest['skipped'] > 0:
+        logger.info(f"Skipped {manifest['skipped']} duplicate articles")
+
+    return manifest
+
+
+def save_content_manifest(manifest, removed=None):
+    """
+    Save the list of touched content files for the deploy workflow
+
+    Args:
+        manifest: Manifest dict from generate_content_from_articles
+        removed: List of filenames removed by cleanup_old_articles
+    """
+    data = {
+        'generated_at': get_current_time_utc(),
+        'added': [p.name for p in manifest.get('added', [])],
+        'changed': [p.name for p in manifest.get('changed', [])],
+        'unchanged': len(manifest.get('unchanged', [])),
+        'removed': list(removed or []),
+    }
 
-    logger.info(f"Generated {len(generated_files)} new articles")
-    if skipped_count > 0:
-        logger.info(f"Skipped {skipped_count} duplicate articles")
+    with open(CONTENT_MANIFEST_PATH, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
 
-    return generated_files
+    logger.info(f"Saved content manifest to {CONTENT_MANIFEST_PATH}")
 
 
 def main():
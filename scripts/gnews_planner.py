@@ -0,0 +1,196 @@
+"""
+GNews query planning and daily quota tracking
+Shards the tracked coins across OR queries and keeps a persisted count of
+requests spent today so runs stay within GNEWS_DAILY_LIMIT
+"""
+
+import os
+import json
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytz
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+from config import (
+    GNEWS_DAILY_LIMIT,
+    GNEWS_USAGE_PATH,
+    GNEWS_MAX_QUERY_LENGTH,
+    GNEWS_GENERIC_TERMS,
+    RELEVANT_COINS
+)
+from utils import setup_logger
+from coin_registry import as_registry
+
+logger = setup_logger(__name__)
+
+QUERY_SEPARATOR = " OR "
+
+
+def coin_search_term(coin):
+    """
+    Pick the term used to search for a coin
+
+    Only single-word names or simple symbols are used, since spaces and
+    special characters break GNews OR queries.
+
+    Args:
+        coin: Coin dict
+
+    Returns:
+        Search term or None if the coin has no usable term
+    """
+    name = coin['name']
+    symbol = coin['symbol'].upper()
+
+    # Skip names with parentheses, spaces, or special characters
+    if '(' in name or ')' in name or ' ' in name or not name.replace('-', '').isalnum():
+        # Try to use symbol instead if it's simple and short
+        if len(symbol) <= 5 and symbol.isalnum():
+            return symbol
+        return None
+
+    if name.isalnum():
+        return name
+
+    return None
+
+
+def plan_queries(coins, max_length=GNEWS_MAX_QUERY_LENGTH, top_n=RELEVANT_COINS):
+    """
+    Shard the tracked coins across as few OR queries as fit GNews' length limit
+
+    Queries are ordered by the best market cap rank they cover, so when the
+    quota runs short the lowest-ranked coins are the ones left out. The
+    generic crypto terms go into the first query.
+
+    Args:
+        coins: CoinRegistry or list of coin dicts
+        max_length: Maximum query length in characters
+        top_n: Number of top coins to cover (coins the matcher accepts)
+
+    Returns:
+        List of query strings
+    """
+    ranked = as_registry(coins).top(top_n)
+
+    terms = list(GNEWS_GENERIC_TERMS)
+    seen = {t.lower() for t in terms}
+    for coin in ranked:
+        term = coin_search_term(coin)
+        if term and term.lower() not in seen:
+            terms.append(term)
+            seen.add(term.lower())
+
+    queries = []
+    current = []
+    for term in terms:
+        candidate = QUERY_SEPARATOR.join(current + [term])
+        if current and len(candidate) > max_length:
+            queries.append(QUERY_SEPARATOR.join(current))
+            current = [term]
+        else:
+            current.append(term)
+    if current:
+        queries.append(QUERY_SEPARATOR.join(current))
+
+    logger.info(f"Planned {len(queries)} GNews queries covering {len(terms)} terms for top {len(ranked)} coins")
+
+    return queries
+
+
+class GNewsQuotaExceeded(Exception):
+    """
+    Raised instead of sending a GNews request once today's quota is used up
+    """
+
+
+class GNewsUsage:
+    """
+    Persisted count of GNews requests made today (UTC)
+
+    The count is re-read and incremented under an exclusive file lock, so
+    overlapping runs and workers sharing the data directory add up their
+    requests instead of overwriting each other's counts. The counter resets
+    when the UTC date changes, matching GNews' daily quota.
+    """
+
+    def __init__(self, path=GNEWS_USAGE_PATH, daily_limit=GNEWS_DAILY_LIMIT):
+        self.path = path
+        self.lock_path = path.with_name(path.name + '.lock')
+        self.daily_limit = daily_limit
+        self._lock = threading.Lock()
+        self.date = self._today()
+        self.requests = 0
+
+        with self._lock:
+            self._load()
+
+    @staticmethod
+    def _today():
+        return datetime.now(pytz.UTC).strftime('%Y-%m-%d')
+
+    @contextmanager
+    def _file_lock(self):
+        if fcntl is None:
+            yield
+            return
+
+        with open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self):
+        # Pick up requests recorded by other processes (and a new UTC day)
+        self.date = self._today()
+        self.requests = 0
+
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('date') == self.date:
+                    self.requests = int(data.get('requests', 0))
+            except (ValueError, OSError) as e:
+                logger.warning(f"Ignoring unreadable GNews usage file {self.path}: {e}")
+
+    def remaining(self):
+        """
+        Return the number of requests left in today's quota
+        """
+        with self._lock:
+            self._load()
+            return max(0, self.daily_limit - self.requests)
+
+    def record(self, count=1):
+        """
+        Charge requests that are about to be sent to today's quota
+
+        Args:
+            count: Number of requests
+
+        Raises:
+            GNewsQuotaExceeded: Today's quota has no room for `count` more requests
+        """
+        with self._lock, self._file_lock():
+            self._load()
+            if self.requests + count > self.daily_limit:
+                raise GNewsQuotaExceeded(
+                    f"GNews daily quota exhausted ({self.requests}/{self.daily_limit} requests used today)"
+                )
+            self.requests += count
+            self._save()
+
+    def _save(self):
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'date': self.date, 'requests': self.requests, 'limit': self.daily_limit}, f, indent=2)
+        os.replace(tmp_path, self.path)
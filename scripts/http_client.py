@@ -0,0 +1,164 @@
+"""
+Shared pooled HTTP transport for CoinGecko, GNews and publisher requests
+All modules send requests through one connection pool manager, so
+keep-alive connections are reused across calls and threads
+"""
+
+import threading
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.request import ACCEPT_ENCODING
+
+from config import (
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUTS,
+    HTTP_POOL_HOSTS,
+    HTTP_POOL_MAXSIZE,
+    HTTP2_ENABLED
+)
+from utils import setup_logger
+import metrics
+
+logger = setup_logger(__name__)
+
+DEFAULT_READ_TIMEOUT = 30  # seconds, for services without an entry in HTTP_READ_TIMEOUTS
+
+
+class CountingHTTPConnectionPool(HTTPConnectionPool):
+    """
+    Connection pool that counts newly opened connections
+    """
+
+    def _new_conn(self):
+        metrics.incr('http_connections_opened_total', {'host': self.host})
+        return super()._new_conn()
+
+
+class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    """
+    TLS connection pool that counts newly opened connections
+    """
+
+    def _new_conn(self):
+        metrics.incr('http_connections_opened_total', {'host': self.host})
+        return super()._new_conn()
+
+
+class PooledAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that keeps per-host keep-alive pools and counts requests
+    and new connections, so connection reuse shows up in the run metrics
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': CountingHTTPConnectionPool,
+            'https': CountingHTTPSConnectionPool,
+        }
+
+    def send(self, request, **kwargs):
+        metrics.incr('http_requests_total', {'host': urlparse(request.url).hostname or ''})
+        return super().send(request, **kwargs)
+
+
+def _enable_http2():
+    # Experimental urllib3 HTTP/2 support; needs urllib3 >= 2.3 and the h2 package
+    try:
+        import urllib3.http2
+        urllib3.http2.inject_into_urllib3()
+        logger.info("HTTP/2 enabled for the shared HTTP transport")
+    except Exception as e:
+        logger.warning(f"HTTP/2 requested but not available, using HTTP/1.1: {e}")
+
+
+if HTTP2_ENABLED:
+    _enable_http2()
+
+# One adapter (and so one set of connection pools) for the whole process;
+# each thread gets its own Session on top of it, since Sessions are not thread-safe
+_adapter = PooledAdapter(pool_connections=HTTP_POOL_HOSTS, pool_maxsize=HTTP_POOL_MAXSIZE)
+_local = threading.local()
+
+
+def get_session():
+    """
+    Return this thread's Session, backed by the shared connection pools
+
+    Returns:
+        requests.Session
+    """
+    session = getattr(_local, 'session', None)
+
+    if session is None:
+        session = requests.Session()
+        session.mount('http://', _adapter)
+        session.mount('https://', _adapter)
+        # Advertise every compression codec urllib3 can decode (brotli/zstd when installed)
+        session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+        _local.session = session
+
+    return session
+
+
+def timeout_for(service):
+    """
+    Return the (connect, read) timeout for a service
+
+    Args:
+        service: Service name (coingecko, gnews, publisher, publisher_probe)
+
+    Returns:
+        Tuple of (connect timeout, read timeout) in seconds
+    """
+    return HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUTS.get(service, DEFAULT_READ_TIMEOUT)
+
+
+def request(method, url, service, **kwargs):
+    """
+    Send a request through the shared transport
+
+    Args:
+        method: HTTP method
+        url: Request URL
+        service: Service name, used to pick the timeout
+        **kwargs: Passed on to requests (params, headers, ...)
+
+    Returns:
+        requests.Response
+    """
+    kwargs.setdefault('timeout', timeout_for(service))
+    return get_session().request(method, url, **kwargs)
+
+
+def get(url, service, **kwargs):
+    """
+    Send a GET request through the shared transport
+
+    Args:
+        url: Request URL
+        service: Service name, used to pick the timeout
+        **kwargs: Passed on to requests
+
+    Returns:
+        requests.Response
+    """
+    return request('GET', url, service, **kwargs)
+
+
+def head(url, service, **kwargs):
+    """
+    Send a HEAD request through the shared transport
+
+    Args:
+        url: Request URL
+        service: Service name, used to pick the timeout
+        **kwargs: Passed on to requests
+
+    Returns:
+        requests.Response
+    """
+    return request('HEAD', url, service, **kwargs)
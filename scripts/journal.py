@@ -0,0 +1,265 @@
+"""
+Per-run checkpoint journal for the daily pipeline
+Records the GNews batch, each scrape and rewrite result and submitted
+OpenAI batch jobs so an interrupted run can be resumed without repeating
+completed work
+"""
+
+import os
+import json
+import time
+import threading
+
+from config import JOURNAL_DIR, JOURNAL_FSYNC_BATCH, JOURNAL_FSYNC_INTERVAL, JOURNAL_KEEP_RUNS
+from utils import setup_logger
+
+logger = setup_logger(__name__)
+
+RECORD_GNEWS = "gnews_batch"
+RECORD_SCRAPE = "scrape"
+RECORD_REWRITE = "rewrite"
+RECORD_BATCH = "openai_batch"
+RECORD_FINISHED = "finished"
+
+
+class RunJournal:
+    """
+    Append-only JSON Lines journal for one pipeline run
+
+    Records are buffered and fsync'd in batches (every JOURNAL_FSYNC_BATCH
+    records or JOURNAL_FSYNC_INTERVAL seconds, whichever comes first), so a
+    crash loses at most the last unsynced batch. Safe to use from worker threads.
+    """
+
+    def __init__(self, path, fsync_batch=JOURNAL_FSYNC_BATCH, fsync_interval=JOURNAL_FSYNC_INTERVAL):
+        self.path = path
+        self.fsync_batch = fsync_batch
+        self.fsync_interval = fsync_interval
+
+        self.gnews_articles = None
+        self.scrapes = {}
+        self.rewrites = {}
+        self.batches = {}  # OpenAI batch id -> {custom_id: url}
+        self.finished = False
+
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+        if path.exists():
+            self._load()
+
+        self._file = open(path, 'a', encoding='utf-8')
+
+        # Start on a fresh line if the last run died mid-write
+        if path.stat().st_size and not path.read_bytes().endswith(b'\n'):
+            self._file.write('\n')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _load(self):
+        for record in read_records(self.path):
+            kind = record.get('type')
+            if kind == RECORD_GNEWS:
+                self.gnews_articles = record['articles']
+            elif kind == RECORD_SCRAPE:
+                self.scrapes[record['url']] = record['result']
+            elif kind == RECORD_REWRITE:
+                self.rewrites[record['url']] = record['result']
+            elif kind == RECORD_BATCH:
+                self.batches[record['batch_id']] = record['requests']
+            elif kind == RECORD_FINISHED:
+                self.finished = True
+
+    def _append(self, record, sync=False):
+        line = json.dumps(record, ensure_ascii=False, default=str) + '\n'
+
+        with self._lock:
+            self._file.write(line)
+            self._unsynced += 1
+
+            due = (
+                self._unsynced >= self.fsync_batch
+                or time.monotonic() - self._last_sync >= self.fsync_interval
+            )
+            if sync or due:
+                self._sync()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def record_gnews_batch(self, articles):
+        """
+        Record the raw articles returned by GNews (synced immediately)
+
+        Args:
+            articles: List of GNews article dicts
+        """
+        self.gnews_articles = articles
+        self._append({'type': RECORD_GNEWS, 'articles': articles}, sync=True)
+
+    def record_scrape(self, url, result):
+        """
+        Record a successful scrape
+
+        Failed scrapes are not recorded, so they are retried on resume.
+
+        Args:
+            url: Article URL
+            result: Scraped content dict
+        """
+        self.scrapes[url] = result
+        self._append({'type': RECORD_SCRAPE, 'url': url, 'result': result})
+
+    def record_rewrite(self, url, result):
+        """
+        Record a successful rewrite
+
+        Args:
+            url: Article URL
+            result: Dict with German title, content and summary
+        """
+        self.rewrites[url] = result
+        self._append({'type': RECORD_REWRITE, 'url': url, 'result': result})
+
+    def record_batch(self, batch_id, requests):
+        """
+        Record a submitted OpenAI batch job (synced immediately)
+
+        A resumed run polls the job again instead of paying for a new one.
+
+        Args:
+            batch_id: OpenAI batch ID
+            requests: Dict of custom_id -> article URL
+        """
+        self.batches[batch_id] = requests
+        self._append({'type': RECORD_BATCH, 'batch_id': batch_id, 'requests': requests}, sync=True)
+
+    def finish(self):
+        """
+        Mark the run as complete so it is not resumed
+        """
+        self.finished = True
+        self._append({'type': RECORD_FINISHED}, sync=True)
+
+    def close(self):
+        """
+        Sync outstanding records and close the file
+        """
+        with self._lock:
+            if self._file.closed:
+                return
+            if self._unsynced:
+                self._sync()
+            self._file.close()
+
+
+def read_records(path):
+    """
+    Read the records of a journal file without opening it for writing
+
+    Args:
+        path: Path of the journal file
+
+    Yields:
+        Record dicts in the order they were written
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # A torn last line from a crash mid-write
+                logger.warning(f"Ignoring unreadable journal line {line_number} in {path.name}")
+
+
+def new_run_path(run_id):
+    """
+    Build the journal path for a new run
+
+    Args:
+        run_id: Unique run identifier (e.g. a UTC timestamp)
+
+    Returns:
+        Path of the journal file
+    """
+    JOURNAL_DIR.mkdir(parents=True, exist_ok=True)
+    return JOURNAL_DIR / f"run-{run_id}.jsonl"
+
+
+def find_resumable_run():
+    """
+    Find the most recent journal that was not finished
+
+    Returns:
+        Path of the journal, or None if the last run completed
+    """
+    if not JOURNAL_DIR.exists():
+        return None
+
+    journals = sorted(JOURNAL_DIR.glob('run-*.jsonl'))
+    if not journals:
+        return None
+
+    latest = journals[-1]
+    if any(record.get('type') == RECORD_FINISHED for record in read_records(latest)):
+        return None
+
+    return latest
+
+
+def open_run_journal(run_id, resume=False):
+    """
+    Open the journal for this run
+
+    Args:
+        run_id: Identifier used if a new journal is started
+        resume: Continue the last unfinished journal if there is one
+
+    Returns:
+        RunJournal instance
+    """
+    path = find_resumable_run() if resume else None
+
+    if path:
+        journal = RunJournal(path)
+        logger.info(
+            f"Resuming run journal {path.name}: "
+            f"GNews batch {'cached' if journal.gnews_articles is not None else 'missing'}, "
+            f"{len(journal.scrapes)} scrapes, {len(journal.rewrites)} rewrites"
+        )
+        return journal
+
+    if resume:
+        logger.info("No unfinished run to resume, starting a new one")
+
+    return RunJournal(new_run_path(run_id))
+
+
+def prune_journals(keep=JOURNAL_KEEP_RUNS):
+    """
+    Delete all but the most recent journals
+
+    Args:
+        keep: Number of journals to keep
+
+    Returns:
+        Number of journals deleted
+    """
+    if not JOURNAL_DIR.exists():
+        return 0
+
+    journals = sorted(JOURNAL_DIR.glob('run-*.jsonl'))
+    stale = journals[:-keep] if keep > 0 else journals
+
+    for path in stale:
+        path.unlink()
+
+    return len(stale)
@@ -0,0 +1,153 @@
+"""
+Incremental validation of streamed JSON rewrite responses
+Checks the shape of the JSON object while tokens arrive, so a generation
+that is clearly going wrong can be aborted before it finishes
+"""
+
+from config import STREAM_MAX_CHARS, STREAM_MAX_TITLE_CHARS, STREAM_TITLE_DEADLINE_CHARS
+
+REQUIRED_KEY = "title"
+MAX_KEY_CHARS = 40
+
+
+class InvalidStreamError(ValueError):
+    """
+    Raised when a streamed response can no longer become a valid rewrite
+
+    Attributes:
+        reason: Short machine-readable reason (used as a metric label)
+    """
+
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+
+
+class StreamingJSONValidator:
+    """
+    Character-level scanner for the top-level JSON object of a rewrite
+
+    Tracks the top-level keys and the length of their string values without
+    building the object, and raises InvalidStreamError as soon as the output
+    cannot be a valid rewrite: text before the opening brace, no "title" key
+    within the first STREAM_TITLE_DEADLINE_CHARS characters, a runaway title
+    or key, or a response longer than STREAM_MAX_CHARS.
+    """
+
+    def __init__(self, max_chars=STREAM_MAX_CHARS, max_title_chars=STREAM_MAX_TITLE_CHARS,
+                 title_deadline_chars=STREAM_TITLE_DEADLINE_CHARS):
+        self.max_chars = max_chars
+        self.max_title_chars = max_title_chars
+        self.title_deadline_chars = title_deadline_chars
+
+        self.chunks = []
+        self.length = 0
+        self.keys = []
+        self.complete = False
+
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._expect_key = False
+        self._string_is_key = False
+        self._key_chars = []
+        self._value_key = None
+        self._value_length = 0
+
+    @property
+    def text(self):
+        return ''.join(self.chunks)
+
+    def feed(self, chunk):
+        """
+        Add streamed text and validate it
+
+        Args:
+            chunk: Next piece of the response
+
+        Raises:
+            InvalidStreamError: The response cannot become a valid rewrite
+        """
+        self.chunks.append(chunk)
+
+        for char in chunk:
+            self._scan(char)
+
+        self.length += len(chunk)
+        if self.length > self.max_chars:
+            raise InvalidStreamError('too_long', f"response exceeded {self.max_chars} characters")
+
+        if REQUIRED_KEY not in self.keys and self.length > self.title_deadline_chars:
+            raise InvalidStreamError('missing_title', f"no \"{REQUIRED_KEY}\" key in the first "
+                                                      f"{self.title_deadline_chars} characters")
+
+    def finish(self):
+        """
+        Check that the stream ended with a complete object
+
+        Raises:
+            InvalidStreamError: The object was not closed (e.g. cut off at max_tokens)
+        """
+        if not self.complete:
+            raise InvalidStreamError('truncated', "response ended before the JSON object was closed")
+
+    def _scan(self, char):
+        if self._in_string:
+            self._scan_string(char)
+            return
+
+        if char.isspace():
+            return
+
+        if not self._started:
+            if char != '{':
+                raise InvalidStreamError('not_json', f"response starts with {char!r} instead of a JSON object")
+            self._started = True
+            self._depth = 1
+            self._expect_key = True
+            return
+
+        if self.complete:
+            raise InvalidStreamError('trailing_text', "text after the end of the JSON object")
+
+        if char == '"':
+            self._in_string = True
+            self._string_is_key = self._depth == 1 and self._expect_key
+            self._key_chars = []
+            if self._depth == 1 and not self._string_is_key:
+                self._value_length = 0
+        elif char in '{[':
+            self._depth += 1
+        elif char in '}]':
+            self._depth -= 1
+            if self._depth == 0:
+                self.complete = True
+        elif char == ',' and self._depth == 1:
+            self._expect_key = True
+            self._value_key = None
+        elif char == ':' and self._depth == 1:
+            self._expect_key = False
+
+    def _scan_string(self, char):
+        if self._escape:
+            self._escape = False
+        elif char == '\\':
+            self._escape = True
+            return
+        elif char == '"':
+            self._in_string = False
+            if self._string_is_key:
+                key = ''.join(self._key_chars)
+                self.keys.append(key)
+                self._value_key = key
+            return
+
+        if self._string_is_key:
+            self._key_chars.append(char)
+            if len(self._key_chars) > MAX_KEY_CHARS:
+                raise InvalidStreamError('bad_key', f"key longer than {MAX_KEY_CHARS} characters")
+        elif self._depth == 1:
+            self._value_length += 1
+            if self._value_key == REQUIRED_KEY and self._value_length > self.max_title_chars:
+                raise InvalidStreamError('runaway_title', f"title longer than {self.max_title_chars} characters")
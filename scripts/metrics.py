@@ -0,0 +1,317 @@
+"""
+Lightweight tracing and metrics for pipeline runs
+Collects spans, latency histograms and counters, and writes them as JSON
+or Prometheus text at the end of a run
+"""
+
+import json
+import math
+import time
+import threading
+from contextlib import contextmanager
+
+from utils import setup_logger, get_current_time_utc
+
+logger = setup_logger(__name__)
+
+METRIC_PREFIX = "ai_crypto_news_"
+
+_lock = threading.Lock()
+_local = threading.local()
+_started = time.monotonic()
+_started_at = get_current_time_utc()
+_spans = []
+_histograms = {}
+_counters = {}
+
+
+def _key(name, labels):
+    return name, tuple(sorted((labels or {}).items()))
+
+
+def reset():
+    """
+    Clear all collected metrics (start of a new run)
+    """
+    global _started, _started_at
+
+    with _lock:
+        _started = time.monotonic()
+        _started_at = get_current_time_utc()
+        _spans.clear()
+        _histograms.clear()
+        _counters.clear()
+
+
+def incr(name, labels=None, value=1):
+    """
+    Increment a counter
+
+    Args:
+        name: Counter name
+        labels: Optional dict of label values
+        value: Amount to add
+    """
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, value, labels=None):
+    """
+    Add a sample to a histogram
+
+    Args:
+        name: Histogram name
+        value: Sample value (seconds for latencies)
+        labels: Optional dict of label values
+    """
+    key = _key(name, labels)
+    with _lock:
+        _histograms.setdefault(key, []).append(value)
+
+
+@contextmanager
+def span(name, **attrs):
+    """
+    Time a block as a named span
+
+    Spans nest per thread; the duration is also recorded in the
+    span_seconds histogram.
+
+    Args:
+        name: Span name (e.g. 'fetch_news', 'scrape_article')
+        **attrs: Extra attributes stored with the span
+    """
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+
+    record = {
+        'name': name,
+        'parent': stack[-1]['name'] if stack else None,
+        'thread': threading.current_thread().name,
+        'start': round(time.monotonic() - _started, 6),
+        'status': 'ok',
+    }
+    if attrs:
+        record['attrs'] = attrs
+
+    stack.append(record)
+    start = time.monotonic()
+    try:
+        yield record
+    except Exception:
+        record['status'] = 'error'
+        raise
+    finally:
+        duration = time.monotonic() - start
+        stack.pop()
+        record['duration'] = round(duration, 6)
+        with _lock:
+            _spans.append(record)
+        observe('span_seconds', duration, {'span': name})
+
+
+def annotate(**attrs):
+    """
+    Add attributes to this thread's innermost open span
+
+    Args:
+        **attrs: Attributes to store with the span
+    """
+    stack = getattr(_local, 'stack', None)
+    if stack:
+        stack[-1].setdefault('attrs', {}).update(attrs)
+
+
+@contextmanager
+def external_call(service):
+    """
+    Time a call to an external service
+
+    Records external_call_seconds and external_calls_total{outcome}.
+
+    Args:
+        service: Service name (coingecko, gnews, publisher, openai)
+    """
+    start = time.monotonic()
+    outcome = 'ok'
+    try:
+        yield
+    except Exception:
+        outcome = 'error'
+        raise
+    finally:
+        observe('external_call_seconds', time.monotonic() - start, {'service': service})
+        incr('external_calls_total', {'service': service, 'outcome': outcome})
+
+
+def record_token_usage(usage):
+    """
+    Add an OpenAI response's token usage to the run totals
+
+    Args:
+        usage: response.usage object, the usage dict of a Batch API result (or None)
+    """
+    if usage is None:
+        return
+
+    for kind in ('prompt_tokens', 'completion_tokens', 'total_tokens'):
+        value = usage.get(kind) if isinstance(usage, dict) else getattr(usage, kind, 0)
+        incr('openai_tokens_total', {'type': kind.replace('_tokens', '')}, value or 0)
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    # Nearest-rank percentile
+    idx = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[idx]
+
+
+def summary():
+    """
+    Summarize everything collected so far
+
+    Returns:
+        Dict with spans, histogram statistics (count/sum/p50/p95/max) and counters
+    """
+    with _lock:
+        spans = list(_spans)
+        histograms = {key: sorted(values) for key, values in _histograms.items()}
+        counters = dict(_counters)
+
+    return {
+        'run_started_at': _started_at,
+        'generated_at': get_current_time_utc(),
+        'duration': round(time.monotonic() - _started, 6),
+        'spans': sorted(spans, key=lambda s: s['start']),
+        'histograms': [
+            {
+                'name': name,
+                'labels': dict(labels),
+                'count': len(values),
+                'sum': round(sum(values), 6),
+                'p50': round(_percentile(values, 0.50), 6),
+                'p95': round(_percentile(values, 0.95), 6),
+                'max': round(values[-1], 6) if values else 0.0,
+            }
+            for (name, labels), values in sorted(histograms.items())
+        ],
+        'counters': [
+            {'name': name, 'labels': dict(labels), 'value': value}
+            for (name, labels), value in sorted(counters.items())
+        ],
+    }
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels.items()) + list((extra or {}).items())
+    if not items:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in items)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + '}'
+
+
+def to_prometheus(data=None):
+    """
+    Render a metrics summary in the Prometheus text exposition format
+
+    Histograms are exported as summaries (p50/p95 quantiles, _sum, _count)
+    plus a _max gauge.
+
+    Args:
+        data: Summary dict (defaults to summary())
+
+    Returns:
+        Prometheus text
+    """
+    data = data or summary()
+    families = {}
+
+    for h in data['histograms']:
+        name = METRIC_PREFIX + h['name']
+        summary_lines = families.setdefault((name, 'summary'), [])
+        for quantile, value in (('0.5', h['p50']), ('0.95', h['p95'])):
+            summary_lines.append(f"{name}{_format_labels(h['labels'], {'quantile': quantile})} {value}")
+        summary_lines.append(f"{name}_sum{_format_labels(h['labels'])} {h['sum']}")
+        summary_lines.append(f"{name}_count{_format_labels(h['labels'])} {h['count']}")
+        families.setdefault((f"{name}_max", 'gauge'), []).append(
+            f"{name}_max{_format_labels(h['labels'])} {h['max']}"
+        )
+
+    for c in data['counters']:
+        name = METRIC_PREFIX + c['name']
+        families.setdefault((name, 'counter'), []).append(f"{name}{_format_labels(c['labels'])} {c['value']}")
+
+    lines = []
+    for (name, kind), family_lines in families.items():
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(family_lines)
+
+    return '\n'.join(lines) + '\n'
+
+
+def write_metrics(path, prometheus_path=None):
+    """
+    Write the run's metrics to disk
+
+    Args:
+        path: JSON metrics file
+        prometheus_path: Optional Prometheus text file
+    """
+    data = summary()
+
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    logger.info(f"Saved run metrics to {path}")
+
+    if prometheus_path:
+        with open(prometheus_path, 'w', encoding='utf-8') as f:
+            f.write(to_prometheus(data))
+        logger.info(f"Saved Prometheus metrics to {prometheus_path}")
+
+
+def log_summary(data=None):
+    """
+    Log per-stage durations and external call latencies
+
+    Args:
+        data: Summary dict (defaults to summary())
+    """
+    data = data or summary()
+
+    for record in data['spans']:
+        # Worker-thread spans (per-article work) have no parent of their own
+        if record['parent'] is None and record['thread'] == 'MainThread':
+            logger.info(f"  stage {record['name']:<16} {record['duration']:.2f}s ({record['status']})")
+
+    for h in data['histograms']:
+        if h['name'] == 'external_call_seconds':
+            logger.info(
+                f"  {h['labels']['service']:<10} calls={h['count']:<4} "
+                f"p50={h['p50']:.3f}s p95={h['p95']:.3f}s max={h['max']:.3f}s"
+            )
+        elif h['name'] == 'openai_ttft_seconds':
+            logger.info(f"  ttft       {h['labels']['model']} p50={h['p50']:.3f}s p95={h['p95']:.3f}s")
+        elif h['name'] == 'openai_tokens_per_second':
+            logger.info(f"  tokens/s   {h['labels']['model']} p50={h['p50']:.0f} p95={h['p95']:.0f}")
+        elif h['name'] == 'openai_rewrites_in_flight':
+            logger.info(f"  rewrites   started={h['count']} max_parallel={h['max']:.0f}")
+
+    requests_sent = sum(c['value'] for c in data['counters'] if c['name'] == 'http_requests_total')
+    connections = sum(c['value'] for c in data['counters'] if c['name'] == 'http_connections_opened_total')
+    if requests_sent:
+        reused = max(0, requests_sent - connections)
+        logger.info(
+            f"  http       requests={requests_sent} connections={connections} "
+            f"reuse={reused / requests_sent:.0%}"
+        )
+
+    for c in data['counters']:
+        if c['name'] in ('retries_total', 'openai_tokens_total', 'prompt_tokens_saved_total',
+                         'openai_stream_aborts_total', 'aimd_decreases_total',
+                         'circuit_breaker_transitions_total', 'circuit_rejections_total'):
+            labels = ', '.join(f"{k}={v}" for k, v in c['labels'].items())
+            logger.info(f"  {c['name']} ({labels}): {c['value']}")
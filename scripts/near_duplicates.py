@@ -0,0 +1,349 @@
+"""
+Near-duplicate story detection with MinHash and LSH
+Keeps signatures of recently rewritten stories in SQLite so copies of the
+same story (syndicated or lightly retitled) are not scraped and rewritten twice
+"""
+
+import re
+import sqlite3
+import hashlib
+from array import array
+from datetime import datetime, timedelta
+
+import pytz
+
+from config import (
+    NEAR_DUPLICATES_PATH,
+    NEAR_DUP_NUM_PERM,
+    NEAR_DUP_BANDS,
+    NEAR_DUP_THRESHOLDS,
+    NEAR_DUP_WINDOW_DAYS
+)
+from utils import setup_logger
+
+logger = setup_logger(__name__)
+
+VIEW_HEADLINE = "headline"  # title + description tokens, known before scraping
+VIEW_BODY = "body"  # word shingles of the scraped text
+
+BODY_SHINGLE_SIZE = 5
+BODY_MAX_TOKENS = 2000  # the lead of an article identifies the story
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+STOPWORDS = frozenset("""
+a an and are as at be been but by for from has have in into is it its of on or
+over that the their this to was were will with after amid says said new how why
+what who than more as its up down out about just now today
+""".split())
+
+# "$175 million", "175M", "$1.5bn" and "175 mln" all become "175m" / "1.5b"
+_AMOUNT_UNITS = {
+    'million': 'm', 'mln': 'm', 'm': 'm',
+    'billion': 'b', 'bln': 'b', 'bn': 'b', 'b': 'b',
+    'thousand': 'k', 'k': 'k',
+}
+_AMOUNT_RE = re.compile(r"^[0-9][0-9.,]*[mbk]$")
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[.,][0-9]+)*")
+
+# Amounts like "175m" identify a story better than topic words like "bitcoin",
+# so headline features count them several times (weighted MinHash by repetition)
+AMOUNT_WEIGHT = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS signatures (
+    source_url TEXT NOT NULL,
+    view TEXT NOT NULL,
+    signature BLOB NOT NULL,
+    added_at TEXT NOT NULL,
+    PRIMARY KEY (source_url, view)
+);
+CREATE INDEX IF NOT EXISTS idx_signatures_added_at ON signatures(added_at);
+"""
+
+
+def tokenize(text):
+    """
+    Split text into lowercase word tokens with amounts normalized
+
+    Args:
+        text: Input text
+
+    Returns:
+        List of tokens
+    """
+    tokens = []
+    for token in _TOKEN_RE.findall((text or '').lower()):
+        unit = _AMOUNT_UNITS.get(token)
+        if unit and tokens and tokens[-1].replace('.', '').replace(',', '').isdigit():
+            tokens[-1] += unit
+        else:
+            tokens.append(token)
+    return tokens
+
+
+def headline_features(article):
+    """
+    Build the headline feature set (title and description keywords)
+
+    Args:
+        article: Article dict
+
+    Returns:
+        Set of tokens
+    """
+    text = f"{article.get('title', '')} {article.get('description', '')}"
+    features = {t for t in tokenize(text) if t not in STOPWORDS}
+
+    for token in [t for t in features if _AMOUNT_RE.match(t)]:
+        features.update(f"{token}#{i}" for i in range(1, AMOUNT_WEIGHT))
+
+    return features
+
+
+def body_features(text):
+    """
+    Build the body feature set (word shingles of the article's lead)
+
+    Args:
+        text: Scraped article text
+
+    Returns:
+        Set of shingle strings
+    """
+    tokens = tokenize(text)[:BODY_MAX_TOKENS]
+    if len(tokens) < BODY_SHINGLE_SIZE:
+        return {' '.join(tokens)} if tokens else set()
+    return {' '.join(tokens[i:i + BODY_SHINGLE_SIZE]) for i in range(len(tokens) - BODY_SHINGLE_SIZE + 1)}
+
+
+class MinHasher:
+    """
+    MinHash signatures from universal hash permutations of a 32-bit feature hash
+    """
+
+    def __init__(self, num_perm=NEAR_DUP_NUM_PERM, seed=1):
+        # Fixed coefficients so signatures stay comparable across runs
+        rng = hashlib.sha256(f"minhash-{seed}".encode()).digest()
+        coefficients = []
+        counter = 0
+        while len(coefficients) < 2 * num_perm:
+            rng = hashlib.sha256(rng + counter.to_bytes(4, 'big')).digest()
+            counter += 1
+            for i in range(0, 32, 8):
+                coefficients.append(int.from_bytes(rng[i:i + 8], 'big') % _MERSENNE_PRIME or 1)
+        self.num_perm = num_perm
+        self.permutations = list(zip(coefficients[:num_perm], coefficients[num_perm:2 * num_perm]))
+
+    def signature(self, features):
+        """
+        Compute the MinHash signature of a feature set
+
+        Args:
+            features: Set of strings
+
+        Returns:
+            array('Q') of num_perm minimum hash values (all max for an empty set)
+        """
+        hashes = [int.from_bytes(hashlib.blake2b(f.encode('utf-8'), digest_size=4).digest(), 'big')
+                  for f in features]
+        if not hashes:
+            return array('Q', [_MAX_HASH] * self.num_perm)
+
+        return array('Q', (
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self.permutations
+        ))
+
+
+def is_empty_signature(signature):
+    """
+    Check whether a signature was computed from an empty feature set
+
+    Args:
+        signature: Signature array
+
+    Returns:
+        True if every position holds the maximum hash
+    """
+    return all(value == _MAX_HASH for value in signature)
+
+
+def estimate_similarity(sig_a, sig_b):
+    """
+    Estimate Jaccard similarity from two MinHash signatures
+
+    Args:
+        sig_a: Signature array
+        sig_b: Signature array of the same length
+
+    Returns:
+        Fraction of agreeing positions
+    """
+    if not sig_a or len(sig_a) != len(sig_b):
+        return 0.0
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+class NearDuplicateIndex:
+    """
+    LSH index of story signatures, persisted in SQLite
+
+    Each story is indexed under two views: the headline (title and
+    description) and the body (scraped text). A story is a near-duplicate
+    when either view's estimated similarity reaches its threshold in
+    NEAR_DUP_THRESHOLDS. Only stories from the last NEAR_DUP_WINDOW_DAYS
+    days are kept, so follow-up coverage on later days is not suppressed.
+
+    Use as a context manager; the database is closed on exit.
+    """
+
+    def __init__(self, path=NEAR_DUPLICATES_PATH, num_perm=NEAR_DUP_NUM_PERM, bands=NEAR_DUP_BANDS,
+                 thresholds=None, window_days=NEAR_DUP_WINDOW_DAYS):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+
+        self.path = path
+        self.hasher = MinHasher(num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.thresholds = thresholds or NEAR_DUP_THRESHOLDS
+
+        self.signatures = {}  # (url, view) -> signature
+        self.buckets = {}  # (view, band, band hash) -> set of urls
+
+        self.conn = sqlite3.connect(str(path))
+        self.conn.executescript(SCHEMA)
+
+        cutoff = (datetime.now(pytz.UTC) - timedelta(days=window_days)).isoformat()
+        self.conn.execute("DELETE FROM signatures WHERE added_at < ?", (cutoff,))
+        # Don't hold the write lock while the run goes on (other workers share the file)
+        self.conn.commit()
+
+        for url, view, blob in self.conn.execute("SELECT source_url, view, signature FROM signatures"):
+            signature = array('Q')
+            signature.frombytes(blob)
+            if len(signature) == num_perm:
+                self._insert(url, view, signature)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self):
+        return len({url for url, _ in self.signatures})
+
+    def _band_keys(self, view, signature):
+        for band in range(self.bands):
+            chunk = signature[band * self.rows:(band + 1) * self.rows]
+            yield view, band, hash(tuple(chunk))
+
+    def _insert(self, url, view, signature):
+        self.signatures[(url, view)] = signature
+        for key in self._band_keys(view, signature):
+            self.buckets.setdefault(key, set()).add(url)
+
+    def signatures_for(self, article, text=None):
+        """
+        Compute the signatures of an article
+
+        Args:
+            article: Article dict (title, description)
+            text: Scraped text, if available
+
+        Returns:
+            Dict of view -> signature
+        """
+        signatures = {VIEW_HEADLINE: self.hasher.signature(headline_features(article))}
+        if text:
+            signatures[VIEW_BODY] = self.hasher.signature(body_features(text))
+        return signatures
+
+    def find_duplicate(self, signatures, exclude_url=None):
+        """
+        Find an indexed story similar to the given signatures
+
+        Args:
+            signatures: Dict of view -> signature (from signatures_for)
+            exclude_url: URL to ignore (the article itself)
+
+        Returns:
+            Tuple of (url, view, similarity) for the best match, or None
+        """
+        best = None
+
+        for view, signature in signatures.items():
+            threshold = self.thresholds.get(view)
+            if threshold is None or is_empty_signature(signature):
+                continue
+
+            candidates = set()
+            for key in self._band_keys(view, signature):
+                candidates.update(self.buckets.get(key, ()))
+            candidates.discard(exclude_url)
+
+            for url in candidates:
+                similarity = estimate_similarity(signature, self.signatures[(url, view)])
+                if similarity >= threshold and (best is None or similarity > best[2]):
+                    best = (url, view, similarity)
+
+        return best
+
+    def add(self, url, signatures):
+        """
+        Index a story for the rest of this run
+
+        The story is only saved for later runs once persist() is called,
+        so stories that never get published do not block other copies.
+
+        Args:
+            url: Source URL of the story
+            signatures: Dict of view -> signature
+        """
+        for view, signature in signatures.items():
+            self._insert(url, view, signature)
+
+    def persist(self, url):
+        """
+        Save an indexed story for later runs (call once it is published)
+
+        Args:
+            url: Source URL of the story
+        """
+        added_at = datetime.now(pytz.UTC).isoformat()
+
+        for view in (VIEW_HEADLINE, VIEW_BODY):
+            signature = self.signatures.get((url, view))
+            if signature is not None:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO signatures (source_url, view, signature, added_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (url, view, signature.tobytes(), added_at)
+                )
+        self.conn.commit()
+
+    def remove(self, url):
+        """
+        Drop a story from the index (e.g. its rewrite failed)
+
+        Args:
+            url: Source URL of the story
+        """
+        for (indexed_url, view), signature in list(self.signatures.items()):
+            if indexed_url != url:
+                continue
+            del self.signatures[(indexed_url, view)]
+            for key in self._band_keys(view, signature):
+                self.buckets.get(key, set()).discard(url)
+
+        self.conn.execute("DELETE FROM signatures WHERE source_url = ?", (url,))
+
+    def close(self):
+        """
+        Commit and close the database
+        """
+        self.conn.commit()
+        self.conn.close()
@@ -0,0 +1,310 @@
+"""
+OpenAI Batch API mode for the rewrite stage
+Writes the run's rewrite requests to a JSONL batch file, submits it, polls
+until the batch finishes and maps the results back to articles. Requests
+the batch does not answer fall back to direct chat completions.
+"""
+
+import json
+import time
+
+from config import (
+    OPENAI_BATCH_DIR,
+    OPENAI_BATCH_MIN_ARTICLES,
+    OPENAI_BATCH_POLL_INTERVAL,
+    OPENAI_BATCH_TIMEOUT,
+    OPENAI_BATCH_COMPLETION_WINDOW
+)
+from utils import setup_logger
+from ai_rewriter import (
+    client,
+    build_rewrite_prompt,
+    completion_params,
+    parse_rewrite_result,
+    rewrite_articles_concurrently
+)
+import metrics
+
+logger = setup_logger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+CANCEL_GRACE = 60  # seconds to wait for a cancelled batch's partial results
+
+
+def build_batch_line(custom_id, job):
+    """
+    Build one request line of a batch input file
+
+    Args:
+        custom_id: ID that identifies the request in the results
+        job: Dict with 'title', 'content' and 'coins' keys
+
+    Returns:
+        Request dict
+    """
+    system_prompt, user_prompt = build_rewrite_prompt(job['title'], job['content'], job['coins'])
+
+    return {
+        'custom_id': custom_id,
+        'method': 'POST',
+        'url': BATCH_ENDPOINT,
+        'body': completion_params(system_prompt, user_prompt),
+    }
+
+
+def write_batch_file(path, requests):
+    """
+    Write a batch input file
+
+    Args:
+        path: Output path
+        requests: Dict of custom_id -> job
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(path, 'w', encoding='utf-8') as f:
+        for custom_id, job in requests.items():
+            f.write(json.dumps(build_batch_line(custom_id, job), ensure_ascii=False) + '\n')
+
+
+def submit_batch(path):
+    """
+    Upload a batch input file and create the batch
+
+    Args:
+        path: Batch input file
+
+    Returns:
+        Batch ID
+    """
+    with metrics.external_call('openai_batch'):
+        with open(path, 'rb') as f:
+            input_file = client.files.create(file=f, purpose='batch')
+
+        batch = client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=OPENAI_BATCH_COMPLETION_WINDOW
+        )
+
+    return batch.id
+
+
+def wait_for_batch(batch_id, timeout=OPENAI_BATCH_TIMEOUT, poll_interval=OPENAI_BATCH_POLL_INTERVAL):
+    """
+    Poll a batch until it reaches a terminal status or the timeout passes
+
+    Args:
+        batch_id: Batch ID
+        timeout: Maximum seconds to wait
+        poll_interval: Seconds between polls
+
+    Returns:
+        Last retrieved batch object
+    """
+    deadline = time.monotonic() + timeout
+    last_status = None
+
+    while True:
+        try:
+            with metrics.external_call('openai_batch'):
+                batch = client.batches.retrieve(batch_id)
+        except Exception as e:
+            # A failed poll is not a failed batch; keep waiting until the deadline
+            logger.warning(f"Polling batch {batch_id} failed: {e}")
+            batch = None
+
+        if batch is not None:
+            if batch.status != last_status:
+                counts = batch.request_counts
+                progress = f" ({counts.completed}/{counts.total} done)" if counts else ""
+                logger.info(f"Batch {batch_id} is {batch.status}{progress}")
+                last_status = batch.status
+            if batch.status in TERMINAL_STATUSES:
+                return batch
+
+        if time.monotonic() >= deadline:
+            return batch
+
+        time.sleep(poll_interval)
+
+
+def read_batch_results(batch):
+    """
+    Download and parse a finished batch's output file
+
+    Args:
+        batch: Batch object
+
+    Returns:
+        Dict of custom_id -> rewrite result dict (failed requests are left out)
+    """
+    results = {}
+    if not batch.output_file_id:
+        return results
+
+    with metrics.external_call('openai_batch'):
+        output = client.files.content(batch.output_file_id).text
+
+    for line in output.splitlines():
+        if not line.strip():
+            continue
+
+        record = json.loads(line)
+        response = record.get('response') or {}
+        if record.get('error') or response.get('status_code') != 200:
+            continue
+
+        body = response.get('body') or {}
+        metrics.record_token_usage(body.get('usage'))
+
+        try:
+            result = parse_rewrite_result(body['choices'][0]['message']['content'])
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            logger.warning(f"Unreadable batch result {record.get('custom_id')}: {e}")
+            continue
+
+        if result is not None:
+            results[record['custom_id']] = result
+
+    return results
+
+
+def collect_batch(batch_id, requests):
+    """
+    Wait for a batch and map its results back to jobs
+
+    A batch still running at OPENAI_BATCH_TIMEOUT is cancelled; whatever it
+    finished before the cancellation is still used.
+
+    Args:
+        batch_id: Batch ID
+        requests: Dict of custom_id -> job index
+
+    Returns:
+        Dict of job index -> rewrite result
+    """
+    batch = wait_for_batch(batch_id)
+
+    if batch is None or batch.status not in TERMINAL_STATUSES:
+        logger.warning(f"Batch {batch_id} did not finish in {OPENAI_BATCH_TIMEOUT:.0f}s, cancelling it")
+        try:
+            with metrics.external_call('openai_batch'):
+                client.batches.cancel(batch_id)
+            batch = wait_for_batch(batch_id, timeout=CANCEL_GRACE, poll_interval=min(5, OPENAI_BATCH_POLL_INTERVAL))
+        except Exception as e:
+            logger.error(f"Cancelling batch {batch_id} failed: {e}")
+
+    if batch is None:
+        return {}
+
+    try:
+        results = read_batch_results(batch)
+    except Exception as e:
+        logger.error(f"Reading results of batch {batch_id} failed: {e}")
+        return {}
+
+    return {requests[custom_id]: result for custom_id, result in results.items() if custom_id in requests}
+
+
+def run_batches(jobs, results, stats, journal=None, submit=True):
+    """
+    Submit (or resume) the batches for a set of jobs and collect their results
+
+    Args:
+        jobs: List of job dicts
+        results: List to fill with results by job index
+        stats: Stats dict to update
+        journal: Optional RunJournal
+        submit: Submit a new batch for jobs not covered by a journaled one
+    """
+    start = time.monotonic()
+    batches = {}  # batch id -> {custom_id: job index}
+    unassigned = dict(enumerate(jobs))
+
+    # Batches submitted by an interrupted run are already paid for
+    if journal:
+        by_url = {job['url']: idx for idx, job in unassigned.items()}
+        for batch_id, recorded in journal.batches.items():
+            requests = {cid: by_url.pop(url) for cid, url in recorded.items() if url in by_url}
+            if requests:
+                batches[batch_id] = requests
+                for idx in requests.values():
+                    unassigned.pop(idx)
+                logger.info(f"Resuming batch {batch_id} with {len(requests)} rewrites")
+
+    if unassigned and submit:
+        requests = {f"rewrite-{idx}": job for idx, job in unassigned.items()}
+        path = OPENAI_BATCH_DIR / f"batch-{int(time.time())}.jsonl"
+
+        try:
+            write_batch_file(path, requests)
+            batch_id = submit_batch(path)
+            logger.info(f"Submitted batch {batch_id} with {len(requests)} rewrites")
+            batches[batch_id] = {custom_id: idx for custom_id, idx in zip(requests, unassigned)}
+            if journal:
+                journal.record_batch(batch_id, {custom_id: job['url'] for custom_id, job in requests.items()})
+        except Exception as e:
+            logger.error(f"Submitting the rewrite batch failed, calling the API directly: {e}")
+        finally:
+            path.unlink(missing_ok=True)
+
+    with metrics.span('openai_batch', batches=len(batches)):
+        for batch_id, requests in batches.items():
+            stats['batched'] += len(requests)
+            for idx, result in collect_batch(batch_id, requests).items():
+                results[idx] = result
+                if journal:
+                    journal.record_rewrite(jobs[idx]['url'], result)
+
+    stats['batch_succeeded'] = sum(1 for r in results if r)
+    metrics.incr('openai_batch_requests_total', {'outcome': 'ok'}, stats['batch_succeeded'])
+    metrics.incr('openai_batch_requests_total', {'outcome': 'failed'}, stats['batched'] - stats['batch_succeeded'])
+    logger.info(
+        f"Batch returned {stats['batch_succeeded']}/{stats['batched']} rewrites "
+        f"in {time.monotonic() - start:.0f}s"
+    )
+
+
+def rewrite_articles_in_batch(jobs, journal=None):
+    """
+    Rewrite many articles through the OpenAI Batch API
+
+    Runs with fewer than OPENAI_BATCH_MIN_ARTICLES jobs do not submit a
+    batch and call the API directly (batches journaled by an interrupted
+    run are still collected). Jobs the batch does not answer (failed requests,
+    invalid output, a batch that timed out or could not be submitted) are
+    retried with direct calls.
+
+    Args:
+        jobs: List of dicts with 'url', 'title', 'content' and 'coins' keys
+        journal: Optional RunJournal; submitted batches are recorded, and
+            batches recorded by an interrupted run are polled again
+
+    Returns:
+        Tuple of (results in input order, stats dict). Failed rewrites are None.
+    """
+    results = [None] * len(jobs)
+    stats = {'total': len(jobs), 'batched': 0, 'batch_succeeded': 0, 'stragglers': 0, 'succeeded': 0}
+
+    submit = len(jobs) >= OPENAI_BATCH_MIN_ARTICLES
+    if not submit:
+        logger.info(f"Only {len(jobs)} rewrites, not submitting a batch")
+
+    if submit or (journal and journal.batches):
+        run_batches(jobs, results, stats, journal, submit=submit)
+
+    # Stragglers: anything the batch did not answer goes through direct calls
+    stragglers = [idx for idx, result in enumerate(results) if result is None]
+    if stragglers:
+        stats['stragglers'] = len(stragglers)
+        logger.info(f"Rewriting {len(stragglers)} articles with direct API calls")
+        straggler_results, _ = rewrite_articles_concurrently([jobs[idx] for idx in stragglers])
+        for idx, result in zip(stragglers, straggler_results):
+            results[idx] = result
+            if result and journal:
+                journal.record_rewrite(jobs[idx]['url'], result)
+
+    stats['succeeded'] = sum(1 for r in results if r)
+    return results, stats
@@ -0,0 +1,286 @@
+"""
+Prompt preprocessing for the rewrite stage
+Strips boilerplate and duplicate paragraphs from scraped text and packs the
+most informative paragraphs into the model's token budget
+"""
+
+import re
+
+try:
+    import tiktoken
+except ImportError:  # optional; token counts are estimated from characters without it
+    tiktoken = None
+
+from config import OPENAI_MODEL, PROMPT_CONTENT_TOKENS, MODEL_CONTENT_TOKEN_BUDGETS
+from utils import setup_logger
+import metrics
+
+logger = setup_logger(__name__)
+
+# Rough average for English/German prose with OpenAI tokenizers
+CHARS_PER_TOKEN = 4
+DEFAULT_CONTENT_TOKEN_BUDGET = 1000  # about the 4000 characters prompts used to be cut to
+
+MIN_PARAGRAPH_WORDS = 4  # shorter lines are captions, buttons and bylines
+BOILERPLATE_MAX_WORDS = 60  # longer paragraphs are kept even if they match a pattern
+LEAD_BONUS = 1.0  # the opening paragraph carries the story
+
+BOILERPLATE_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
+    r"^(share|tweet|email|print)( this( article| story)?)?\b",
+    r"\b(read more|continue reading|also read|related (articles?|stories|news)|recommended for you)\b",
+    r"^related:",
+    r"\b(subscribe to|sign up for|newsletter|follow us on|join our (telegram|discord))\b",
+    r"\b(not|does not constitute) (financial|investment) advice\b",
+    r"^disclaimer\b",
+    r"\b(cookies?|privacy policy|terms of (use|service)|all rights reserved)\b",
+    r"^(image|photo|source|featured image|credit)s?( by| via)?:",
+    r"\b(advertisement|sponsored content|affiliate links?)\b",
+)]
+
+_WORD_RE = re.compile(r"\w+(?:[.,']\w+)*")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+_encodings = {}
+
+
+def count_tokens(text, model=OPENAI_MODEL):
+    """
+    Count the prompt tokens of a text
+
+    Uses the model's tokenizer when tiktoken is installed and a
+    character-based estimate otherwise.
+
+    Args:
+        text: Text to count
+        model: OpenAI model name
+
+    Returns:
+        Number of tokens
+    """
+    if not text:
+        return 0
+
+    if tiktoken is not None:
+        encoding = _encodings.get(model)
+        if encoding is None:
+            try:
+                encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                encoding = tiktoken.get_encoding("cl100k_base")
+            _encodings[model] = encoding
+        return len(encoding.encode(text))
+
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def content_token_budget(model=OPENAI_MODEL):
+    """
+    Return the token budget for article content in a rewrite prompt
+
+    Args:
+        model: OpenAI model name
+
+    Returns:
+        Token budget (PROMPT_CONTENT_TOKENS overrides the per-model value)
+    """
+    if PROMPT_CONTENT_TOKENS:
+        return PROMPT_CONTENT_TOKENS
+    return MODEL_CONTENT_TOKEN_BUDGETS.get(model, DEFAULT_CONTENT_TOKEN_BUDGET)
+
+
+def split_paragraphs(text):
+    """
+    Split scraped text into paragraphs
+
+    Args:
+        text: Scraped article text
+
+    Returns:
+        List of non-empty paragraphs with whitespace collapsed
+    """
+    blocks = re.split(r"\n\s*\n", text or '')
+    # Some extractors separate paragraphs with single newlines only
+    if len(blocks) == 1:
+        blocks = text.splitlines()
+    return [' '.join(block.split()) for block in blocks if block.strip()]
+
+
+def is_boilerplate(paragraph):
+    """
+    Check whether a paragraph is page furniture rather than article text
+
+    Args:
+        paragraph: Paragraph text
+
+    Returns:
+        True for share prompts, "read more" links, newsletter and
+        disclaimer lines, captions and similar boilerplate (very short
+        lines without figures count as boilerplate too)
+    """
+    words = len(_WORD_RE.findall(paragraph))
+    if words < MIN_PARAGRAPH_WORDS and not any(ch.isdigit() for ch in paragraph):
+        return True
+    if words > BOILERPLATE_MAX_WORDS:
+        return False
+    return any(pattern.search(paragraph) for pattern in BOILERPLATE_PATTERNS)
+
+
+def _normalize(paragraph):
+    return ' '.join(_WORD_RE.findall(paragraph.lower()))
+
+
+def paragraph_score(paragraph, keywords):
+    """
+    Score how informative a paragraph is for the rewrite
+
+    Figures and mentions of the story's coins and title words count;
+    the score is per word so long filler paragraphs do not win by size.
+
+    Args:
+        paragraph: Paragraph text
+        keywords: Set of lowercase keywords (coin names/symbols, title words)
+
+    Returns:
+        Score (higher is more informative)
+    """
+    words = _WORD_RE.findall(paragraph.lower())
+    if not words:
+        return 0.0
+
+    figures = sum(1 for word in words if any(ch.isdigit() for ch in word))
+    mentions = sum(1 for word in words if word in keywords)
+    return (2 * figures + mentions) / len(words)
+
+
+def truncate_to_tokens(text, budget, model=OPENAI_MODEL):
+    """
+    Cut text to a token budget at a sentence boundary
+
+    Args:
+        text: Text to cut
+        budget: Token budget
+        model: OpenAI model name
+
+    Returns:
+        The longest run of whole sentences that fits (or the text itself if it fits)
+    """
+    if count_tokens(text, model) <= budget:
+        return text
+
+    kept = []
+    used = 0
+    for sentence in _SENTENCE_END_RE.split(text):
+        tokens = count_tokens(sentence + ' ', model)
+        if used + tokens > budget:
+            break
+        kept.append(sentence)
+        used += tokens
+
+    # A single sentence longer than the budget: fall back to a character cut
+    return ' '.join(kept) if kept else text[:budget * CHARS_PER_TOKEN]
+
+
+def prepare_content(text, title='', coins=None, model=OPENAI_MODEL, budget=None):
+    """
+    Clean scraped text and fit it into the content token budget
+
+    Boilerplate and repeated paragraphs are dropped first. If the rest is
+    still over budget, paragraphs are picked by paragraph_score (the lead
+    paragraph first) until the budget is full, and kept in their original
+    order.
+
+    Args:
+        text: Scraped article text
+        title: Article title (its words count as keywords)
+        coins: Relevant coin dicts (names and symbols count as keywords)
+        model: OpenAI model name
+        budget: Token budget (defaults to content_token_budget(model))
+
+    Returns:
+        Tuple of (prepared text, stats dict)
+    """
+    budget = budget or content_token_budget(model)
+    paragraphs = split_paragraphs(text)
+    stats = {
+        'paragraphs': len(paragraphs),
+        'boilerplate': 0,
+        'duplicates': 0,
+        'dropped_for_budget': 0,
+        'tokens_before': count_tokens(text, model),
+    }
+
+    seen = set()
+    kept = []
+    for paragraph in paragraphs:
+        if is_boilerplate(paragraph):
+            stats['boilerplate'] += 1
+            continue
+        key = _normalize(paragraph)
+        if key in seen:
+            stats['duplicates'] += 1
+            continue
+        seen.add(key)
+        kept.append(paragraph)
+
+    sizes = [count_tokens(paragraph, model) for paragraph in kept]
+
+    if sum(sizes) > budget and kept:
+        keywords = {word for word in _WORD_RE.findall(title.lower()) if len(word) > 3}
+        for coin in coins or []:
+            keywords.add(coin['name'].lower())
+            keywords.add(coin['symbol'].lower())
+
+        ranked = sorted(
+            range(len(kept)),
+            key=lambda i: paragraph_score(kept[i], keywords) + (LEAD_BONUS if i == 0 else 0.0),
+            reverse=True
+        )
+
+        chosen = set()
+        used = 0
+        for i in ranked:
+            if used + sizes[i] <= budget:
+                chosen.add(i)
+                used += sizes[i]
+
+        if not chosen:
+            # Even the best paragraph is over budget on its own
+            best = ranked[0]
+            kept[best] = truncate_to_tokens(kept[best], budget, model)
+            chosen.add(best)
+
+        stats['dropped_for_budget'] = len(kept) - len(chosen)
+        kept = [paragraph for i, paragraph in enumerate(kept) if i in chosen]
+
+    # Nothing survived the filters (e.g. an odd page layout): fall back to a plain cut
+    prepared = '\n\n'.join(kept) if kept else truncate_to_tokens(' '.join(paragraphs), budget, model)
+    stats['tokens_after'] = count_tokens(prepared, model)
+
+    return prepared, stats
+
+
+def prepare_article_content(article, full_content, model=OPENAI_MODEL):
+    """
+    Run the preprocessing stage for one scraped article and report the savings
+
+    Args:
+        article: Article dict (title, coins, url)
+        full_content: Scraped content dict
+
+    Returns:
+        Prepared text for the rewrite prompt
+    """
+    prepared, stats = prepare_content(full_content['text'], article.get('title', ''), article.get('coins'), model)
+
+    saved = max(0, stats['tokens_before'] - stats['tokens_after'])
+    metrics.observe('prompt_content_tokens', stats['tokens_before'], {'stage': 'scraped'})
+    metrics.observe('prompt_content_tokens', stats['tokens_after'], {'stage': 'prepared'})
+    metrics.incr('prompt_tokens_saved_total', value=saved)
+
+    logger.info(
+        f"Prompt content {stats['tokens_before']} -> {stats['tokens_after']} tokens "
+        f"(-{saved / stats['tokens_before'] if stats['tokens_before'] else 0:.0%}; dropped "
+        f"{stats['boilerplate']} boilerplate, {stats['duplicates']} duplicate, "
+        f"{stats['dropped_for_budget']} over-budget paragraphs): {article['url']}"
+    )
+
+    return prepared
@@ -0,0 +1,479 @@
+"""
+Shared resilience layer for calls to external services
+Classifies errors as retryable or fatal, honors Retry-After, adapts
+concurrency per upstream with AIMD and opens a circuit breaker for
+upstreams (APIs or publisher hosts) that keep failing
+"""
+
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import wraps
+
+import openai
+import requests
+
+from config import (
+    RETRY_AFTER_MAX,
+    AIMD_DECREASE_FACTOR,
+    AIMD_LATENCY_TARGETS,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_COOLDOWN
+)
+from utils import setup_logger
+import metrics
+
+logger = setup_logger(__name__)
+
+RETRYABLE_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+OVERLOAD_STATUSES = {429, 503}
+# Not worth retrying, but a host answering every request with these is down for us
+UPSTREAM_FAILURE_STATUSES = {401, 403}
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """
+    Raised instead of calling an upstream whose circuit breaker is open
+
+    Attributes:
+        upstream: Upstream name
+        retry_in: Seconds until a trial request is allowed
+    """
+
+    def __init__(self, upstream, retry_in):
+        super().__init__(f"circuit open for {upstream} (retry in {retry_in:.0f}s)")
+        self.upstream = upstream
+        self.retry_in = retry_in
+
+
+def status_of(exc):
+    """
+    Return the HTTP status of a failed call
+
+    Args:
+        exc: Exception raised by requests or the OpenAI client
+
+    Returns:
+        Status code, or None if no response was received
+    """
+    status = getattr(exc, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(exc, 'response', None), 'status_code', None)
+    return status
+
+
+def is_retryable(exc):
+    """
+    Decide whether a failed call is worth retrying
+
+    Timeouts, connection errors, 408/425/429 and 5xx responses are
+    transient. Other HTTP errors (bad request, auth, not found) and
+    everything else (missing configuration, invalid output) are fatal.
+
+    Args:
+        exc: Exception raised by the call
+
+    Returns:
+        True if the call may succeed when repeated
+    """
+    if isinstance(exc, CircuitOpenError):
+        return False
+
+    status = status_of(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUSES
+
+    return isinstance(exc, (
+        requests.ConnectionError,
+        requests.Timeout,
+        openai.APIConnectionError,  # includes APITimeoutError
+        ConnectionError,
+        TimeoutError,
+    ))
+
+
+def is_overload(exc):
+    """
+    Check whether a failure means the upstream wants less traffic
+
+    Args:
+        exc: Exception raised by the call
+
+    Returns:
+        True for 429/503 responses and timeouts
+    """
+    if status_of(exc) in OVERLOAD_STATUSES:
+        return True
+    return isinstance(exc, (requests.Timeout, openai.APITimeoutError, TimeoutError))
+
+
+def is_upstream_failure(exc):
+    """
+    Check whether a failure counts against the upstream's circuit breaker
+
+    Args:
+        exc: Exception raised by the call
+
+    Returns:
+        True for transient failures and auth/forbidden responses; False
+        for failures of the single request (404, invalid output)
+    """
+    return is_retryable(exc) or status_of(exc) in UPSTREAM_FAILURE_STATUSES
+
+
+def retry_after(exc):
+    """
+    Read the server's requested backoff from a failed response
+
+    Supports retry-after-ms (OpenAI) and Retry-After in seconds or as
+    an HTTP date.
+
+    Args:
+        exc: Exception raised by the call
+
+    Returns:
+        Seconds to wait (capped at RETRY_AFTER_MAX), or None
+    """
+    headers = getattr(getattr(exc, 'response', None), 'headers', None)
+    if not headers:
+        return None
+
+    try:
+        if headers.get('retry-after-ms'):
+            return min(float(headers['retry-after-ms']) / 1000, RETRY_AFTER_MAX)
+
+        value = headers.get('retry-after')
+        if not value:
+            return None
+
+        try:
+            seconds = float(value)
+        except ValueError:
+            seconds = (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds()
+    except (TypeError, ValueError):
+        return None
+
+    return min(max(0.0, seconds), RETRY_AFTER_MAX)
+
+
+def backoff_delay(attempt, exc=None, base_delay=1, backoff_factor=2):
+    """
+    Return how long to wait before the next attempt
+
+    Args:
+        attempt: Number of the failed attempt (0-based)
+        exc: Exception of the failed attempt (for Retry-After)
+        base_delay: Delay after the first failure in seconds
+        backoff_factor: Multiplier for each further failure
+
+    Returns:
+        Seconds to wait: Retry-After when the server sent one, otherwise
+        exponential backoff with jitter so parallel callers spread out
+    """
+    server_delay = retry_after(exc) if exc is not None else None
+    if server_delay is not None:
+        return server_delay
+
+    delay = base_delay * (backoff_factor ** attempt)
+    return delay * random.uniform(0.5, 1.0)
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit for one upstream
+
+    Starts at max_limit. A 429/503, a timeout or a call slower than
+    latency_target halves the limit (at most once per round of in-flight
+    calls, so a burst of failures counts once); every `limit` successful
+    calls in a row raise it by one, up to max_limit.
+    """
+
+    def __init__(self, name, max_limit, latency_target=None, min_limit=1,
+                 decrease_factor=AIMD_DECREASE_FACTOR):
+        self.name = name
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.latency_target = latency_target
+        self.decrease_factor = decrease_factor
+
+        self.limit = float(self.max_limit)
+        self.in_flight = 0
+        self.decreases = 0
+        self._successes = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """
+        Block until a slot under the current limit is free
+
+        Returns:
+            Start time to pass to release()
+        """
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+        return time.monotonic()
+
+    def release(self, started, exc=None):
+        """
+        Free a slot and adjust the limit from the call's outcome
+
+        Args:
+            started: Value returned by acquire()
+            exc: Exception the call raised, if any
+        """
+        latency = time.monotonic() - started
+
+        with self._cond:
+            self.in_flight -= 1
+
+            if exc is not None and is_overload(exc):
+                self._decrease(started, f"{type(exc).__name__} ({status_of(exc) or 'no response'})")
+            elif self.latency_target and latency > self.latency_target:
+                self._decrease(started, f"latency {latency:.1f}s > {self.latency_target}s")
+            elif exc is None:
+                self._successes += 1
+                if self._successes >= int(self.limit) and self.limit < self.max_limit:
+                    self.limit += 1
+                    self._successes = 0
+
+            self._cond.notify_all()
+
+    def _decrease(self, started, reason):
+        self._successes = 0
+        # Calls started before the last decrease saw the old limit; don't punish twice
+        if started < self._last_decrease:
+            return
+
+        old = int(self.limit)
+        self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+        self._last_decrease = time.monotonic()
+        self.decreases += 1
+        metrics.incr('aimd_decreases_total', {'upstream': self.name})
+        if int(self.limit) != old:
+            logger.info(f"Concurrency for {self.name} {old} -> {int(self.limit)}: {reason}")
+
+    @contextmanager
+    def slot(self):
+        """
+        Hold a slot for one call
+        """
+        started = self.acquire()
+        try:
+            yield
+        except Exception as e:
+            self.release(started, e)
+            raise
+        else:
+            self.release(started)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for one upstream
+
+    After failure_threshold consecutive upstream failures the circuit
+    opens and calls fail fast with CircuitOpenError. Once the cooldown
+    has passed a single trial call is let through: success closes the
+    circuit, failure opens it for another cooldown.
+    """
+
+    def __init__(self, name, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, cooldown=CIRCUIT_COOLDOWN):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+
+        self.state = CLOSED
+        self.failures = 0
+        self.rejected = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def check(self):
+        """
+        Allow a call or fail fast
+
+        Raises:
+            CircuitOpenError: The circuit is open (or its trial call is running)
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return
+
+            remaining = self._opened_at + self.cooldown - time.monotonic()
+            if self.state == OPEN and remaining <= 0:
+                self._transition(HALF_OPEN)
+
+            if self.state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return
+
+            self.rejected += 1
+            metrics.incr('circuit_rejections_total', {'upstream': self.name})
+            raise CircuitOpenError(self.name, max(0.0, remaining))
+
+    def record(self, exc=None):
+        """
+        Record the outcome of an allowed call
+
+        Args:
+            exc: Exception the call raised, if any. Failures of the single
+                request (see is_upstream_failure) count as successes, since
+                the upstream did answer.
+        """
+        with self._lock:
+            self._trial_running = False
+
+            if exc is None or not is_upstream_failure(exc):
+                self.failures = 0
+                if self.state != CLOSED:
+                    self._transition(CLOSED)
+                return
+
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                if self.state != OPEN:
+                    self._transition(OPEN)
+
+    def _transition(self, state):
+        self.state = state
+        metrics.incr('circuit_breaker_transitions_total', {'upstream': self.name, 'state': state})
+        if state == OPEN:
+            logger.warning(
+                f"Circuit for {self.name} opened after {self.failures} failures; "
+                f"failing fast for {self.cooldown:.0f}s"
+            )
+        else:
+            logger.info(f"Circuit for {self.name} is {state.replace('_', '-')}")
+
+    @contextmanager
+    def guard(self):
+        """
+        Check the circuit and record the outcome of one call
+
+        Raises:
+            CircuitOpenError: The circuit is open
+        """
+        self.check()
+        try:
+            yield
+        except Exception as e:
+            self.record(e)
+            raise
+        else:
+            self.record()
+
+
+_lock = threading.Lock()
+_breakers = {}
+_limiters = {}
+
+
+def breaker(upstream):
+    """
+    Return the process-wide circuit breaker for an upstream
+
+    Args:
+        upstream: Upstream name (coingecko, gnews, openai, ...)
+
+    Returns:
+        CircuitBreaker
+    """
+    with _lock:
+        if upstream not in _breakers:
+            _breakers[upstream] = CircuitBreaker(upstream)
+        return _breakers[upstream]
+
+
+def limiter(upstream, max_limit):
+    """
+    Return the process-wide adaptive concurrency limiter for an upstream
+
+    Args:
+        upstream: Upstream name; its latency target comes from AIMD_LATENCY_TARGETS
+        max_limit: Maximum concurrency (used when the limiter is created)
+
+    Returns:
+        AdaptiveLimiter
+    """
+    with _lock:
+        if upstream not in _limiters:
+            _limiters[upstream] = AdaptiveLimiter(upstream, max_limit, AIMD_LATENCY_TARGETS.get(upstream))
+        return _limiters[upstream]
+
+
+def call(upstream, func, *args, max_retries=3, base_delay=1, backoff_factor=2, **kwargs):
+    """
+    Call a function through the upstream's circuit breaker with retries
+
+    Fatal errors are raised at once; retryable ones are retried after the
+    server's Retry-After or an exponential backoff with jitter.
+
+    Args:
+        upstream: Upstream name for the circuit breaker
+        func: Function making the external call
+        *args: Positional arguments for func
+        max_retries: Maximum number of attempts
+        base_delay: Delay after the first failure in seconds
+        backoff_factor: Multiplier for each further failure
+        **kwargs: Keyword arguments for func
+
+    Returns:
+        Whatever func returns
+
+    Raises:
+        CircuitOpenError: The upstream's circuit is open
+        Exception: The last error if all attempts failed, or the first fatal one
+    """
+    circuit = breaker(upstream)
+    name = getattr(func, '__name__', upstream)
+
+    for attempt in range(max_retries):
+        try:
+            with circuit.guard():
+                return func(*args, **kwargs)
+        except Exception as e:
+            if not is_retryable(e):
+                raise
+            if attempt == max_retries - 1:
+                logger.error(f"{name} failed after {max_retries} attempts: {e}")
+                raise
+
+            delay = backoff_delay(attempt, e, base_delay, backoff_factor)
+            metrics.incr('retries_total', {'function': name})
+            logger.warning(f"{name} attempt {attempt + 1} failed: {e}. Retrying in {delay:.1f}s...")
+            time.sleep(delay)
+
+
+def retrying(upstream, max_retries=3, base_delay=1, backoff_factor=2):
+    """
+    Decorator form of call()
+
+    Args:
+        upstream: Upstream name for the circuit breaker
+        max_retries: Maximum number of attempts
+        base_delay: Delay after the first failure in seconds
+        backoff_factor: Multiplier for each further failure
+
+    Returns:
+        Decorated function
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return call(upstream, func, *args, max_retries=max_retries, base_delay=base_delay,
+                        backoff_factor=backoff_factor, **kwargs)
+
+        return wrapper
+    return decorator
@@ -1,36 +1,45 @@
 #!/usr/bin/env python3
 """
 Main orchestrator for daily crypto news update
-Runs all steps in sequence: fetch coins, fetch news, generate content
+Runs all steps in sequence: fetch coins, then stream news into content files
 """
 
 import sys
+import argparse
 from datetime import datetime
 import pytz
 
+from config import METRICS_PATH, PROMETHEUS_METRICS_PATH
 from utils import setup_logger
+import metrics
 from fetch_coins import fetch_top_coins, save_coins, load_coins
-from fetch_news import fetch_crypto_news
-from generate_content import generate_content_from_articles, cleanup_old_articles
+from fetch_news import stream_crypto_news
+from near_duplicates import NearDuplicateIndex
+from journal import open_run_journal, prune_journals
+from worker import enhance_with_workers
+from generate_content import generate_content_from_articles, cleanup_old_articles, save_content_manifest
 
 logger = setup_logger(__name__)
 
 
-def print_summary(coins_count, articles_count, files_generated):
+def print_summary(coins_count, articles_count, files_generated, files_changed=0, files_unchanged=0):
     """
     Print summary of daily run
 
     Args:
         coins_count: Number of coins fetched
-        articles_count: Number of articles fetched
+        articles_count: Number of articles published (new, changed or unchanged)
         files_generated: Number of markdown files generated
+        files_changed: Number of existing markdown files rewritten
+        files_unchanged: Number of markdown files left untouched
     """
     logger.info("=" * 60)
     logger.info("DAILY RUN SUMMARY")
     logger.info("=" * 60)
     logger.info(f"Coins fetched: {coins_count}")
-    logger.info(f"Articles fetched: {articles_count}")
+    logger.info(f"Articles processed: {articles_count}")
     logger.info(f"New content files generated: {files_generated}")
+    logger.info(f"Content files changed: {files_changed} (unchanged: {files_unchanged})")
     logger.info(f"Completed at: {datetime.now(pytz.UTC).isoformat()}")
     logger.info("=" * 60)
 
@@ -39,21 +48,34 @@ def main():
     """
     Main orchestrator function
     """
+    parser = argparse.ArgumentParser(description="Run the daily crypto news update")
+    parser.add_argument('--resume', action='store_true',
+                        help="Continue the last interrupted run, reusing its journaled GNews batch, scrapes and rewrites")
+    parser.add_argument('--queue', action='store_true',
+                        help="Queue the matched articles for worker.py processes and wait for them "
+                             "instead of enhancing them in this process")
+    parser.add_argument('--workers', type=int, default=0,
+                        help="Start this many local worker processes (implies --queue)")
+    args = parser.parse_args()
+
     start_time = datetime.now(pytz.UTC)
     logger.info("=" * 60)
     logger.info("Starting daily crypto news update")
     logger.info(f"Start time: {start_time.isoformat()}")
     logger.info("=" * 60)
 
+    metrics.reset()
+
     coins = None
-    articles = None
-    generated_files = []
+    articles_count = 0
+    manifest = {'added': [], 'changed': [], 'unchanged': [], 'skipped': 0}
+    removed_files = []
 
     try:
         # Step 1: Fetch top 100 coins from CoinGecko
-        logger.info("\n[Step 1/4] Fetching top 100 cryptocurrencies...")
-        coins = fetch_top_coins()
-        save_coins(coins)
+        logger.info("\n[Step 1/3] Fetching top 100 cryptocurrencies...")
+        with metrics.span('fetch_coins'):
+            coins = save_coins(fetch_top_coins())
         logger.info(f"✓ Successfully fetched {len(coins)} coins")
 
     except Exception as e:
@@ -67,41 +89,58 @@ def main():
 
         logger.info(f"✓ Loaded {len(coins)} coins from cache")
 
-    try:
-        # Step 2: Fetch crypto news from GNews API
-        logger.info("\n[Step 2/4] Fetching cryptocurrency news...")
-        articles = fetch_crypto_news(coins)
-        logger.info(f"✓ Successfully fetched {len(articles)} articles")
+    run_id = start_time.strftime('%Y%m%dT%H%M%SZ')
+    journal = open_run_journal(run_id, resume=args.resume)
 
-        if not articles:
+    try:
+        # Steps 2-3: Stream news from GNews through scraping and rewriting
+        # straight into Hugo content files
+        logger.info("\n[Step 2/3] Fetching news and generating Hugo content files...")
+        with metrics.span('news_pipeline'):
+            if args.queue or args.workers:
+                enhance_with_workers(coins, run_id, journal=journal, workers=args.workers, manifest=manifest)
+            else:
+                # Stories are saved for later runs' near-duplicate checks only once written
+                with NearDuplicateIndex() as near_duplicates:
+                    generate_content_from_articles(
+                        stream_crypto_news(coins, journal=journal, near_duplicates=near_duplicates),
+                        manifest=manifest,
+                        on_written=lambda article: near_duplicates.persist(article['url'])
+                    )
+        journal.finish()
+
+        articles_count = len(manifest['added']) + len(manifest['changed']) + len(manifest['unchanged'])
+        logger.info(f"✓ Generated {len(manifest['added'])} new content files")
+
+        if not articles_count:
             logger.warning("No articles fetched. This may be normal if no news is available.")
 
     except Exception as e:
-        logger.error(f"✗ Failed to fetch news: {e}")
-        articles = []
-
-    try:
-        # Step 3: Generate Hugo content files
-        logger.info("\n[Step 3/4] Generating Hugo content files...")
-
-        if articles:
-            generated_files = generate_content_from_articles(articles)
-            logger.info(f"✓ Generated {len(generated_files)} new content files")
-        else:
-            logger.warning("No articles to generate content from")
+        logger.error(f"✗ Failed to fetch news or generate content: {e}")
+        articles_count = len(manifest['added']) + len(manifest['changed']) + len(manifest['unchanged'])
+        if articles_count:
+            logger.warning(f"Kept {articles_count} articles written before the failure")
+        logger.warning(f"Run journal kept at {journal.path}; rerun with --resume to continue")
 
-    except Exception as e:
-        logger.error(f"✗ Failed to generate content: {e}")
+    finally:
+        journal.close()
+        prune_journals()
 
     try:
-        # Step 4: Clean up old articles
-        logger.info("\n[Step 4/4] Cleaning up old articles...")
-        cleanup_old_articles()
+        # Step 3: Clean up old articles
+        logger.info("\n[Step 3/3] Cleaning up old articles...")
+        with metrics.span('cleanup'):
+            removed_files = cleanup_old_articles()
         logger.info("✓ Cleanup complete")
 
     except Exception as e:
         logger.error(f"✗ Failed to cleanup old articles: {e}")
 
+    try:
+        save_content_manifest(manifest, removed_files)
+    except Exception as e:
+        logger.error(f"✗ Failed to save content manifest: {e}")
+
     # Print summary
     end_time = datetime.now(pytz.UTC)
     duration = (end_time - start_time).total_seconds()
@@ -109,11 +148,19 @@ def main():
     logger.info("")
     print_summary(
         coins_count=len(coins) if coins else 0,
-        articles_count=len(articles) if articles else 0,
-        files_generated=len(generated_files)
+        articles_count=articles_count,
+        files_generated=len(manifest['added']),
+        files_changed=len(manifest['changed']),
+        files_unchanged=len(manifest['unchanged'])
     )
     logger.info(f"Total duration: {duration:.2f} seconds")
 
+    try:
+        metrics.log_summary()
+        metrics.write_metrics(METRICS_PATH, PROMETHEUS_METRICS_PATH or None)
+    except Exception as e:
+        logger.error(f"✗ Failed to write run metrics: {e}")
+
     # Return success if we got at least some data
     if coins:
         logger.info("\n✓ Daily update completed successfully")
@@ -1,125 +1,240 @@
 """
-Scrape full article content from URLs using newspaper3k
+Scrape full article content from URLs
+Each page is downloaded once and passed through a chain of extractors
+(newspaper3k first, then a BeautifulSoup selector fallback)
 """
 
 import time
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from urllib.parse import urlparse
 from newspaper import Article
 from bs4 import BeautifulSoup
-import requests
 
-from config import SCRAPE_TIMEOUT, SCRAPE_DELAY, USER_AGENT
+from config import (
+    SCRAPE_DELAY,
+    USER_AGENT,
+    SCRAPE_PER_HOST_CONCURRENCY,
+    EXTRACT_WORKERS,
+    AIMD_LATENCY_TARGETS
+)
 from utils import setup_logger
+from resilience import AdaptiveLimiter, CircuitBreaker, CircuitOpenError
+import http_client
+import metrics
+from extraction_pool import get_pool, ExtractionTimeout
 
 logger = setup_logger(__name__)
 
+MIN_ARTICLE_LENGTH = 200  # characters of body text for an extraction to count
 
-def scrape_article_content(url):
+# Common selectors for article content, most specific first
+ARTICLE_SELECTORS = [
+    'article',
+    '.article-content',
+    '.post-content',
+    '.entry-content',
+    'main',
+    '.content'
+]
+
+
+def fetch_article_html(url):
     """
-    Scrape full article content from URL
+    Download an article page once, for all extractors to share
 
     Args:
-        url: Article URL to scrape
+        url: Article URL
 
     Returns:
-        Dict with 'title', 'text', 'authors', 'publish_date' or None if failed
+        Page HTML as text
     """
-    try:
-        logger.info(f"Scraping article: {url}")
+    headers = {'User-Agent': USER_AGENT}
+    with metrics.external_call('publisher'):
+        response = http_client.get(url, 'publisher', headers=headers)
+        response.raise_for_status()
 
-        # Use newspaper3k to extract article
-        article = Article(url)
-        article.config.browser_user_agent = USER_AGENT
-        article.config.request_timeout = SCRAPE_TIMEOUT
-
-        # Download and parse
-        article.download()
-        article.parse()
-
-        # Extract content
-        if article.text and len(article.text) > 200:
-            result = {
-                'title': article.title,
-                'text': article.text,
-                'authors': article.authors,
-                'publish_date': article.publish_date
-            }
-
-            logger.info(f"Successfully scraped {len(article.text)} characters")
-            return result
-        else:
-            logger.warning(f"Article text too short or empty: {url}")
-            return None
+    return response.text
 
-    except Exception as e:
-        logger.error(f"Scraping failed for {url}: {e}")
 
-        # Fallback to BeautifulSoup
-        try:
-            return scrape_with_beautifulsoup(url)
-        except Exception as fallback_error:
-            logger.error(f"BeautifulSoup fallback also failed: {fallback_error}")
-            return None
+def extract_with_newspaper(url, html):
+    """
+    Extract article content with newspaper3k
 
+    Args:
+        url: Article URL
+        html: Downloaded page HTML
 
-def scrape_with_beautifulsoup(url):
+    Returns:
+        Dict with 'title', 'text', 'authors', 'publish_date' or None
     """
-    Fallback scraper using BeautifulSoup
+    article = Article(url)
+    article.config.browser_user_agent = USER_AGENT
+    article.download(input_html=html)
+    article.parse()
+
+    if article.text and len(article.text) > MIN_ARTICLE_LENGTH:
+        return {
+            'title': article.title,
+            'text': article.text,
+            'authors': article.authors,
+            'publish_date': article.publish_date
+        }
+
+    logger.warning(f"newspaper3k text too short or empty: {url}")
+    return None
+
+
+def extract_with_selectors(url, html):
+    """
+    Extract article content from common article containers with BeautifulSoup
 
     Args:
         url: Article URL
+        html: Downloaded page HTML
 
     Returns:
         Dict with article content or None
     """
-    logger.info(f"Trying BeautifulSoup fallback for: {url}")
-
-    headers = {'User-Agent': USER_AGENT}
-    response = requests.get(url, headers=headers, timeout=SCRAPE_TIMEOUT)
-    response.raise_for_status()
-
-    soup = BeautifulSoup(response.content, 'lxml')
-
-    # Try to find article content
-    # Common selectors for article content
-    article_selectors = [
-        'article',
-        '.article-content',
-        '.post-content',
-        '.entry-content',
-        'main',
-        '.content'
-    ]
+    soup = BeautifulSoup(html, 'lxml')
 
     text = ""
-    for selector in article_selectors:
+    for selector in ARTICLE_SELECTORS:
         content = soup.select_one(selector)
         if content:
             # Get all paragraph text
             paragraphs = content.find_all('p')
             text = '\n\n'.join([p.get_text().strip() for p in paragraphs if p.get_text().strip()])
-            if len(text) > 200:
+            if len(text) > MIN_ARTICLE_LENGTH:
                 break
 
-    if len(text) > 200:
+    if len(text) > MIN_ARTICLE_LENGTH:
         # Try to get title
         title = ""
         title_tag = soup.find('h1') or soup.find('title')
         if title_tag:
             title = title_tag.get_text().strip()
 
-        result = {
+        return {
             'title': title,
             'text': text,
             'authors': [],
             'publish_date': None
         }
 
-        logger.info(f"BeautifulSoup extracted {len(text)} characters")
-        return result
-    else:
-        logger.warning(f"Could not extract enough text with BeautifulSoup")
+    logger.warning(f"Could not extract enough text with selectors: {url}")
+    return None
+
+
+# Extractors tried in order on the same HTML; add new ones here
+EXTRACTORS = [
+    ('newspaper', extract_with_newspaper),
+    ('selectors', extract_with_selectors),
+]
+
+
+def run_extractors(url, html, extractors=None):
+    """
+    Run the extractor chain on downloaded HTML until one succeeds
+
+    Runs in an extraction worker process, so it only returns plain data.
+
+    Args:
+        url: Article URL
+        html: Downloaded page HTML
+        extractors: List of (name, function) pairs (defaults to EXTRACTORS)
+
+    Returns:
+        Content dict with the successful extractor's name under 'extractor', or None
+    """
+    for name, extractor in extractors or EXTRACTORS:
+        try:
+            result = extractor(url, html)
+        except ExtractionTimeout:
+            raise
+        except Exception as e:
+            logger.warning(f"{name} extraction failed for {url}: {e}")
+            continue
+
+        if result:
+            result['extractor'] = name
+            return result
+
+    return None
+
+
+def extract_article(url, html, extractors=None):
+    """
+    Extract article content from downloaded HTML
+
+    Parsing runs in the extraction process pool (with CPU-time and
+    wall-clock limits) unless EXTRACT_WORKERS is 0.
+
+    Args:
+        url: Article URL
+        html: Downloaded page HTML
+        extractors: List of (name, function) pairs (defaults to EXTRACTORS)
+
+    Returns:
+        Content dict with the successful extractor's name under 'extractor', or None
+    """
+    with metrics.span('parse') as record:
+        try:
+            if EXTRACT_WORKERS > 0:
+                result = get_pool().run(run_extractors, url, html, extractors)
+            else:
+                result = run_extractors(url, html, extractors)
+        except ExtractionTimeout as e:
+            logger.error(f"Extraction stopped for {url}: {e}")
+            result = None
+
+        extractor = result['extractor'] if result else 'none'
+        record['attrs'] = {'extractor': extractor}
+
+    metrics.incr('extractions_total', {'extractor': extractor})
+    if result:
+        logger.info(f"Extracted {len(result['text'])} characters with {extractor}")
+
+    return result
+
+
+def scrape_article_content(url):
+    """
+    Scrape full article content from URL
+
+    The page is downloaded once and passed through the extractor chain.
+
+    Args:
+        url: Article URL to scrape
+
+    Returns:
+        Dict with 'title', 'text', 'authors', 'publish_date' and 'extractor'
+        or None if failed
+    """
+    logger.info(f"Scraping article: {url}")
+
+    try:
+        html = fetch_article_html(url)
+    except Exception as e:
+        logger.error(f"Scraping failed for {url}: {e}")
         return None
 
+    return extract_article(url, html)
+
+
+def scrape_with_beautifulsoup(url):
+    """
+    Scrape an article with the selector-based extractor only
+
+    Args:
+        url: Article URL
+
+    Returns:
+        Dict with article content or None
+    """
+    return extract_article(url, fetch_article_html(url), [('selectors', extract_with_selectors)])
+
 
 def is_scrapable(url):
     """
@@ -133,18 +248,140 @@ def is_scrapable(url):
     """
     try:
         headers = {'User-Agent': USER_AGENT}
-        response = requests.head(url, headers=headers, timeout=5, allow_redirects=True)
+        response = http_client.head(url, 'publisher_probe', headers=headers, allow_redirects=True)
         return response.status_code == 200
     except Exception as e:
         logger.debug(f"URL not accessible: {url} - {e}")
         return False
 
 
-def rate_limit_delay():
+class HostThrottle:
+    """
+    Per-host politeness limits and failure handling for concurrent scraping
+
+    Caps the number of in-flight requests per host with an AIMD limiter
+    (up to `per_host_limit`, lowered when the host answers 429/503, times
+    out or slows down) and spaces request starts to the same host by at
+    least `min_interval` seconds. A host that keeps failing gets its circuit
+    opened and is skipped for a cooldown. Requests to different hosts never
+    wait on each other.
+    """
+
+    def __init__(self, per_host_limit=SCRAPE_PER_HOST_CONCURRENCY, min_interval=SCRAPE_DELAY):
+        self.per_host_limit = max(1, per_host_limit)
+        self.min_interval = min_interval
+        self.wait_time = defaultdict(float)
+        self._lock = threading.Lock()
+        self._limiters = {}
+        self._breakers = {}
+        self._next_start = {}
+
+    def _host_state(self, host):
+        with self._lock:
+            if host not in self._limiters:
+                self._limiters[host] = AdaptiveLimiter(
+                    host, self.per_host_limit, AIMD_LATENCY_TARGETS.get('publisher')
+                )
+                self._breakers[host] = CircuitBreaker(host)
+            return self._limiters[host], self._breakers[host]
+
+    @contextmanager
+    def slot(self, url):
+        """
+        Hold a request slot for the host of `url`
+
+        Args:
+            url: URL about to be requested
+
+        Yields:
+            Host name the slot was acquired for
+
+        Raises:
+            CircuitOpenError: The host's circuit is open
+        """
+        host = urlparse(url).netloc.lower()
+        limiter, breaker = self._host_state(host)
+        start = time.monotonic()
+
+        with breaker.guard():
+            limiter.acquire()
+            started = None
+            try:
+                with self._lock:
+                    now = time.monotonic()
+                    ready_at = max(now, self._next_start.get(host, 0.0))
+                    self._next_start[host] = ready_at + self.min_interval
+
+                if ready_at > now:
+                    time.sleep(ready_at - now)
+
+                with self._lock:
+                    self.wait_time[host] += time.monotonic() - start
+
+                # The politeness wait does not count towards the host's latency
+                started = time.monotonic()
+                yield host
+            except Exception as e:
+                limiter.release(started or time.monotonic(), e)
+                raise
+            else:
+                limiter.release(started)
+
+    def skipped_hosts(self):
+        """
+        Return the hosts skipped because their circuit was open
+
+        Returns:
+            Dict of host -> number of requests skipped
+        """
+        with self._lock:
+            return {host: breaker.rejected for host, breaker in self._breakers.items() if breaker.rejected}
+
+
+def scrape_with_throttle(url, throttle):
+    """
+    Scrape one URL once the host's politeness limits allow it
+
+    Args:
+        url: Article URL
+        throttle: HostThrottle shared by all workers
+
+    Returns:
+        Scraped content dict or None
     """
-    Add delay between scraping requests to be respectful
+    with metrics.span('scrape_article', url=url) as record:
+        logger.info(f"Scraping article: {url}")
+
+        # Only the download holds the host's slot; parsing happens after it is released
+        try:
+            with throttle.slot(url):
+                html = fetch_article_html(url)
+        except CircuitOpenError as e:
+            logger.info(f"Skipping {url}: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Scraping failed for {url}: {e}")
+            return None
+
+        result = extract_article(url, html)
+        record['attrs']['extractor'] = result['extractor'] if result else None
+        return result
+
+
+def count_extractors(results):
+    """
+    Count which extractor produced each scrape result
+
+    Args:
+        results: Iterable of scrape results (None for failures)
+
+    Returns:
+        Dict of extractor name -> count ('none' for failed scrapes)
     """
-    time.sleep(SCRAPE_DELAY)
+    counts = defaultdict(int)
+    for result in results:
+        counts[result.get('extractor', 'unknown') if result else 'none'] += 1
+    return dict(counts)
 
 
 def main():
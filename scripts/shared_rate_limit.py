@@ -0,0 +1,152 @@
+"""
+Cross-process token bucket rate limiter backed by SQLite
+Every thread, process and CLI invocation on a host that uses the same
+database draws from the same per-API quota
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from functools import wraps
+
+from config import RATE_LIMIT_DB_PATH
+from utils import setup_logger
+import metrics
+
+logger = setup_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    name TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL
+);
+"""
+
+BUSY_TIMEOUT_MS = 5000
+
+_local = threading.local()
+
+
+def _connect(path):
+    # One connection per thread and process; sqlite3 connections are not
+    # safe to share between threads or across fork()
+    connections = getattr(_local, 'connections', None)
+    if connections is None or _local.pid != os.getpid():
+        connections = _local.connections = {}
+        _local.pid = os.getpid()
+
+    conn = connections.get(path)
+    if conn is None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(path, isolation_level=None, timeout=BUSY_TIMEOUT_MS / 1000)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # Bucket state is only meaningful for a few seconds; losing the last
+        # update on power failure is harmless, waiting for fsync is not
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.executescript(SCHEMA)
+        connections[path] = conn
+
+    return conn
+
+
+class SharedTokenBucket:
+    """
+    Token bucket whose state lives in a shared SQLite database
+
+    Each acquire() is one short write transaction: the bucket is refilled
+    for the time since the last update, the cost is taken out (the balance
+    may go negative, which queues the caller behind earlier reservations)
+    and the caller sleeps outside the transaction until its reservation is
+    due. Callers are served in the order they reserved, whichever process
+    they are in.
+    """
+
+    def __init__(self, name, calls_per_minute, burst=1, path=RATE_LIMIT_DB_PATH):
+        self.name = name
+        self.rate = calls_per_minute / 60.0
+        self.burst = max(1, burst)
+        self.path = path
+
+    def reserve(self, cost=1):
+        """
+        Take `cost` tokens from the bucket without waiting
+
+        Args:
+            cost: Tokens to take
+
+        Returns:
+            Seconds until the reservation may be used
+        """
+        conn = _connect(self.path)
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated FROM buckets WHERE name = ?", (self.name,)
+            ).fetchone()
+
+            now = time.time()
+            if row is None:
+                tokens = float(self.burst)
+            else:
+                # Wall clock, since monotonic clocks are not comparable between processes
+                elapsed = max(0.0, now - row[1])
+                tokens = min(float(self.burst), row[0] + elapsed * self.rate)
+
+            tokens -= cost
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                (self.name, tokens, now)
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+        return -tokens / self.rate if tokens < 0 else 0.0
+
+    def acquire(self, cost=1):
+        """
+        Block until `cost` tokens are available
+
+        Args:
+            cost: Tokens to take
+
+        Returns:
+            Seconds spent waiting
+        """
+        wait = self.reserve(cost)
+        if wait > 0:
+            time.sleep(wait)
+
+        metrics.observe('rate_limit_wait_seconds', wait, {'bucket': self.name})
+        return wait
+
+
+def rate_limited(name, calls_per_minute, burst=1):
+    """
+    Decorator drawing one token from a shared bucket before each call
+
+    Args:
+        name: Bucket name (one per API quota)
+        calls_per_minute: Refill rate
+        burst: Calls allowed back to back after an idle period
+
+    Returns:
+        Decorated function
+    """
+    bucket = SharedTokenBucket(name, calls_per_minute, burst)
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            waited = bucket.acquire()
+            if waited > 0:
+                logger.debug(f"Waited {waited:.2f}s for the {name} rate limit")
+            return func(*args, **kwargs)
+
+        return wrapper
+    return decorator
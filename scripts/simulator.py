@@ -0,0 +1,736 @@
+#!/usr/bin/env python3
+"""
+Local stand-in servers for CoinGecko, GNews, OpenAI (chat completions and
+the Files/Batch API) and publisher sites
+Lets run_daily.py run end-to-end offline for load and latency testing
+
+Usage:
+    python3 simulator.py --port 8765 --latency openai=lognormal:0.5,0.4 --error-rate openai=0.05
+
+Then, in another shell, export the variables it prints and run run_daily.py.
+"""
+
+import re
+import sys
+import json
+import time
+import zlib
+import random
+import argparse
+import itertools
+import threading
+from collections import Counter
+from email import policy as email_policy
+from email.parser import BytesParser
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+from config import COINS_JSON_PATH
+from utils import setup_logger
+
+logger = setup_logger(__name__)
+
+SERVICES = ("coingecko", "gnews", "openai", "publisher")
+
+PUBLISHERS = ["CoinDesk", "Cointelegraph", "Decrypt", "The Block", "Bitcoinist", "CryptoSlate"]
+
+# Story details are drawn from these so unrelated simulated stories do not read
+# alike, while syndicated copies (SYNDICATION_RATE) repeat a story's details
+FUND_PREFIXES = ["Zor", "Kel", "Mar", "Tav", "Quin", "Bri", "Sol", "Dra", "Vex", "Lum", "Nor", "Cal"]
+FUND_SUFFIXES = ["vex", "ton", "ris", "dale", "mont", "worth", "field", "ara", "ion", "ix"]
+FUND_KINDS = ["Capital", "Labs", "Digital", "Partners", "Research", "Ventures"]
+MOVES = ["rallies", "slips", "holds steady", "hits new high", "swings", "edges up", "stalls", "rebounds"]
+ACTIONS = ["buys", "sells", "stakes", "unstakes", "withdraws", "deposits", "hedges", "borrows"]
+CATALYSTS = [
+    "after Fed remarks", "ahead of options expiry", "on exchange listing news", "amid ETF rebalancing",
+    "after a network upgrade", "as funding rates flip", "following a hack report", "before a token unlock",
+]
+SYNDICATION_RATE = 0.1
+
+STREAM_CHUNK_CHARS = 16  # characters per streamed chunk (about 4 tokens)
+BAD_OUTPUT_KINDS = ('prose', 'no_title')
+
+FILLER_SENTENCES = [
+    "Analysts pointed to rising institutional demand and steady ETF inflows.",
+    "Trading volume on major exchanges climbed well above the 30-day average.",
+    "On-chain data showed long-term holders moving coins off exchanges.",
+    "Regulators in the United States and Europe are still reviewing new rules.",
+    "Derivatives markets signalled cautious optimism among professional traders.",
+    "Market makers reported thinner order books during the holiday period.",
+    "The move followed a week of sideways trading inside a narrow range.",
+    "Several funds disclosed new positions in their quarterly filings.",
+]
+
+
+class LatencyModel:
+    """
+    Random latency distribution parsed from a spec string
+
+    Specs: 'fixed:S', 'uniform:LOW,HIGH', 'lognormal:MEDIAN,SIGMA', 'exp:MEAN' (seconds)
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        kind, _, params = spec.partition(':')
+        self.kind = kind
+        self.params = [float(p) for p in params.split(',') if p]
+
+        expected = {'fixed': 1, 'uniform': 2, 'lognormal': 2, 'exp': 1}
+        if expected.get(kind) != len(self.params):
+            raise ValueError(f"Invalid latency spec: {spec}")
+
+    def sample(self, rng):
+        """
+        Draw one latency in seconds
+
+        Args:
+            rng: random.Random instance
+
+        Returns:
+            Latency in seconds
+        """
+        if self.kind == 'fixed':
+            return self.params[0]
+        if self.kind == 'uniform':
+            return rng.uniform(*self.params)
+        if self.kind == 'lognormal':
+            median, sigma = self.params
+            return median * rng.lognormvariate(0, sigma)
+        return rng.expovariate(1 / self.params[0])
+
+
+class SimulatorState:
+    """
+    Settings, synthetic data and request counters shared by all handler threads
+    """
+
+    def __init__(self, latency, error_rates, error_mix, retry_after, publisher_hosts, port, seed,
+                 batch_delay=10.0, stream_tps=400.0, bad_output_rate=0.0, down_hosts=()):
+        self.latency = latency
+        self.error_rates = error_rates
+        self.error_mix = error_mix
+        self.retry_after = retry_after
+        self.publisher_hosts = publisher_hosts
+        self.port = port
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counters = Counter()
+        self.coins = self._load_coins()
+
+        # Publisher addresses that answer every request with 503
+        self.down_hosts = set(down_hosts)
+
+        # Streamed completions and broken generations
+        self.stream_tps = stream_tps
+        self.bad_output_rate = bad_output_rate
+
+        # OpenAI Files and Batch API stand-in
+        self.batch_delay = batch_delay
+        self.files = {}
+        self.batches = {}
+        self.ids = itertools.count(1)
+
+    def _load_coins(self):
+        if COINS_JSON_PATH.exists():
+            with open(COINS_JSON_PATH, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return [
+            {"id": "bitcoin", "symbol": "btc", "name": "Bitcoin", "market_cap_rank": 1},
+            {"id": "ethereum", "symbol": "eth", "name": "Ethereum", "market_cap_rank": 2},
+        ]
+
+    def random(self):
+        with self.lock:
+            return self.rng.random()
+
+    def sample_latency(self, service):
+        model = self.latency.get(service)
+        if model is None:
+            return 0.0
+        with self.lock:
+            return max(0.0, model.sample(self.rng))
+
+    def pick_error(self, service):
+        """
+        Decide whether to fail a request
+
+        Args:
+            service: Service name
+
+        Returns:
+            HTTP status code to fail with, or None
+        """
+        if self.random() >= self.error_rates.get(service, 0.0):
+            return None
+
+        roll = self.random() * sum(self.error_mix.values())
+        for status, weight in self.error_mix.items():
+            roll -= weight
+            if roll <= 0:
+                return status
+        return 500
+
+    def pick_bad_output(self):
+        """
+        Decide whether a completion should be a broken generation
+
+        Returns:
+            Kind of broken output (see simulated_completion), or None
+        """
+        with self.lock:
+            if self.rng.random() >= self.bad_output_rate:
+                return None
+            return self.rng.choice(BAD_OUTPUT_KINDS)
+
+    def count(self, service, status):
+        with self.lock:
+            self.counters[f"{service} {status}"] += 1
+
+    def add_file(self, data, filename, purpose):
+        """
+        Store an uploaded file
+
+        Returns:
+            File object dict
+        """
+        with self.lock:
+            file_id = f"file-sim{next(self.ids)}"
+            self.files[file_id] = {
+                "id": file_id,
+                "object": "file",
+                "bytes": len(data),
+                "created_at": int(time.time()),
+                "filename": filename or f"{file_id}.jsonl",
+                "purpose": purpose,
+                "status": "processed",
+                "data": data,
+            }
+            return {k: v for k, v in self.files[file_id].items() if k != 'data'}
+
+    def create_batch(self, request):
+        """
+        Create a batch that completes `batch_delay` seconds from now
+
+        Returns:
+            Batch object dict
+        """
+        now = int(time.time())
+        lines = self.files[request['input_file_id']]['data'].decode('utf-8').splitlines()
+
+        with self.lock:
+            batch_id = f"batch_sim{next(self.ids)}"
+            self.batches[batch_id] = {
+                "id": batch_id,
+                "object": "batch",
+                "endpoint": request.get('endpoint', '/v1/chat/completions'),
+                "input_file_id": request['input_file_id'],
+                "completion_window": request.get('completion_window', '24h'),
+                "status": "in_progress",
+                "output_file_id": None,
+                "error_file_id": None,
+                "created_at": now,
+                "in_progress_at": now,
+                "expires_at": now + 24 * 3600,
+                "request_counts": {"total": len([line for line in lines if line.strip()]),
+                                   "completed": 0, "failed": 0},
+                "_due": time.monotonic() + self.batch_delay,
+                "_started": time.monotonic(),
+            }
+            return self._public_batch(batch_id)
+
+    def poll_batch(self, batch_id, cancel=False):
+        """
+        Return a batch, finishing it once it is due (or cancelling it)
+
+        A cancelled batch keeps the results of the share of requests it
+        would have completed by then, like a partially processed real batch.
+
+        Returns:
+            Batch object dict, or None if unknown
+        """
+        with self.lock:
+            batch = self.batches.get(batch_id)
+            if batch is None:
+                return None
+
+            if batch['status'] == 'in_progress':
+                now = time.monotonic()
+                if cancel:
+                    elapsed = now - batch['_started']
+                    self._finish_batch(batch, 'cancelled', min(1.0, elapsed / max(self.batch_delay, 1e-6)))
+                elif now >= batch['_due']:
+                    self._finish_batch(batch, 'completed', 1.0)
+
+            return self._public_batch(batch_id)
+
+    def _finish_batch(self, batch, status, fraction):
+        lines = [line for line in self.files[batch['input_file_id']]['data'].decode('utf-8').splitlines()
+                 if line.strip()]
+        outputs, errors = [], []
+
+        for line in lines[:int(len(lines) * fraction)]:
+            request = json.loads(line)
+            record = {"id": f"batch_req_sim{next(self.ids)}", "custom_id": request['custom_id'], "error": None}
+            # Same injected failure rate as direct OpenAI calls (self.lock is held, so no self.random())
+            if self.rng.random() < self.error_rates.get('openai', 0.0):
+                record["response"] = {"status_code": 500, "body": {"error": {"message": "Simulated 500"}}}
+                errors.append(record)
+            else:
+                record["response"] = {"status_code": 200, "body": simulated_completion(request['body'])}
+                outputs.append(record)
+
+        for key, records in (('output_file_id', outputs), ('error_file_id', errors)):
+            if records:
+                file_id = f"file-sim{next(self.ids)}"
+                data = ''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in records).encode('utf-8')
+                self.files[file_id] = {"id": file_id, "object": "file", "bytes": len(data),
+                                       "created_at": int(time.time()), "filename": f"{file_id}.jsonl",
+                                       "purpose": "batch_output", "status": "processed", "data": data}
+                batch[key] = file_id
+
+        batch['status'] = status
+        batch[f"{status}_at"] = int(time.time())
+        batch['request_counts'] = {"total": len(lines), "completed": len(outputs), "failed": len(errors)}
+
+    def _public_batch(self, batch_id):
+        return {k: v for k, v in self.batches[batch_id].items() if not k.startswith('_')}
+
+
+def article_id_for(query, page, position):
+    return f"{zlib.crc32(f'{query}|{page}'.encode()) % 100000:05d}-{position}"
+
+
+def story_for(story_id, term):
+    """
+    Build the (deterministic) details of a simulated story
+
+    Args:
+        story_id: Story ID (shared by syndicated copies)
+        term: Coin or topic the story is about
+
+    Returns:
+        Dict with title, syndicated_title, description and body paragraphs
+    """
+    rng = random.Random(story_id)
+    fund = f"{rng.choice(FUND_PREFIXES)}{rng.choice(FUND_SUFFIXES)} {rng.choice(FUND_KINDS)}"
+    amount = round(rng.uniform(5, 950), 1)
+    catalyst = rng.choice(CATALYSTS)
+    action = rng.choice(ACTIONS)
+
+    lead = f"{fund} {action} ${amount}M of {term} {catalyst}."
+    paragraphs = [lead] + [
+        f"{term} {' '.join(rng.choice(FILLER_SENTENCES) for _ in range(3))} "
+        f"{fund} has not commented on the {rng.choice(['transfer', 'position', 'trade', 'allocation'])}."
+        for _ in range(rng.randint(4, 9))
+    ]
+
+    return {
+        "title": f"{term} {rng.choice(MOVES)} as {fund} {action} ${amount}M",
+        "syndicated_title": f"{fund} {action} ${amount}M in {term} {catalyst}",
+        "description": lead,
+        "paragraphs": paragraphs,
+    }
+
+
+class SimulatorHandler(BaseHTTPRequestHandler):
+    """
+    Routes requests to the fake CoinGecko, GNews, OpenAI and publisher endpoints
+    """
+
+    protocol_version = "HTTP/1.1"
+    state = None  # set by serve()
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+    # Routing -----------------------------------------------------------------
+
+    def do_HEAD(self):
+        self._route(head=True)
+
+    def do_GET(self):
+        self._route()
+
+    def do_POST(self):
+        self._route()
+
+    def _route(self, head=False):
+        parsed = urlparse(self.path)
+        path = parsed.path
+        query = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+
+        if path == '/_stats':
+            return self._send_json(200, dict(self.state.counters))
+
+        if path.startswith('/coingecko/'):
+            service, handler = 'coingecko', self._coingecko
+        elif path.startswith('/gnews/'):
+            service, handler = 'gnews', self._gnews
+        elif path.startswith('/openai/'):
+            service, handler = 'openai', self._openai
+        elif path.startswith('/articles/'):
+            service, handler = 'publisher', self._publisher
+        else:
+            return self._send_json(404, {"error": "not found"})
+
+        body = self._read_body()
+        time.sleep(self.state.sample_latency(service))
+
+        status = self.state.pick_error(service)
+        if service == 'publisher' and self.server.server_address[0] in self.state.down_hosts:
+            status = 503
+        if status is not None:
+            self.state.count(service, status)
+            headers = {'Retry-After': str(self.state.retry_after)} if status in (429, 503) else {}
+            return self._send_json(status, {"error": {"message": f"Simulated {status}"}}, headers, head)
+
+        self.state.count(service, 200)
+        handler(path, query, body, head)
+
+    # Helpers -----------------------------------------------------------------
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _send(self, status, payload, content_type, headers=None, head=False):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if not head:
+            self.wfile.write(payload)
+
+    def _send_json(self, status, data, headers=None, head=False):
+        payload = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self._send(status, payload, 'application/json', headers, head)
+
+    def _stream_completion(self, completion, include_usage):
+        """
+        Send a completion as server-sent events at --stream-tps tokens/sec
+        """
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        content = completion['choices'][0]['message']['content']
+        base = {k: completion[k] for k in ('id', 'created', 'model')}
+        base['object'] = 'chat.completion.chunk'
+
+        def event(choices, **extra):
+            data = json.dumps({**base, 'choices': choices, **extra}, ensure_ascii=False)
+            payload = f"data: {data}\n\n".encode('utf-8')
+            self.wfile.write(f"{len(payload):X}\r\n".encode() + payload + b"\r\n")
+            self.wfile.flush()
+
+        try:
+            event([{'index': 0, 'delta': {'role': 'assistant', 'content': ''}, 'finish_reason': None}])
+            for start in range(0, len(content), STREAM_CHUNK_CHARS):
+                piece = content[start:start + STREAM_CHUNK_CHARS]
+                time.sleep(len(piece) / 4 / self.state.stream_tps)
+                event([{'index': 0, 'delta': {'content': piece}, 'finish_reason': None}])
+            event([{'index': 0, 'delta': {}, 'finish_reason': 'stop'}])
+            if include_usage:
+                event([], usage=completion['usage'])
+
+            payload = b"data: [DONE]\n\n"
+            self.wfile.write(f"{len(payload):X}\r\n".encode() + payload + b"\r\n0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client aborted the generation
+            self.state.count('openai', 'stream_aborted')
+            self.close_connection = True
+
+    # Endpoints ---------------------------------------------------------------
+
+    def _coingecko(self, path, query, body, head):
+        per_page = int(query.get('per_page', 100))
+        coins = sorted(self.state.coins, key=lambda c: c.get('market_cap_rank') or 999)[:per_page]
+        data = [
+            {
+                "id": c["id"],
+                "symbol": c["symbol"],
+                "name": c["name"],
+                "market_cap_rank": c.get("market_cap_rank"),
+                "current_price": round(1000.0 / (c.get("market_cap_rank") or 1), 4),
+            }
+            for c in coins
+        ]
+        self._send_json(200, data, head=head)
+
+    def _gnews(self, path, query, body, head):
+        q = query.get('q', 'crypto')
+        page = int(query.get('page', 1))
+        max_articles = min(int(query.get('max', 10)), 100)
+
+        terms = [t.strip() for t in re.split(r'\bOR\b', q) if t.strip()] or ['crypto']
+        rng = random.Random(f"{q}|{page}")
+        now = datetime.utcnow()
+        articles = []
+
+        for position in range(max_articles):
+            article_id = article_id_for(q, page, position)
+            term = rng.choice(terms)
+            publisher = rng.choice(PUBLISHERS)
+            host = self.state.publisher_hosts[position % len(self.state.publisher_hosts)]
+            base = f"http://{host}:{self.state.port}"
+
+            # Now and then another outlet carries a retitled copy of the previous story
+            syndicated = bool(articles) and rng.random() < SYNDICATION_RATE
+            if syndicated:
+                term = story_term
+            else:
+                story_id, story_term = article_id, term
+            story = story_for(story_id, term)
+
+            articles.append({
+                "title": story["syndicated_title" if syndicated else "title"],
+                "description": story["description"],
+                "content": rng.choice(FILLER_SENTENCES),
+                "url": f"{base}/articles/{article_id}?term={term}&story={story_id}",
+                "image": f"{base}/articles/{article_id}.jpg",
+                "publishedAt": (now - timedelta(minutes=rng.randint(1, 720))).strftime('%Y-%m-%dT%H:%M:%SZ'),
+                "source": {"name": publisher, "url": base},
+            })
+
+        self._send_json(200, {"totalArticles": max_articles * 5, "articles": articles}, head=head)
+
+    def _publisher(self, path, query, body, head):
+        article_id = path.rsplit('/', 1)[-1]
+        term = query.get('term', 'Bitcoin')
+        story = story_for(query.get('story', article_id), term)
+        paragraphs = ''.join(f"<p>{paragraph}</p>\n" for paragraph in story["paragraphs"])
+        html = (
+            "<!DOCTYPE html><html><head><title>"
+            f"{term} market update {article_id}</title></head><body>"
+            f"<nav><a href='/'>Home</a></nav><article><h1>{term} market update</h1>\n"
+            f"{paragraphs}</article><footer>Share this article</footer></body></html>"
+        )
+        self._send(200, html.encode('utf-8'), 'text/html; charset=utf-8', head=head)
+
+    def _openai(self, path, query, body, head):
+        if path.endswith('/chat/completions'):
+            request = json.loads(body or b'{}')
+            completion = simulated_completion(request, self.state.pick_bad_output())
+            if request.get('stream'):
+                include_usage = (request.get('stream_options') or {}).get('include_usage', False)
+                return self._stream_completion(completion, include_usage)
+            return self._send_json(200, completion, head=head)
+
+        if path.endswith('/files') and self.command == 'POST':
+            fields = parse_multipart(self.headers.get('Content-Type', ''), body)
+            filename, data = fields.get('file', ('upload.jsonl', b''))
+            purpose = fields.get('purpose', (None, b'batch'))[1].decode()
+            return self._send_json(200, self.state.add_file(data, filename, purpose), head=head)
+
+        match = re.search(r'/files/([^/]+)/content$', path)
+        if match:
+            data = self.state.files.get(match.group(1), {}).get('data')
+            if data is None:
+                return self._send_json(404, {"error": {"message": "No such file"}})
+            return self._send(200, data, 'application/octet-stream', head=head)
+
+        if path.endswith('/batches') and self.command == 'POST':
+            request = json.loads(body or b'{}')
+            if request.get('input_file_id') not in self.state.files:
+                return self._send_json(400, {"error": {"message": "Unknown input_file_id"}})
+            return self._send_json(200, self.state.create_batch(request), head=head)
+
+        match = re.search(r'/batches/([^/]+?)(/cancel)?$', path)
+        if match:
+            batch = self.state.poll_batch(match.group(1), cancel=bool(match.group(2)))
+            if batch is None:
+                return self._send_json(404, {"error": {"message": "No such batch"}})
+            return self._send_json(200, batch, head=head)
+
+        self._send_json(404, {"error": {"message": f"Unsupported endpoint {path}"}})
+
+
+def simulated_completion(request, bad_output=None):
+    """
+    Build a chat completion for a rewrite request
+
+    Args:
+        request: Chat completion request body
+        bad_output: Optional kind of broken generation to return instead
+            ('prose': text before the JSON, 'no_title': JSON without a title)
+
+    Returns:
+        Chat completion response dict
+    """
+    prompt = ''.join(m.get('content', '') for m in request.get('messages', []))
+    title = re.search(r'Original-Titel: (.*)', prompt)
+    title = title.group(1).strip() if title else 'Krypto-Nachrichten'
+
+    article = {
+        "title": f"{title} (deutsche Fassung)",
+        "summary": "Eine kurze Zusammenfassung der wichtigsten Entwicklungen am Kryptomarkt.",
+        "content": " ".join(
+            "Der Markt bewegte sich heute deutlich, während Anleger neue Daten bewerteten."
+            for _ in range(40)
+        ),
+    }
+    if bad_output == 'no_title':
+        article = {"headline_de": article["title"], **{k: v for k, v in article.items() if k != 'title'}}
+    content = json.dumps(article, ensure_ascii=False)
+    if bad_output == 'prose':
+        content = "Gerne! Hier ist der umgeschriebene Artikel auf Deutsch:\n\n" + content
+    prompt_tokens = len(prompt) // 4 + 1
+    completion_tokens = len(content) // 4 + 1
+
+    return {
+        "id": f"chatcmpl-sim-{int(time.time() * 1000)}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.get('model', 'gpt-3.5-turbo'),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+def parse_multipart(content_type, body):
+    """
+    Parse a multipart/form-data body
+
+    Args:
+        content_type: Content-Type header (with the boundary)
+        body: Raw request body
+
+    Returns:
+        Dict of field name -> (filename, bytes)
+    """
+    message = BytesParser(policy=email_policy.HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode() + body
+    )
+    fields = {}
+    for part in message.iter_parts():
+        name = part.get_param('name', header='content-disposition')
+        fields[name] = (part.get_filename(), part.get_payload(decode=True) or b'')
+    return fields
+
+
+def parse_service_options(values, parse_value):
+    """
+    Parse repeated SERVICE=VALUE options
+
+    Args:
+        values: List of 'service=value' strings
+        parse_value: Callable converting the value part
+
+    Returns:
+        Dict of service -> parsed value ('all' applies to every service)
+    """
+    options = {}
+    for item in values or []:
+        service, _, value = item.partition('=')
+        targets = SERVICES if service == 'all' else [service]
+        for target in targets:
+            if target not in SERVICES:
+                raise ValueError(f"Unknown service '{target}' (expected one of {', '.join(SERVICES)})")
+            options[target] = parse_value(value)
+    return options
+
+
+def serve(state, hosts, port):
+    """
+    Start one server per publisher host (all sharing the same state)
+
+    Args:
+        state: SimulatorState
+        hosts: Addresses to bind
+        port: Port to bind on every address
+
+    Returns:
+        List of running servers
+    """
+    SimulatorHandler.state = state
+    servers = []
+
+    for host in hosts:
+        server = ThreadingHTTPServer((host, port), SimulatorHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+
+    return servers
+
+
+def main():
+    """
+    Run the simulator until interrupted
+    """
+    parser = argparse.ArgumentParser(description="Local stand-in for the pipeline's external services")
+    parser.add_argument('--host', default='127.0.0.1', help="Address for the API endpoints")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--publisher-hosts', default='',
+                        help="Extra loopback addresses for publisher sites, e.g. 127.0.0.2,127.0.0.3 "
+                             "(lets per-host scrape limits apply; Linux routes all of 127/8 to loopback)")
+    parser.add_argument('--latency', action='append', metavar='SERVICE=SPEC',
+                        help="Latency per service: fixed:S, uniform:LOW,HIGH, lognormal:MEDIAN,SIGMA, exp:MEAN")
+    parser.add_argument('--error-rate', action='append', metavar='SERVICE=RATE',
+                        help="Fraction of requests to fail, e.g. openai=0.05 or all=0.01")
+    parser.add_argument('--error-mix', default='429:0.5,500:0.25,503:0.25',
+                        help="Status codes and weights for injected errors")
+    parser.add_argument('--retry-after', type=int, default=2, help="Retry-After seconds on 429/503")
+    parser.add_argument('--batch-delay', type=float, default=10.0,
+                        help="Seconds until a submitted OpenAI batch completes")
+    parser.add_argument('--stream-tps', type=float, default=400.0,
+                        help="Tokens per second for streamed OpenAI completions")
+    parser.add_argument('--bad-output-rate', type=float, default=0.0,
+                        help="Fraction of OpenAI completions that are broken generations")
+    parser.add_argument('--down-hosts', default='',
+                        help="Publisher addresses that always answer 503, e.g. 127.0.0.3")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    try:
+        latency = parse_service_options(args.latency, LatencyModel)
+        error_rates = parse_service_options(args.error_rate, float)
+        error_mix = {
+            int(code): float(weight)
+            for code, weight in (item.split(':') for item in args.error_mix.split(','))
+        }
+    except ValueError as e:
+        parser.error(str(e))
+
+    extra_hosts = [h.strip() for h in args.publisher_hosts.split(',') if h.strip()]
+    publisher_hosts = [args.host] + [h for h in extra_hosts if h != args.host]
+
+    state = SimulatorState(latency, error_rates, error_mix, args.retry_after,
+                           publisher_hosts, args.port, args.seed, args.batch_delay,
+                           args.stream_tps, args.bad_output_rate,
+                           [h.strip() for h in args.down_hosts.split(',') if h.strip()])
+    servers = serve(state, publisher_hosts, args.port)
+
+    base = f"http://{args.host}:{args.port}"
+    logger.info(f"Simulator listening on {', '.join(publisher_hosts)} port {args.port}")
+    logger.info("Point the pipeline at it with:")
+    print(f"export COINGECKO_API_BASE={base}/coingecko")
+    print(f"export GNEWS_API_BASE={base}/gnews")
+    print(f"export OPENAI_BASE_URL={base}/openai/v1")
+    print("export GNEWS_API_KEY=simulated OPENAI_API_KEY=simulated")
+    print("export DATA_DIR=/tmp/ai-crypto-news-sim/data CONTENT_DIR=/tmp/ai-crypto-news-sim/content")
+    sys.stdout.flush()
+
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        logger.info(f"Request counts: {dict(state.counters)}")
+        for server in servers:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,14 @@
 """
 Utility functions for AI Crypto News
-Provides helper functions for logging, sanitization, and retry logic
+Provides helper functions for logging, sanitization and text matching
 """
 
 import re
 import logging
-import time
-from functools import wraps
 from datetime import datetime
 import pytz
 
-from config import LOG_LEVEL, LOG_FORMAT
+from config import LOG_LEVEL, LOG_FORMAT, RELEVANCE_WEIGHTS
 
 
 def setup_logger(name):
@@ -67,42 +65,6 @@ def sanitize_filename(text, max_length=100):
     return text
 
 
-def retry_with_backoff(max_retries=3, base_delay=1, backoff_factor=2):
-    """
-    Decorator to retry a function with exponential backoff
-
-    Args:
-        max_retries: Maximum number of retry attempts
-        base_delay: Initial delay in seconds
-        backoff_factor: Multiplier for delay on each retry
-
-    Returns:
-        Decorated function
-    """
-    def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            logger = logging.getLogger(func.__module__)
-
-            for attempt in range(max_retries):
-                try:
-                    return func(*args, **kwargs)
-                except Exception as e:
-                    if attempt == max_retries - 1:
-                        logger.error(f"{func.__name__} failed after {max_retries} attempts: {e}")
-                        raise
-
-                    delay = base_delay * (backoff_factor ** attempt)
-                    logger.warning(
-                        f"{func.__name__} attempt {attempt + 1} failed: {e}. "
-                        f"Retrying in {delay}s..."
-                    )
-                    time.sleep(delay)
-
-        return wrapper
-    return decorator
-
-
 def format_datetime_iso(dt_string):
     """
     Convert various datetime formats to ISO format for Hugo
@@ -178,6 +140,9 @@ def calculate_relevance_score(article, coin_data):
     """
     Calculate relevance score for an article-coin match
 
+    Reference implementation for coin_matcher.match_articles, which
+    computes the same scores for a whole batch in one scan per article.
+
     Args:
         article: Article dict with 'title' and 'description'
         coin_data: Coin dict with 'id', 'symbol', 'name'
@@ -196,19 +161,19 @@ def calculate_relevance_score(article, coin_data):
 
     # Title matches are worth more
     if coin_name in title:
-        score += 10.0
+        score += RELEVANCE_WEIGHTS['title_name']
     if coin_symbol in title:
-        score += 8.0
+        score += RELEVANCE_WEIGHTS['title_symbol']
     if coin_id in title:
-        score += 6.0
+        score += RELEVANCE_WEIGHTS['title_id']
 
     # Description matches
     if coin_name in description:
-        score += 5.0
+        score += RELEVANCE_WEIGHTS['description_name']
     if coin_symbol in description:
-        score += 4.0
+        score += RELEVANCE_WEIGHTS['description_symbol']
     if coin_id in description:
-        score += 3.0
+        score += RELEVANCE_WEIGHTS['description_id']
 
     return score
 
@@ -236,33 +201,3 @@ def truncate_text(text, max_length=200, suffix='...'):
         truncated = truncated[:last_space]
 
     return truncated + suffix
-
-
-def rate_limit(calls_per_minute):
-    """
-    Decorator to enforce rate limiting
-
-    Args:
-        calls_per_minute: Maximum number of calls allowed per minute
-
-    Returns:
-        Decorated function
-    """
-    min_interval = 60.0 / calls_per_minute
-    last_called = [0.0]
-
-    def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            elapsed = time.time() - last_called[0]
-            left_to_wait = min_interval - elapsed
-
-            if left_to_wait > 0:
-                time.sleep(left_to_wait)
-
-            ret = func(*args, **kwargs)
-            last_called[0] = time.time()
-            return ret
-
-        return wrapper
-    return decorator
@@ -0,0 +1,373 @@
+"""
+Leased article work queue for distributed enhancement
+A coordinator enqueues matched articles; worker processes (on this host
+or on machines sharing the data directory) lease them, scrape, rewrite and
+write them. Leases expire if a worker dies, and the items are handed out again.
+"""
+
+import os
+import json
+import time
+import socket
+import sqlite3
+import threading
+
+from config import WORK_QUEUE_PATH, WORK_LEASE_SECONDS, WORK_MAX_ATTEMPTS
+from utils import setup_logger
+
+logger = setup_logger(__name__)
+
+STATUS_PENDING = "pending"
+STATUS_LEASED = "leased"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+BUSY_TIMEOUT = 30  # seconds to wait for another process's write lock
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL UNIQUE,
+    run_id TEXT NOT NULL,
+    article TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    result TEXT,
+    error TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_items_status ON items(status, lease_expires);
+CREATE INDEX IF NOT EXISTS idx_items_run ON items(run_id, status);
+"""
+
+
+def worker_name():
+    """
+    Build a worker identity that is unique across hosts sharing the queue
+
+    Returns:
+        String of the form host-pid
+    """
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class WorkQueue:
+    """
+    SQLite-backed queue of articles with time-limited leases
+
+    An item is leased to one worker at a time. The worker renews the lease
+    while it works on the item (see LeaseKeeper) and then completes or fails
+    it. An item whose lease runs out is leased again, up to WORK_MAX_ATTEMPTS
+    times in total. Every thread gets its own connection, so one instance can
+    be shared by a worker's threads.
+    """
+
+    def __init__(self, path=WORK_QUEUE_PATH, lease_seconds=WORK_LEASE_SECONDS, max_attempts=WORK_MAX_ATTEMPTS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), isolation_level=None, timeout=BUSY_TIMEOUT)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _write(self, sql, params=()):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = conn.execute(sql, params)
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        return cursor.rowcount
+
+    def enqueue(self, articles, run_id):
+        """
+        Add articles to the queue
+
+        Articles already done are left alone. Unfinished articles from an
+        earlier run are taken over by this run, and failed ones get a fresh
+        set of attempts.
+
+        Args:
+            articles: Iterable of matched article dicts
+            run_id: Identifier of the coordinator run
+
+        Returns:
+            Number of articles queued or taken over
+        """
+        now = time.time()
+        rows = [(a['url'], run_id, json.dumps(a, ensure_ascii=False), now) for a in articles]
+
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            before = conn.total_changes
+            conn.executemany(
+                """
+                INSERT INTO items (url, run_id, article, updated_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    run_id = excluded.run_id,
+                    status = CASE WHEN items.status = 'failed' THEN 'pending' ELSE items.status END,
+                    attempts = CASE WHEN items.status = 'failed' THEN 0 ELSE items.attempts END,
+                    updated_at = excluded.updated_at
+                WHERE items.status != 'done'
+                """,
+                rows
+            )
+            queued = conn.total_changes - before
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+        return queued
+
+    def lease(self, owner, limit=1):
+        """
+        Lease pending items (and items whose lease expired)
+
+        Expired items that used up their attempts are marked failed
+        instead of being handed out again.
+
+        Args:
+            owner: Worker identity
+            limit: Maximum number of items to lease
+
+        Returns:
+            List of (item id, article dict) tuples
+        """
+        conn = self._conn()
+        now = time.time()
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                """
+                UPDATE items SET status = 'failed', error = 'lease expired too often', updated_at = ?
+                WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?
+                """,
+                (now, now, self.max_attempts)
+            )
+
+            rows = conn.execute(
+                """
+                SELECT id, article, status, lease_owner FROM items
+                WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?)
+                ORDER BY id LIMIT ?
+                """,
+                (now, limit)
+            ).fetchall()
+
+            conn.executemany(
+                """
+                UPDATE items SET status = 'leased', lease_owner = ?, lease_expires = ?,
+                    attempts = attempts + 1, updated_at = ?
+                WHERE id = ?
+                """,
+                [(owner, now + self.lease_seconds, now, row[0]) for row in rows]
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+        for item_id, article, status, previous_owner in rows:
+            if status == STATUS_LEASED:
+                logger.warning(f"Reclaimed item {item_id} from {previous_owner} after its lease expired")
+
+        return [(item_id, json.loads(article)) for item_id, article, _, _ in rows]
+
+    def renew(self, owner, item_ids):
+        """
+        Extend the leases a worker still holds
+
+        Args:
+            owner: Worker identity
+            item_ids: Item IDs being worked on
+
+        Returns:
+            Number of leases renewed (items reclaimed by another worker are not)
+        """
+        if not item_ids:
+            return 0
+
+        placeholders = ','.join('?' * len(item_ids))
+        return self._write(
+            f"""
+            UPDATE items SET lease_expires = ?, updated_at = ?
+            WHERE status = 'leased' AND lease_owner = ? AND id IN ({placeholders})
+            """,
+            (time.time() + self.lease_seconds, time.time(), owner, *item_ids)
+        )
+
+    def complete(self, item_id, owner, result=None):
+        """
+        Mark an item as done
+
+        Args:
+            item_id: Item ID
+            owner: Worker identity
+            result: Optional JSON-serializable outcome (e.g. the written file)
+
+        Returns:
+            True if the worker still held the lease, False if the item was
+            reclaimed by another worker (and left to it)
+        """
+        return self._write(
+            """
+            UPDATE items SET status = 'done', result = ?, error = NULL, updated_at = ?
+            WHERE id = ? AND status = 'leased' AND lease_owner = ?
+            """,
+            (json.dumps(result, ensure_ascii=False), time.time(), item_id, owner)
+        ) > 0
+
+    def fail(self, item_id, owner, error):
+        """
+        Give an item back after a failed attempt
+
+        The item is leased again later unless it used up its attempts.
+
+        Args:
+            item_id: Item ID
+            owner: Worker identity
+            error: Short description of the failure
+
+        Returns:
+            True if the worker still held the lease
+        """
+        return self._write(
+            """
+            UPDATE items SET
+                status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                lease_owner = NULL, lease_expires = NULL, error = ?, updated_at = ?
+            WHERE id = ? AND status = 'leased' AND lease_owner = ?
+            """,
+            (self.max_attempts, error, time.time(), item_id, owner)
+        ) > 0
+
+    def release(self, owner, item_ids):
+        """
+        Return leased items untouched (e.g. on shutdown), without using up an attempt
+
+        Args:
+            owner: Worker identity
+            item_ids: Item IDs to give back
+        """
+        if not item_ids:
+            return
+
+        placeholders = ','.join('?' * len(item_ids))
+        self._write(
+            f"""
+            UPDATE items SET status = 'pending', attempts = MAX(0, attempts - 1),
+                lease_owner = NULL, lease_expires = NULL, updated_at = ?
+            WHERE status = 'leased' AND lease_owner = ? AND id IN ({placeholders})
+            """,
+            (time.time(), owner, *item_ids)
+        )
+
+    def counts(self, run_id=None):
+        """
+        Count items by status
+
+        Args:
+            run_id: Only count items of this run (all items if None)
+
+        Returns:
+            Dict of status -> count
+        """
+        if run_id is None:
+            rows = self._conn().execute("SELECT status, COUNT(*) FROM items GROUP BY status")
+        else:
+            rows = self._conn().execute(
+                "SELECT status, COUNT(*) FROM items WHERE run_id = ? GROUP BY status", (run_id,)
+            )
+        counts = {STATUS_PENDING: 0, STATUS_LEASED: 0, STATUS_DONE: 0, STATUS_FAILED: 0}
+        counts.update(dict(rows.fetchall()))
+        return counts
+
+    def results(self, run_id):
+        """
+        Return the outcomes of a run's finished items
+
+        Args:
+            run_id: Identifier of the coordinator run
+
+        Returns:
+            List of (url, status, result dict or None, error) tuples
+        """
+        rows = self._conn().execute(
+            "SELECT url, status, result, error FROM items WHERE run_id = ? AND status IN ('done', 'failed')",
+            (run_id,)
+        ).fetchall()
+        return [(url, status, json.loads(result) if result else None, error) for url, status, result, error in rows]
+
+    def close(self):
+        """
+        Close this thread's connection
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class LeaseKeeper:
+    """
+    Background thread renewing a worker's leases while it works on them
+
+    Renews every third of the lease time, so a worker that stalls (or dies)
+    loses its items within one lease period.
+    """
+
+    def __init__(self, queue, owner):
+        self.queue = queue
+        self.owner = owner
+        self.held = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='lease-keeper', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+
+    def hold(self, item_ids):
+        with self._lock:
+            self.held.update(item_ids)
+
+    def drop(self, item_id):
+        with self._lock:
+            self.held.discard(item_id)
+
+    def _run(self):
+        while not self._stop.wait(self.queue.lease_seconds / 3):
+            with self._lock:
+                item_ids = list(self.held)
+            try:
+                renewed = self.queue.renew(self.owner, item_ids)
+                if renewed < len(item_ids):
+                    logger.warning(f"{len(item_ids) - renewed} leases were reclaimed by other workers")
+            except sqlite3.Error as e:
+                logger.warning(f"Renewing leases failed: {e}")
+
+        self.queue.close()
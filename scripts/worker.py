@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Enhancement workers for the leased article work queue
+`run_daily.py --queue` enqueues the matched articles; any number of
+`worker.py` processes (on this host or on machines sharing the data and
+content directories) lease them, scrape, rewrite and write the content files
+"""
+
+import sys
+import time
+import argparse
+import subprocess
+from pathlib import Path
+
+from config import (
+    CONTENT_DIR,
+    METRICS_PATH,
+    PROMETHEUS_METRICS_PATH,
+    WORK_BATCH_SIZE,
+    WORK_POLL_INTERVAL
+)
+from utils import setup_logger
+from work_queue import (
+    WorkQueue,
+    LeaseKeeper,
+    worker_name,
+    STATUS_PENDING,
+    STATUS_LEASED,
+    STATUS_DONE,
+    STATUS_FAILED
+)
+from fetch_news import collect_articles_to_enhance, iter_enhanced_articles
+from near_duplicates import NearDuplicateIndex
+from article_index import ArticleIndex
+from extraction_pool import shutdown_pool
+from generate_content import write_article_incremental
+import metrics
+
+logger = setup_logger(__name__)
+
+WORKER_SCRIPT = Path(__file__).resolve()
+
+
+def process_items(queue, owner, items, keeper, index):
+    """
+    Enhance and write one batch of leased articles
+
+    Every item ends up completed (written, already published or a
+    near-duplicate) or failed (scrape, rewrite or write error), so it is
+    retried by the next worker that leases it.
+
+    Args:
+        queue: WorkQueue
+        owner: Worker identity
+        items: List of (item id, article) tuples leased by this worker
+        keeper: LeaseKeeper renewing the leases
+        index: ArticleIndex for published articles
+
+    Returns:
+        Dict of outcome -> count
+    """
+    by_url = {article['url']: item_id for item_id, article in items}
+    outcomes = {}
+
+    def settle(article, outcome, result=None, error=None):
+        item_id = by_url.pop(article['url'], None)
+        if item_id is None:
+            return
+        if error:
+            held = queue.fail(item_id, owner, error)
+        else:
+            held = queue.complete(item_id, owner, result or {'status': outcome})
+        keeper.drop(item_id)
+        if not held:
+            logger.warning(f"Lease on {article['url']} was reclaimed by another worker; {outcome} not recorded")
+            outcome = 'lease_lost'
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+    def dropped(article, reason):
+        if reason == 'near_duplicate':
+            settle(article, reason)
+        else:
+            settle(article, reason, error=reason)
+
+    try:
+        with NearDuplicateIndex() as near_duplicates:
+            articles = [article for _, article in items]
+            for article in iter_enhanced_articles(articles, near_duplicates=near_duplicates, on_drop=dropped):
+                # A reclaimed item may have been published by the worker that lost it
+                if index.contains(article['url']):
+                    settle(article, 'skipped')
+                    continue
+
+                try:
+                    filepath, status = write_article_incremental(article, index)
+                    index.commit()
+                except Exception as e:
+                    logger.error(f"Error writing article from {article['url']}: {e}")
+                    settle(article, 'write_failed', error=f"write failed: {e}")
+                    # Let a later copy of the story take its place
+                    near_duplicates.remove(article['url'])
+                    continue
+
+                # Only written stories are saved for later runs' near-duplicate checks
+                try:
+                    near_duplicates.persist(article['url'])
+                except Exception as e:
+                    logger.warning(f"Could not save near-duplicate signatures for {article['url']}: {e}")
+                settle(article, status, {'status': status, 'file': filepath.name})
+    finally:
+        # Whatever was not settled (e.g. the worker is shutting down) goes back untouched
+        queue.release(owner, list(by_url.values()))
+        for item_id in by_url.values():
+            keeper.drop(item_id)
+
+    return outcomes
+
+
+def run_worker(batch_size=WORK_BATCH_SIZE, exit_when_idle=False, poll_interval=WORK_POLL_INTERVAL):
+    """
+    Lease and process articles until stopped
+
+    Args:
+        batch_size: Articles leased at a time
+        exit_when_idle: Stop once no item is pending or leased anywhere
+        poll_interval: Seconds to wait when there is nothing to lease
+
+    Returns:
+        Dict of outcome -> count over all batches
+    """
+    owner = worker_name()
+    queue = WorkQueue()
+    totals = {}
+
+    logger.info(f"Worker {owner} started (queue {queue.path}, batches of {batch_size})")
+
+    with LeaseKeeper(queue, owner) as keeper, ArticleIndex() as index:
+        index.ensure_populated()
+
+        while True:
+            items = queue.lease(owner, batch_size)
+
+            if not items:
+                counts = queue.counts()
+                if exit_when_idle and not counts[STATUS_PENDING] and not counts[STATUS_LEASED]:
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            keeper.hold(item_id for item_id, _ in items)
+            logger.info(f"Leased {len(items)} articles")
+
+            with metrics.span('worker_batch', items=len(items)):
+                outcomes = process_items(queue, owner, items, keeper, index)
+
+            for outcome, count in outcomes.items():
+                totals[outcome] = totals.get(outcome, 0) + count
+                metrics.incr('work_items_total', {'outcome': outcome}, count)
+            logger.info("Batch done: " + ", ".join(f"{k}={v}" for k, v in sorted(outcomes.items())))
+
+    logger.info(f"Worker {owner} finished: " + ", ".join(f"{k}={v}" for k, v in sorted(totals.items())))
+    return totals
+
+
+def start_local_workers(count, batch_size=WORK_BATCH_SIZE):
+    """
+    Start worker processes on this host that exit once the queue is drained
+
+    Args:
+        count: Number of workers
+        batch_size: Articles leased at a time per worker
+
+    Returns:
+        List of subprocess.Popen objects
+    """
+    command = [sys.executable, str(WORKER_SCRIPT), '--exit-when-idle', '--batch-size', str(batch_size)]
+    return [subprocess.Popen(command, cwd=WORKER_SCRIPT.parent) for _ in range(count)]
+
+
+def wait_for_run(queue, run_id, processes=(), poll_interval=WORK_POLL_INTERVAL):
+    """
+    Wait until every item of a run is done or failed
+
+    Args:
+        queue: WorkQueue
+        run_id: Identifier of the coordinator run
+        processes: Local worker processes; waiting stops early if all of them exit
+        poll_interval: Seconds between progress checks
+
+    Returns:
+        Final dict of status -> count for the run
+    """
+    last = None
+
+    while True:
+        counts = queue.counts(run_id)
+        if not counts[STATUS_PENDING] and not counts[STATUS_LEASED]:
+            return counts
+
+        if processes and all(p.poll() is not None for p in processes):
+            logger.warning(f"All local workers exited with {counts[STATUS_PENDING] + counts[STATUS_LEASED]} "
+                           f"articles unfinished; they stay queued for the next workers")
+            return counts
+
+        if counts != last:
+            logger.info(", ".join(f"{status}={count}" for status, count in counts.items()))
+            last = counts
+
+        time.sleep(poll_interval)
+
+
+def enhance_with_workers(coins, run_id, journal=None, workers=0, manifest=None):
+    """
+    Coordinator side of worker mode: queue the run's articles and collect the results
+
+    Args:
+        coins: CoinRegistry or list of coin dicts
+        run_id: Identifier of this run (stored with the queued items)
+        journal: Optional RunJournal (for the GNews batch)
+        workers: Local worker processes to start (0 waits for workers started elsewhere)
+        manifest: Manifest dict to fill in place
+
+    Returns:
+        Manifest dict with 'added', 'changed' and 'unchanged' file paths
+        and the number of 'skipped' duplicates
+    """
+    if manifest is None:
+        manifest = {'added': [], 'changed': [], 'unchanged': [], 'skipped': 0}
+
+    queue = WorkQueue()
+    articles = collect_articles_to_enhance(coins, journal)
+    queued = queue.enqueue(articles, run_id)
+    logger.info(f"Queued {queued} of {len(articles)} articles in {queue.path}")
+
+    processes = start_local_workers(workers) if workers else []
+    if not processes:
+        logger.info("Waiting for workers (start them with: python worker.py)")
+
+    try:
+        counts = wait_for_run(queue, run_id, processes)
+    finally:
+        for process in processes:
+            process.wait()
+
+    for url, status, result, error in queue.results(run_id):
+        if status != STATUS_DONE:
+            logger.warning(f"Gave up on {url}: {error}")
+            continue
+        outcome = (result or {}).get('status')
+        if outcome in ('added', 'changed', 'unchanged'):
+            manifest[outcome].append(CONTENT_DIR / result['file'])
+        elif outcome == 'skipped':
+            manifest['skipped'] += 1
+
+    logger.info(
+        f"Workers finished the run: {counts[STATUS_DONE]} done, {counts[STATUS_FAILED]} failed, "
+        f"{counts[STATUS_PENDING] + counts[STATUS_LEASED]} unfinished"
+    )
+    return manifest
+
+
+def worker_metrics_paths(owner):
+    """
+    Build this worker's metrics file paths next to the coordinator's
+
+    Args:
+        owner: Worker name
+
+    Returns:
+        Tuple of (JSON path, Prometheus path or None)
+    """
+    json_path = METRICS_PATH.with_name(f"{METRICS_PATH.stem}-{owner}{METRICS_PATH.suffix}")
+    prometheus_path = None
+    if PROMETHEUS_METRICS_PATH:
+        path = Path(PROMETHEUS_METRICS_PATH)
+        prometheus_path = path.with_name(f"{path.stem}-{owner}{path.suffix}")
+    return json_path, prometheus_path
+
+
+def main():
+    """
+    Command line entry point for a worker process
+    """
+    parser = argparse.ArgumentParser(description="Process articles from the work queue")
+    parser.add_argument('--batch-size', type=int, default=WORK_BATCH_SIZE, help="Articles leased at a time")
+    parser.add_argument('--exit-when-idle', action='store_true',
+                        help="Exit once no article is pending or leased (default: keep polling)")
+    args = parser.parse_args()
+
+    metrics.reset()
+    try:
+        run_worker(batch_size=max(1, args.batch_size), exit_when_idle=args.exit_when_idle)
+    finally:
+        shutdown_pool()
+        try:
+            metrics.log_summary()
+            metrics.write_metrics(*worker_metrics_paths(worker_name()))
+        except Exception as e:
+            logger.error(f"Failed to write worker metrics: {e}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        logger.warning("Worker interrupted; unfinished articles were returned to the queue")
+        sys.exit(130)